@@ -0,0 +1 @@
+"""Benchmarks and load-test harness for the bot."""
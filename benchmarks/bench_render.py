@@ -0,0 +1,52 @@
+"""
+Microbenchmark for MarkdownV2 escaping and view rendering.
+
+Usage:
+    python -m benchmarks.bench_render
+"""
+
+import timeit
+
+from bot.services.mailtm import MessageSummary
+from bot.utils.render import escape_md, render_inbox, render_notification
+
+SAMPLE = (
+    "Your verification code is 482-193. Visit https://example.com/verify?token=a_b-c "
+    "(expires in 10 min)! Questions? Reply to support@example.com [ref #42]."
+)
+
+PLAIN = "Hi there, thanks for signing up with us today and welcome aboard " * 3
+
+MESSAGE = MessageSummary.from_json({
+    "id": "65f0c1a2b3c4d5e6f7a8b9c0",
+    "from": {"address": "no-reply@accounts.example.com"},
+    "subject": "Confirm your e-mail address (action required!)",
+    "intro": SAMPLE,
+    "createdAt": "2024-03-12T10:15:00+00:00",
+    "seen": False,
+})
+
+
+def legacy_escape(s) -> str:
+    """Char-by-char escaping as previously duplicated across handlers."""
+    chars = r'_*[]()~`>#+-=|{}.!'
+    return ''.join(f'\\{c}' if c in chars else c for c in str(s))
+
+
+def bench(label: str, stmt, number: int) -> None:
+    """Time a callable and print microseconds per call."""
+    seconds = min(timeit.repeat(stmt, number=number, repeat=5))
+    print(f"{label:<32} {seconds / number * 1e6:8.2f} µs/call")
+
+
+def main():
+    bench("escape punctuated (legacy)", lambda: legacy_escape(SAMPLE), 20000)
+    bench("escape punctuated (translate)", lambda: escape_md(SAMPLE), 20000)
+    bench("escape plain (legacy)", lambda: legacy_escape(PLAIN), 20000)
+    bench("escape plain (translate)", lambda: escape_md(PLAIN), 20000)
+    bench("render_notification", lambda: render_notification(MESSAGE), 5000)
+    bench("render_inbox (10 messages)", lambda: render_inbox([MESSAGE] * 10), 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Latency benchmark for the local full-text message search.
+
+Fills a temporary database with synthetic mail for many users through
+``Storage.index_messages`` and times ``search_messages`` for common,
+rare and missing words (milliseconds per query, including the SQLite
+connection).
+
+Usage:
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --users 2000 --messages 50
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from bot.database.storage import storage
+
+WORDS = (
+    "account invoice shipping order welcome newsletter password reset verify "
+    "confirm subscription receipt payment delivery update security login team "
+    "offer weekly digest report meeting invitation ticket support refund"
+).split()
+
+SENDERS = ("GitHub", "Amazon", "Netflix", "Discord", "Google", "Stripe", "Notion", "Slack")
+
+QUERIES = ("verify", "invoice payment", "sec", "netflix", "zzzmissing")
+
+
+def fake_messages(rng: random.Random, count: int) -> list[tuple[str, str, str, str, str]]:
+    """Synthetic (msg_id, sender, subject, body, created_at) tuples."""
+    return [
+        (
+            f"{rng.getrandbits(96):024x}",
+            rng.choice(SENDERS),
+            " ".join(rng.choices(WORDS, k=5)).capitalize(),
+            " ".join(rng.choices(WORDS, k=120)),
+            "2024-03-12T10:15:00+00:00",
+        )
+        for _ in range(count)
+    ]
+
+
+async def run(args: argparse.Namespace) -> None:
+    rng = random.Random(42)
+    db_dir = tempfile.TemporaryDirectory(prefix="bench-")
+    storage.db_path = Path(db_dir.name) / "bench.db"
+    await storage.init_db()
+    if not storage.search_enabled:
+        raise SystemExit("SQLite was built without FTS5")
+
+    started = time.perf_counter()
+    for user in range(1, args.users + 1):
+        await storage.index_messages(user, f"a{user}", fake_messages(rng, args.messages))
+    total = args.users * args.messages
+    print(f"indexed {total} messages in {time.perf_counter() - started:.1f}s")
+
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            user = rng.randint(1, args.users)
+            started = time.perf_counter()
+            hits = await storage.search_messages(user, query, 10)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        print(f"{query!r:<20} median {timings[len(timings) // 2] * 1000:6.2f} ms  "
+              f"max {timings[-1] * 1000:6.2f} ms  ({len(hits)} hits)")
+    await storage.close()
+    db_dir.cleanup()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=40, help="indexed messages per user")
+    parser.add_argument("--repeat", type=int, default=50, help="queries timed per search text")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
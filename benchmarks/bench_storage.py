@@ -0,0 +1,67 @@
+"""
+Write throughput of the SQLite storage by shard count.
+
+Seeds users into a temporary database, then issues concurrent
+``update_last_message`` calls (the notifier's per-address cursor write)
+for random users and reports writes per second for each shard count.
+
+Usage:
+    python -m benchmarks.bench_storage
+    python -m benchmarks.bench_storage --shards 1 2 4 8 --writes 5000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from bot.database.storage import Storage, UserSession
+
+
+async def measure(shards: int, args: argparse.Namespace) -> float:
+    """Writes per second with ``shards`` database files."""
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory(prefix="bench-") as db_dir:
+        storage = Storage(shards=shards)
+        storage.db_path = Path(db_dir) / "bench.db"
+        await storage.init_db()
+        for telegram_id in range(1, args.users + 1):
+            await storage.save_account(
+                UserSession(telegram_id, f"user{telegram_id}@example.com", "secret", "t", f"a{telegram_id}")
+            )
+
+        queue = [rng.randint(1, args.users) for _ in range(args.writes)]
+
+        async def worker() -> None:
+            while queue:
+                telegram_id = queue.pop()
+                await storage.update_last_message(telegram_id, f"a{telegram_id}", f"m{len(queue)}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        await storage.close()
+        return args.writes / elapsed
+
+
+async def run(args: argparse.Namespace) -> None:
+    baseline = None
+    for shards in args.shards:
+        rate = await measure(shards, args)
+        baseline = baseline or rate
+        print(f"{shards:>3} shard(s)  {rate:8.0f} writes/s  ({rate / baseline:.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--writes", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=32, help="writes in flight")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Accuracy check and microbenchmark for verification code/link extraction.
+
+Runs ``extract_verification`` over the labelled corpus in
+``verification_corpus.json`` (subject, body text, expected code and
+link), lists every mismatch, reports precision/recall per field and the
+time per message. Exits non-zero when accuracy falls below
+``--min-accuracy``, so CI catches regressions.
+
+Usage:
+    python -m benchmarks.bench_verification
+    python -m benchmarks.bench_verification --min-accuracy 0.9
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from bot.utils.verification import extract_verification
+
+CORPUS = Path(__file__).parent / "verification_corpus.json"
+
+
+def score(expected: list, found: list) -> dict:
+    """Precision and recall of one field over the corpus."""
+    true_pos = sum(1 for e, f in zip(expected, found) if e is not None and f == e)
+    predicted = sum(1 for f in found if f is not None)
+    actual = sum(1 for e in expected if e is not None)
+    return {
+        "precision": round(true_pos / predicted, 3) if predicted else 1.0,
+        "recall": round(true_pos / actual, 3) if actual else 1.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--min-accuracy", type=float, default=0.0,
+                        help="fail if fewer messages than this fraction are fully correct")
+    args = parser.parse_args(argv)
+
+    corpus = json.loads(CORPUS.read_text())
+    codes, links, correct = [], [], 0
+    for i, sample in enumerate(corpus):
+        result = extract_verification(sample["subject"], sample["text"])
+        code = result.code if result else None
+        link = result.link if result else None
+        codes.append(code)
+        links.append(link)
+        if code == sample["code"] and link == sample["link"]:
+            correct += 1
+        else:
+            print(f"#{i} {sample['subject']!r}: code {code!r} (want {sample['code']!r}), "
+                  f"link {link!r} (want {sample['link']!r})")
+
+    accuracy = correct / len(corpus)
+    print(f"\n{correct}/{len(corpus)} messages fully correct ({accuracy:.1%})")
+    for field, found in (("code", codes), ("link", links)):
+        s = score([sample[field] for sample in corpus], found)
+        print(f"{field:<5} precision {s['precision']:.3f}  recall {s['recall']:.3f}")
+
+    number = 200
+    seconds = min(timeit.repeat(
+        lambda: [extract_verification(s["subject"], s["text"]) for s in corpus],
+        number=number, repeat=5
+    ))
+    print(f"{seconds / number / len(corpus) * 1e6:.2f} µs/message")
+
+    if accuracy < args.min_accuracy:
+        sys.exit(f"Accuracy {accuracy:.1%} is below {args.min_accuracy:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Load test of the Mini App web server against the previous implementation.
+
+Each server runs in its own process on a local port: the previous
+``socketserver.TCPServer`` with ``SimpleHTTPRequestHandler`` (files read
+from disk on every request, ``Cache-Control: no-store``, one connection
+per request) and the current asyncio server from ``server.py``. Client
+connections load the page like a browser would:
+
+- ``first``: ``/`` plus the stylesheet and script it references
+- ``repeat``: a reload with a warm browser cache, i.e. whatever the
+  cache headers of the first visit still require to be fetched
+
+and report requests per second, latency and bytes transferred per page.
+
+Usage:
+    python -m benchmarks.bench_webserver
+    python -m benchmarks.bench_webserver --connections 64 --seconds 10
+"""
+
+import argparse
+import asyncio
+import http.server
+import multiprocessing
+import re
+import socketserver
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from bot.web.routes import CORS_HEADERS, make_handler
+from server import WEB_DIR
+
+# Sent by every client request, as a browser would
+ACCEPT_ENCODING = "gzip, deflate, br"
+
+
+# ==================== Servers ====================
+
+class LegacyHandler(http.server.SimpleHTTPRequestHandler):
+    """The handler ``server.py`` used with ``socketserver.TCPServer``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=str(WEB_DIR), **kwargs)
+
+    def end_headers(self):
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, DELETE, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_legacy(ports) -> None:
+    with socketserver.TCPServer(("127.0.0.1", 0), LegacyHandler) as httpd:
+        ports.put(httpd.server_address[1])
+        httpd.serve_forever()
+
+
+def run_current(ports) -> None:
+    from bot.web.httpserver import HTTPServer
+    from bot.web.static import StaticSite
+
+    async def serve():
+        site = StaticSite(WEB_DIR)
+        site.load()
+        server = await HTTPServer(make_handler(site), headers=CORS_HEADERS).start("127.0.0.1", 0)
+        ports.put(server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+SERVERS = {"previous": run_legacy, "current": run_current}
+
+
+# ==================== Client ====================
+
+@dataclass
+class Reply:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+    size: int
+
+
+@dataclass
+class Stats:
+    requests: int = 0
+    pages: int = 0
+    bytes: int = 0
+    errors: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+
+class Connection:
+    """One client connection, reopened whenever the server closes it."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def get(self, path: str, headers: dict[str, str]) -> Reply:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        headers = {"Host": "localhost", "Accept-Encoding": ACCEPT_ENCODING, "Connection": "keep-alive", **headers}
+        lines = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        self.writer.write(f"GET {path} HTTP/1.1\r\n{lines}\r\n".encode())
+        await self.writer.drain()
+
+        version, status, _ = (await self.reader.readline()).decode("latin-1").split(" ", 2)
+        reply_headers = {}
+        size = 0
+        while True:
+            line = await self.reader.readline()
+            size += len(line)
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            reply_headers[name.strip().lower()] = value.strip()
+        if "content-length" in reply_headers:
+            body = await self.reader.readexactly(int(reply_headers["content-length"]))
+        elif int(status) in (204, 304):
+            body = b""
+        else:
+            body = await self.reader.read()
+        if version == "HTTP/1.0" or reply_headers.get("connection", "").lower() == "close":
+            self.close()
+        return Reply(int(status), reply_headers, body, size + len(body))
+
+    def close(self) -> None:
+        if self.writer:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def page_assets(html: bytes) -> list[str]:
+    """Local stylesheet and script paths referenced by a page."""
+    return ["/" + path.decode() for path in re.findall(rb'(?:src|href)="([^":]+\.(?:css|js))"', html)]
+
+
+async def load_pages(port: int, scenario: str, deadline: float, stats: Stats) -> None:
+    """Load the page repeatedly on one connection until ``deadline``."""
+    conn = Connection(port)
+    cached: dict[str, Reply] = {}
+    try:
+        assets = page_assets((await conn.get("/", {"Accept-Encoding": "identity"})).body)
+        # A first visit fills the browser cache for the repeat scenario
+        if scenario == "repeat":
+            for path in ["/", *assets]:
+                cached[path] = await conn.get(path, {})
+
+        while time.perf_counter() < deadline:
+            for path in ["/", *assets]:
+                headers = {}
+                previous = cached.get(path)
+                if previous:
+                    if "immutable" in previous.headers.get("cache-control", ""):
+                        continue
+                    if "no-store" not in previous.headers.get("cache-control", "") and "etag" in previous.headers:
+                        headers["If-None-Match"] = previous.headers["etag"]
+                started = time.perf_counter()
+                try:
+                    reply = await conn.get(path, headers)
+                except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                    conn.close()
+                    stats.errors += 1
+                    continue
+                stats.latencies.append(time.perf_counter() - started)
+                stats.requests += 1
+                stats.bytes += reply.size
+            stats.pages += 1
+    finally:
+        conn.close()
+
+
+async def measure(port: int, scenario: str, args: argparse.Namespace) -> Stats:
+    stats = Stats()
+    deadline = time.perf_counter() + args.seconds
+    await asyncio.gather(*(load_pages(port, scenario, deadline, stats) for _ in range(args.connections)))
+    return stats
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+def run(args: argparse.Namespace) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{args.connections} connections, {args.seconds}s per run")
+    print(f"{'server':<10}{'scenario':<10}{'req/s':>10}{'pages/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'KB/page':>9}{'errors':>8}")
+    for name in args.servers:
+        ports = ctx.Queue()
+        process = ctx.Process(target=SERVERS[name], args=(ports,), daemon=True)
+        process.start()
+        try:
+            port = ports.get(timeout=30)
+            for scenario in args.scenarios:
+                stats = asyncio.run(measure(port, scenario, args))
+                elapsed = args.seconds
+                print(
+                    f"{name:<10}{scenario:<10}{stats.requests / elapsed:>10.0f}{stats.pages / elapsed:>10.0f}"
+                    f"{percentile(stats.latencies, 0.5) * 1000:>9.2f}{percentile(stats.latencies, 0.99) * 1000:>9.2f}"
+                    f"{stats.bytes / max(stats.pages, 1) / 1024:>9.1f}{stats.errors:>8}"
+                )
+        finally:
+            process.terminate()
+            process.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--servers", nargs="+", choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument("--scenarios", nargs="+", choices=["first", "repeat"], default=["first", "repeat"])
+    parser.add_argument("--connections", type=int, default=32, help="concurrent client connections")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each run")
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
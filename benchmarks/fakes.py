@@ -0,0 +1,291 @@
+"""
+In-process stand-ins for the Mail.tm and Telegram Bot APIs.
+
+Both servers speak plain HTTP/1.1 with keep-alive on the benchmark's own
+event loop, so the bot's real HTTP clients (connection pools, rate
+limiters, retries) are exercised end to end. Latency, 5xx errors and 429
+responses can be injected to see how the bot degrades.
+"""
+
+import asyncio
+import base64
+import json
+import random
+import re
+import socket
+import time
+import uuid
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+def listen_socket() -> socket.socket:
+    """
+    Bind a listening socket on a free local port.
+
+    Binding before the bot modules are imported lets the harness put the
+    server URL into the environment the bot's config is read from.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+
+class FakeHTTPServer:
+    """
+    Minimal asyncio HTTP/1.1 server with fault injection.
+
+    Args:
+        latency: Seconds added to every response
+        error_rate: Fraction of requests answered with 500
+        throttle_rate: Fraction of requests answered with 429
+        seed: Random seed for fault injection
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.url = ""
+
+    async def start(self, sock: Optional[socket.socket] = None) -> str:
+        """Start serving, on ``sock`` if given. Returns the base URL."""
+        sock = sock or listen_socket()
+        self._server = await asyncio.start_server(self._serve, sock=sock)
+        host, port = sock.getsockname()[:2]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        """Stop accepting connections."""
+        if self._server:
+            self._server.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, payload = await self._dispatch(method, target, headers, body)
+                data = b"" if payload is None else json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, target: str, headers: dict, body: bytes) -> tuple[int, object]:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        roll = self._rng.random()
+        if roll < self.throttle_rate:
+            return 429, {"detail": "Too Many Requests"}
+        if roll < self.throttle_rate + self.error_rate:
+            return 500, {"detail": "Injected error"}
+        return self.handle(method, urlsplit(target), headers, body)
+
+    def handle(self, method: str, url, headers: dict, body: bytes) -> tuple[int, object]:
+        """Answer one request with (status, JSON payload or None)."""
+        raise NotImplementedError
+
+
+# ==================== Mail.tm ====================
+
+def _jwt(account_id: str, ttl: int = 3600) -> str:
+    """Unsigned JWT carrying an expiry, enough for ``decode_jwt_exp``."""
+    def encode(obj: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).rstrip(b"=").decode()
+    return f"{encode({'typ': 'JWT'})}.{encode({'id': account_id, 'exp': int(time.time()) + ttl})}.sig"
+
+
+class FakeMailTM(FakeHTTPServer):
+    """
+    Mail.tm API stand-in holding accounts and messages in memory.
+
+    Implements the endpoints the bot uses: domains, accounts, token, me
+    and messages (list with ``hydra`` paging, read, mark read, delete).
+    """
+
+    PAGE_SIZE = 30
+
+    def __init__(self, domain: str = "bench.test", **kwargs):
+        super().__init__(**kwargs)
+        self.domain = domain
+        self.accounts: dict[str, dict] = {}
+        self._by_address: dict[str, str] = {}
+        self._tokens: dict[str, str] = {}
+        self._messages: dict[str, dict] = {}
+
+    def add_account(self, address: str, password: str) -> tuple[str, str]:
+        """Create an account directly. Returns (account id, token)."""
+        account_id = uuid.uuid4().hex
+        self.accounts[account_id] = {"address": address, "password": password, "messages": []}
+        self._by_address[address] = account_id
+        return account_id, self._issue_token(account_id)
+
+    def deliver(self, account_id: str, count: int = 1, body_chars: int = 2000) -> list[str]:
+        """Add new messages to an inbox. Returns their IDs, newest first."""
+        inbox = self.accounts[account_id]["messages"]
+        ids = []
+        for _ in range(count):
+            msg_id = uuid.uuid4().hex
+            text = f"Your verification code is {self._rng.randint(100000, 999999)}. " * (body_chars // 40 + 1)
+            self._messages[msg_id] = {
+                "id": msg_id,
+                "from": {"address": "no-reply@example.com", "name": "Example"},
+                "subject": f"Message {len(inbox) + 1}",
+                "intro": text[:100],
+                "createdAt": "2024-03-12T10:15:00+00:00",
+                "seen": False,
+                "hasAttachments": False,
+                "text": text[:body_chars],
+                "html": [f"<p>{text[:body_chars]}</p>"],
+                "attachments": [],
+                "_account": account_id,
+            }
+            inbox.insert(0, msg_id)
+            ids.insert(0, msg_id)
+        return ids
+
+    def _issue_token(self, account_id: str) -> str:
+        token = _jwt(account_id)
+        self._tokens[token] = account_id
+        return token
+
+    def _public(self, msg: dict, full: bool) -> dict:
+        if full:
+            return {k: v for k, v in msg.items() if k != "_account"}
+        return {k: msg[k] for k in ("id", "from", "subject", "intro", "createdAt", "seen", "hasAttachments")}
+
+    def handle(self, method: str, url, headers: dict, body: bytes) -> tuple[int, object]:
+        path = url.path
+        if method == "GET" and path == "/domains":
+            return 200, {"hydra:member": [{"id": "d1", "domain": self.domain, "isActive": True}]}
+
+        if method == "POST" and path in ("/accounts", "/token"):
+            data = json.loads(body or b"{}")
+            address, password = data.get("address", ""), data.get("password", "")
+            if path == "/accounts":
+                if address in self._by_address:
+                    return 422, {"detail": "address already used"}
+                account_id, _ = self.add_account(address, password)
+                return 201, {"id": account_id, "address": address}
+            account_id = self._by_address.get(address)
+            if account_id is None or self.accounts[account_id]["password"] != password:
+                return 401, {"message": "Invalid credentials."}
+            return 200, {"id": account_id, "token": self._issue_token(account_id)}
+
+        account_id = self._tokens.get(headers.get("authorization", "").removeprefix("Bearer "))
+        if account_id is None or account_id not in self.accounts:
+            return 401, {"message": "JWT Token not found"}
+        account = self.accounts[account_id]
+
+        if method == "GET" and path == "/me":
+            return 200, {"id": account_id, "address": account["address"]}
+        if method == "DELETE" and path.startswith("/accounts/"):
+            for msg_id in account["messages"]:
+                self._messages.pop(msg_id, None)
+            del self.accounts[account_id]
+            del self._by_address[account["address"]]
+            return 204, None
+
+        if path == "/messages" and method == "GET":
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+            start = (page - 1) * self.PAGE_SIZE
+            ids = account["messages"][start:start + self.PAGE_SIZE]
+            return 200, {
+                "hydra:member": [self._public(self._messages[m], False) for m in ids],
+                "hydra:totalItems": len(account["messages"]),
+            }
+
+        if path.startswith("/messages/"):
+            msg = self._messages.get(path.rsplit("/", 1)[1])
+            if msg is None or msg["_account"] != account_id:
+                return 404, {"detail": "Not Found"}
+            if method == "GET":
+                return 200, self._public(msg, True)
+            if method == "PATCH":
+                msg["seen"] = True
+                return 200, {"seen": True}
+            if method == "DELETE":
+                account["messages"].remove(msg["id"])
+                del self._messages[msg["id"]]
+                return 204, None
+
+        return 404, {"detail": "Not Found"}
+
+
+# ==================== Telegram ====================
+
+_MULTIPART_CHAT_ID = re.compile(rb'name="chat_id"\r\n\r\n(-?\d+)')
+
+
+class FakeTelegram(FakeHTTPServer):
+    """
+    Telegram Bot API stand-in that accepts and counts outgoing calls.
+
+    Point a bot at it with ``base_url=f"{url}/bot"``. Every method
+    succeeds; message-returning methods get a minimal Message back.
+    """
+
+    BOT_USER = {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls: dict[str, int] = {}
+        self._message_id = 0
+
+    def _message(self, params: dict) -> dict:
+        self._message_id += 1
+        chat_id = int(params.get("chat_id") or 0)
+        return {
+            "message_id": int(params.get("message_id") or self._message_id),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": self.BOT_USER,
+            "text": params.get("text", ""),
+        }
+
+    def handle(self, method: str, url, headers: dict, body: bytes) -> tuple[int, object]:
+        api_method = url.path.rsplit("/", 1)[1]
+        self.calls[api_method] = self.calls.get(api_method, 0) + 1
+
+        if headers.get("content-type", "").startswith("multipart/"):
+            match = _MULTIPART_CHAT_ID.search(body)
+            params = {"chat_id": match.group(1).decode() if match else "0"}
+        else:
+            params = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+
+        if api_method == "getMe":
+            result = self.BOT_USER
+        elif api_method in ("sendMessage", "editMessageText", "sendDocument"):
+            result = self._message(params)
+            if api_method == "sendDocument":
+                result["document"] = {"file_id": uuid.uuid4().hex, "file_unique_id": uuid.uuid4().hex[:16]}
+        else:
+            result = True
+        return 200, {"ok": True, "result": result}
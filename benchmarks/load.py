@@ -0,0 +1,482 @@
+"""
+Load benchmark driving the bot against in-process Mail.tm and Telegram fakes.
+
+Scenarios:
+    poll       Seed N sessions and time ``check_new_emails`` cycles while
+               new mail trickles into a fraction of the inboxes
+    callbacks  Fire inline-button presses (inbox, read, page) at
+               ``handle_callback`` with bounded concurrency
+    start      Run ``start_command`` for first-time users (account creation)
+    webapp     Hold Mini App inbox long-polls open on the bot's web server
+               during notifier cycles and count the Mail.tm requests they add
+    all        All of the above, on the same seeded sessions
+
+Results (cycle times, p50/p99 handler latency, upstream requests per
+user, peak RSS) are printed as JSON.
+
+Usage:
+    python -m benchmarks.load all --users 10000
+    python -m benchmarks.load poll --users 100000 --cycles 2 --latency-ms 20
+    python -m benchmarks.load callbacks --error-rate 0.01 --throttle-rate 0.01 --output result.json
+    python -m benchmarks.load webapp --users 1000 --webapps 500
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+from .fakes import FakeMailTM, FakeTelegram, listen_socket
+
+BOT_TOKEN = "123456:bench"
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def latency_summary(seconds: list[float]) -> dict:
+    """p50/p99/max of handler latencies, in milliseconds."""
+    return {
+        "count": len(seconds),
+        "p50_ms": round(percentile(seconds, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(seconds, 0.99) * 1000, 3),
+        "max_ms": round(max(seconds, default=0.0) * 1000, 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Harness:
+    """Fake servers, a bot application wired to them, and seeded sessions."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        fault = dict(
+            latency=args.latency_ms / 1000,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            seed=args.seed,
+        )
+        self.mailtm = FakeMailTM(**fault)
+        self.telegram = FakeTelegram(**fault)
+        self.users: dict[int, str] = {}  # telegram_id -> account id
+        self.inboxes: dict[int, list[str]] = {}
+
+    async def setup(self) -> None:
+        """Start the fakes and import the bot configured against them."""
+        mailtm_sock = listen_socket()
+        host, port = mailtm_sock.getsockname()
+        os.environ["MAILTM_API_BASES"] = f"http://{host}:{port}"
+        os.environ["MAILTM_RATE_LIMIT"] = str(self.args.rate_limit)
+        os.environ["BOT_TOKEN"] = BOT_TOKEN
+        await self.mailtm.start(mailtm_sock)
+        await self.telegram.start()
+
+        # Imported late so the bot's config picks up the environment above
+        from telegram.ext import Application, CallbackContext
+        from bot.database.storage import storage
+        from bot.utils.metrics import InstrumentedHTTPXRequest
+
+        self._db_dir = tempfile.TemporaryDirectory(prefix="bench-")
+        storage.db_path = Path(self._db_dir.name) / "bench.db"
+        await storage.init_db()
+        self.storage = storage
+
+        self.application = (
+            Application.builder()
+            .token(BOT_TOKEN)
+            .base_url(f"{self.telegram.url}/bot")
+            .request(InstrumentedHTTPXRequest(connection_pool_size=256))
+            .updater(None)
+            .build()
+        )
+        await self.application.initialize()
+        await self.application.start()
+        self.CallbackContext = CallbackContext
+
+    async def teardown(self) -> None:
+        """Shut the bot and the fakes down."""
+        from bot.services.providers import provider_registry
+
+        await provider_registry.close()
+        await self.application.stop()
+        await self.application.shutdown()
+        await self.mailtm.stop()
+        await self.telegram.stop()
+        await self.storage.close()
+        self._db_dir.cleanup()
+
+    def seed(self, count: int, inbox_size: int) -> None:
+        """Create sessions with ``inbox_size`` messages each, all seen."""
+        now = int(time.time())
+        users, accounts = [], []
+        for telegram_id in range(1, count + 1):
+            address = f"user{telegram_id}@{self.mailtm.domain}"
+            account_id, token = self.mailtm.add_account(address, "secret")
+            ids = self.mailtm.deliver(account_id, inbox_size)
+            self.users[telegram_id] = account_id
+            self.inboxes[telegram_id] = ids
+            users.append((telegram_id, account_id, now, "active"))
+            accounts.append((
+                account_id, telegram_id, address, "secret", token,
+                ids[0] if ids else None, now + 3600,
+            ))
+
+        # Bulk inserts; per-row saves would dominate setup at 100k users
+        with sqlite3.connect(self.storage.db_path) as db:
+            db.executemany(
+                "INSERT INTO users (telegram_id, account_id, last_active_at, status) VALUES (?, ?, ?, ?)",
+                users,
+            )
+            db.executemany(
+                "INSERT INTO accounts (account_id, telegram_id, email, password, token, "
+                "last_message_id, token_expires_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                accounts,
+            )
+
+    def make_all_due(self) -> None:
+        """Clear the poll schedule, as if a full poll interval had passed."""
+        with sqlite3.connect(self.storage.db_path) as db:
+            db.execute("UPDATE accounts SET next_poll_at = NULL")
+
+    # ==================== Updates ====================
+
+    def _user(self, telegram_id: int) -> dict:
+        return {"id": telegram_id, "is_bot": False, "first_name": f"User{telegram_id}"}
+
+    def callback_update(self, update_id: int, telegram_id: int, data: str):
+        """Build an inline-button press on a bot message."""
+        from telegram import Update
+
+        return Update.de_json({
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": self._user(telegram_id),
+                "chat_instance": str(telegram_id),
+                "data": data,
+                "message": {
+                    "message_id": update_id,
+                    "date": int(time.time()),
+                    "chat": {"id": telegram_id, "type": "private"},
+                    "from": FakeTelegram.BOT_USER,
+                    "text": "inbox",
+                },
+            },
+        }, self.application.bot)
+
+    def command_update(self, update_id: int, telegram_id: int, command: str):
+        """Build a bot command sent by a user."""
+        from telegram import Update
+
+        return Update.de_json({
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": telegram_id, "type": "private"},
+                "from": self._user(telegram_id),
+                "text": command,
+                "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+            },
+        }, self.application.bot)
+
+    def init_data(self, telegram_id: int) -> str:
+        """Telegram WebApp init data for a user, signed with the bench token."""
+        fields = {
+            "auth_date": str(int(time.time())),
+            "query_id": f"q{telegram_id}",
+            "user": json.dumps(self._user(telegram_id)),
+        }
+        data_check = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+        secret = hmac.new(b"WebAppData", BOT_TOKEN.encode(), hashlib.sha256).digest()
+        fields["hash"] = hmac.new(secret, data_check.encode(), hashlib.sha256).hexdigest()
+        return urlencode(fields)
+
+    async def timed(self, handler, updates: list) -> list[float]:
+        """Run a handler over updates with bounded concurrency, returning latencies."""
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        latencies = []
+
+        async def run(update) -> None:
+            async with semaphore:
+                context = self.CallbackContext.from_update(update, self.application)
+                started = time.perf_counter()
+                try:
+                    await handler(update, context)
+                except Exception as e:
+                    logging.getLogger(__name__).debug(f"Handler failed: {e}")
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(run(u) for u in updates))
+        return latencies
+
+
+# ==================== Scenarios ====================
+
+async def scenario_poll(h: Harness) -> dict:
+    """Time notifier cycles over every seeded session."""
+    from bot.services.notifier import check_new_emails
+
+    args = h.args
+    context = h.CallbackContext(h.application)
+    cycles = []
+    requests_before = h.mailtm.requests
+    sends_before = h.telegram.calls.get("sendMessage", 0)
+
+    for _ in range(args.cycles):
+        for telegram_id in h.rng.sample(list(h.users), int(len(h.users) * args.new_mail)):
+            h.inboxes[telegram_id][:0] = h.mailtm.deliver(h.users[telegram_id])
+        h.make_all_due()
+        started = time.perf_counter()
+        # Ticks take at most POLL_BATCH addresses; a cycle drains them all
+        while await h.storage.get_accounts_due(time.time(), 1):
+            await check_new_emails(context)
+        cycles.append(time.perf_counter() - started)
+
+    polls = len(h.users) * args.cycles
+    return {
+        "cycles": len(cycles),
+        "cycle_seconds": [round(c, 3) for c in cycles],
+        "cycle_p50_seconds": round(percentile(cycles, 0.5), 3),
+        "users_per_second": round(len(h.users) / percentile(cycles, 0.5), 1) if cycles else 0.0,
+        "mailtm_requests_per_user_cycle": round((h.mailtm.requests - requests_before) / max(polls, 1), 3),
+        "notifications_sent": h.telegram.calls.get("sendMessage", 0) - sends_before,
+    }
+
+
+async def scenario_callbacks(h: Harness) -> dict:
+    """Time inline-button presses on random users' inboxes and messages."""
+    from bot.handlers.callbacks import handle_callback
+
+    args = h.args
+    updates = []
+    touched = set()
+    for update_id in range(1, args.updates + 1):
+        telegram_id = h.rng.randint(1, len(h.users))
+        touched.add(telegram_id)
+        inbox = h.inboxes[telegram_id]
+        msg_id = h.rng.choice(inbox) if inbox else ""
+        data = h.rng.choice(["check_inbox", f"read_{msg_id}", f"page_{msg_id}_1", "back_to_inbox"])
+        updates.append(h.callback_update(update_id, telegram_id, data))
+
+    requests_before = h.mailtm.requests
+    tg_before = sum(h.telegram.calls.values())
+    started = time.perf_counter()
+    latencies = await h.timed(handle_callback, updates)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "latency": latency_summary(latencies),
+        "updates_per_second": round(len(updates) / elapsed, 1),
+        "mailtm_requests_per_user": round((h.mailtm.requests - requests_before) / max(len(touched), 1), 3),
+        "telegram_requests_per_update": round((sum(h.telegram.calls.values()) - tg_before) / len(updates), 3),
+    }
+
+
+async def scenario_start(h: Harness) -> dict:
+    """Time /start for first-time users, which creates their accounts."""
+    from bot.handlers.start import start_command
+
+    args = h.args
+    first_id = len(h.users) + 1
+    updates = [
+        h.command_update(first_id + i, first_id + i, "/start")
+        for i in range(args.starts)
+    ]
+
+    requests_before = h.mailtm.requests
+    started = time.perf_counter()
+    latencies = await h.timed(start_command, updates)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "latency": latency_summary(latencies),
+        "starts_per_second": round(len(updates) / elapsed, 1),
+        "mailtm_requests_per_user": round((h.mailtm.requests - requests_before) / max(len(updates), 1), 3),
+    }
+
+
+async def scenario_webapp(h: Harness) -> dict:
+    """Keep Mini Apps long-polling the bot's inbox API through notifier cycles."""
+    import httpx
+    from bot.config import WEB_DIR
+    from bot.services.notifier import check_new_emails
+    from bot.web.api import handle_api
+    from bot.web.httpserver import HTTPServer
+    from bot.web.routes import make_handler
+    from bot.web.static import StaticSite
+
+    args = h.args
+    context = h.CallbackContext(h.application)
+    site = StaticSite(WEB_DIR)
+    site.load()
+    server = HTTPServer(make_handler(site, handle_api))
+    sock = listen_socket()
+    await server.start(sock=sock)
+    host, port = sock.getsockname()[:2]
+
+    # Warm the bot's inbox cache the way a running bot has it
+    h.make_all_due()
+    while await h.storage.get_accounts_due(time.time(), 1):
+        await check_new_emails(context)
+
+    viewers = h.rng.sample(list(h.users), min(args.webapps, len(h.users)))
+    stop = asyncio.Event()
+    opened, updates, failures = [], [], 0
+
+    async def mini_app(client: httpx.AsyncClient, telegram_id: int) -> None:
+        nonlocal failures
+        headers = {"Authorization": f"tma {h.init_data(telegram_id)}"}
+        started = time.perf_counter()
+        reply = await client.get("/api/inbox", headers=headers)
+        opened.append(time.perf_counter() - started)
+        if reply.status_code != 200:
+            failures += 1
+            return
+        version = reply.json()["version"]
+        while not stop.is_set():
+            reply = await client.get(f"/api/inbox?since={version}", headers=headers)
+            if reply.status_code == 200:
+                version = reply.json()["version"]
+                updates.append(time.perf_counter())
+            elif reply.status_code != 204:
+                failures += 1
+                return
+
+    requests_before = h.mailtm.requests
+    limits = httpx.Limits(max_connections=len(viewers) + 1)
+    async with httpx.AsyncClient(base_url=f"http://{host}:{port}", limits=limits, timeout=60) as client:
+        apps = [asyncio.create_task(mini_app(client, telegram_id)) for telegram_id in viewers]
+        while len(opened) + failures < len(viewers):
+            await asyncio.sleep(0.01)
+        open_requests = h.mailtm.requests - requests_before
+
+        cycles, poll_requests = [], 0
+        for _ in range(args.cycles):
+            for telegram_id in h.rng.sample(viewers, int(len(viewers) * args.new_mail)):
+                h.inboxes[telegram_id][:0] = h.mailtm.deliver(h.users[telegram_id])
+            # Off the loop: API requests in flight hold SQLite read locks
+            await asyncio.to_thread(h.make_all_due)
+            before = h.mailtm.requests
+            started = time.perf_counter()
+            while await h.storage.get_accounts_due(time.time(), 1):
+                await check_new_emails(context)
+            cycles.append(time.perf_counter() - started)
+            poll_requests += h.mailtm.requests - before
+            await asyncio.sleep(0.2)
+
+        # Let the held requests see the stop flag
+        stop.set()
+        await asyncio.sleep(0)
+        for app in apps:
+            app.cancel()
+        await asyncio.gather(*apps, return_exceptions=True)
+    server.close()
+    await asyncio.sleep(0)
+
+    return {
+        "webapps": len(viewers),
+        "open_latency": latency_summary(opened),
+        "inbox_updates_pushed": len(updates),
+        "failures": failures,
+        "cycle_p50_seconds": round(percentile(cycles, 0.5), 3),
+        "mailtm_requests_per_user_cycle": round(poll_requests / max(len(h.users) * len(cycles), 1), 3),
+        "mailtm_requests_by_webapps": h.mailtm.requests - requests_before - poll_requests,
+        "mailtm_requests_opening_webapps": open_requests,
+    }
+
+
+SCENARIOS = {
+    "poll": scenario_poll,
+    "callbacks": scenario_callbacks,
+    "start": scenario_start,
+    "webapp": scenario_webapp,
+}
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Set up the harness, run the selected scenarios and collect results."""
+    h = Harness(args)
+    await h.setup()
+    try:
+        started = time.perf_counter()
+        h.seed(args.users, args.inbox)
+        result = {
+            "users": args.users,
+            "seed_seconds": round(time.perf_counter() - started, 3),
+            "config": {
+                "latency_ms": args.latency_ms,
+                "error_rate": args.error_rate,
+                "throttle_rate": args.throttle_rate,
+                "concurrency": args.concurrency,
+                "rate_limit": args.rate_limit,
+            },
+            "scenarios": {},
+        }
+        names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+        for name in names:
+            result["scenarios"][name] = await SCENARIOS[name](h)
+        result["mailtm_requests"] = h.mailtm.requests
+        result["telegram_calls"] = dict(sorted(h.telegram.calls.items()))
+        result["peak_rss_mb"] = peak_rss_mb()
+        return result
+    finally:
+        await h.teardown()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("scenario", choices=[*SCENARIOS, "all"])
+    parser.add_argument("--users", type=int, default=1000, help="seeded sessions")
+    parser.add_argument("--inbox", type=int, default=5, help="messages per seeded inbox")
+    parser.add_argument("--cycles", type=int, default=3, help="notifier cycles (poll)")
+    parser.add_argument("--new-mail", type=float, default=0.1, help="fraction of inboxes getting mail per cycle")
+    parser.add_argument("--updates", type=int, default=2000, help="button presses (callbacks)")
+    parser.add_argument("--starts", type=int, default=200, help="first-time users (start)")
+    parser.add_argument("--webapps", type=int, default=200, help="open Mini Apps long-polling (webapp)")
+    parser.add_argument("--concurrency", type=int, default=64, help="updates handled at once")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latency added by both fakes")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--rate-limit", type=float, default=1e6, help="bot-side Mail.tm requests/s")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    parser.add_argument("--verbose", action="store_true", help="show bot logs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+    result = asyncio.run(run(args))
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Startup benchmark: import time and time until the bot is ready.
+
+Phases:
+    import  Import ``bot.main`` in fresh interpreters (``-X importtime``)
+            and report wall time plus self time per top-level package
+    boot    Build the application against in-process Telegram and
+            Mail.tm fakes and time ``initialize()`` + ``post_init`` over
+            repeated boots on the same database; the first boot is cold
+            (schema creation, bot commands sent), later ones are restarts
+    all     Both
+
+Results are printed as JSON.
+
+Usage:
+    python -m benchmarks.startup all
+    python -m benchmarks.startup boot --users 100000 --boots 3
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .fakes import FakeMailTM, FakeTelegram, listen_socket
+from .load import latency_summary
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _importtime(env: dict) -> tuple[float, dict[str, float]]:
+    """Import bot.main in new interpreters; return wall seconds and self ms per package."""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import bot.main"], cwd=ROOT, env=env, check=True)
+    wall = time.perf_counter() - started
+
+    # Separate run: -X importtime itself slows imports down
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import bot.main"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    packages: dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1000
+    return wall, packages
+
+
+def phase_import(args: argparse.Namespace) -> dict:
+    """Time ``import bot.main`` in fresh interpreters."""
+    env = {**os.environ, "BOT_TOKEN": "123456:bench"}
+    baseline_started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], env=env, check=True)
+    interpreter_ms = (time.perf_counter() - baseline_started) * 1000
+
+    _importtime(env)  # warm-up: writes bytecode caches, fills the OS page cache
+    walls, totals = [], {}
+    for _ in range(args.runs):
+        wall, packages = _importtime(env)
+        walls.append(wall)
+        for package, ms in packages.items():
+            totals[package] = totals.get(package, 0.0) + ms
+    top = sorted(totals.items(), key=lambda item: -item[1])[:args.top]
+    return {
+        "runs": args.runs,
+        "process_wall": latency_summary(walls),
+        "interpreter_ms": round(interpreter_ms, 1),
+        "self_ms_by_package": {name: round(ms / args.runs, 2) for name, ms in top},
+    }
+
+
+async def phase_boot(args: argparse.Namespace) -> dict:
+    """Time application start-up against the fakes, cold then warm."""
+    mailtm, telegram = FakeMailTM(), FakeTelegram()
+    mailtm_sock = listen_socket()
+    host, port = mailtm_sock.getsockname()
+    os.environ["MAILTM_API_BASES"] = f"http://{host}:{port}"
+    os.environ["METRICS_PORT"] = "0"
+    os.environ["SLOW_CALLBACK_THRESHOLD"] = "0"
+    await mailtm.start(mailtm_sock)
+    await telegram.start()
+
+    # Imported late so the bot's config picks up the environment above
+    from telegram.ext import Application
+    from bot.database.storage import storage
+    from bot.main import post_init, post_shutdown
+
+    db_dir = tempfile.TemporaryDirectory(prefix="bench-")
+    storage.db_path = Path(db_dir.name) / "bench.db"
+    await storage.init_db()
+    now = int(time.time())
+    with sqlite3.connect(storage.db_path) as db:
+        db.executemany(
+            "INSERT INTO users (telegram_id, account_id, last_active_at, status) VALUES (?, ?, ?, ?)",
+            [(i, f"a{i}", now, "active") for i in range(1, args.users + 1)],
+        )
+        db.executemany(
+            "INSERT INTO accounts (account_id, telegram_id, email, password, token, token_expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(f"a{i}", i, f"user{i}@{mailtm.domain}", "secret", "t", now + 3600)
+             for i in range(1, args.users + 1)],
+        )
+
+    boots = []
+    try:
+        for _ in range(args.boots):
+            calls_before = dict(telegram.calls)
+            started = time.perf_counter()
+            application = (
+                Application.builder()
+                .token("123456:bench")
+                .base_url(f"{telegram.url}/bot")
+                .updater(None)
+                .build()
+            )
+            await application.initialize()
+            await post_init(application)
+            ready = time.perf_counter() - started
+            await post_shutdown(application)
+            await application.shutdown()
+            boots.append({
+                "ready_ms": round(ready * 1000, 1),
+                "telegram_calls": {
+                    method: count - calls_before.get(method, 0)
+                    for method, count in telegram.calls.items()
+                    if count != calls_before.get(method, 0)
+                },
+            })
+    finally:
+        await mailtm.stop()
+        await telegram.stop()
+        db_dir.cleanup()
+    return {"users": args.users, "boots": boots}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("phase", choices=["import", "boot", "all"])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters (import)")
+    parser.add_argument("--top", type=int, default=10, help="packages listed by self time (import)")
+    parser.add_argument("--users", type=int, default=1000, help="seeded sessions (boot)")
+    parser.add_argument("--boots", type=int, default=2, help="start-ups on the same database (boot)")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    parser.add_argument("--verbose", action="store_true", help="show bot logs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+    result = {}
+    if args.phase in ("import", "all"):
+        result["import"] = phase_import(args)
+    if args.phase in ("boot", "all"):
+        result["boot"] = asyncio.run(phase_boot(args))
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,22 +2,137 @@
 
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
+# Load environment variables from .env file, if there is one (containers
+# usually pass the environment directly, so dotenv is only imported here)
 env_path = Path(__file__).parent.parent / ".env"
-load_dotenv(env_path)
+if env_path.exists():
+    from dotenv import load_dotenv
+    load_dotenv(env_path)
 
 # Telegram Bot Token
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 
-# Mail.tm API Configuration
-MAILTM_API_BASE = "https://api.mail.tm"
+# Mail.tm API Configuration: comma-separated Mail.tm-compatible API hosts.
+# New accounts are spread across them; the first is the default.
+MAILTM_API_BASES = [
+    base.strip().rstrip("/")
+    for base in os.getenv("MAILTM_API_BASES", "https://api.mail.tm").split(",")
+    if base.strip()
+]
+MAILTM_API_BASE = MAILTM_API_BASES[0]
+
+# Mail.tm allows 8 requests per second per IP (applied per provider)
+MAILTM_RATE_LIMIT = float(os.getenv("MAILTM_RATE_LIMIT", 8))
+
+# Providers whose health score (recent success ratio) drops below
+# PROVIDER_MIN_HEALTH get no new accounts for PROVIDER_COOLDOWN seconds
+PROVIDER_MIN_HEALTH = float(os.getenv("PROVIDER_MIN_HEALTH", 0.5))
+PROVIDER_COOLDOWN = int(os.getenv("PROVIDER_COOLDOWN", 60))
+
+# HTTP client of each provider: connection pool, timeouts (seconds) and
+# optional HTTP/2 (needs the h2 package, i.e. ``pip install httpx[http2]``)
+MAILTM_MAX_CONNECTIONS = int(os.getenv("MAILTM_MAX_CONNECTIONS", 100))
+MAILTM_MAX_KEEPALIVE = int(os.getenv("MAILTM_MAX_KEEPALIVE", 20))
+MAILTM_KEEPALIVE_EXPIRY = float(os.getenv("MAILTM_KEEPALIVE_EXPIRY", 30))
+MAILTM_CONNECT_TIMEOUT = float(os.getenv("MAILTM_CONNECT_TIMEOUT", 5))
+MAILTM_READ_TIMEOUT = float(os.getenv("MAILTM_READ_TIMEOUT", 30))
+MAILTM_POOL_TIMEOUT = float(os.getenv("MAILTM_POOL_TIMEOUT", 10))
+MAILTM_HTTP2 = os.getenv("MAILTM_HTTP2", "false").lower() in ("1", "true", "yes")
+
+# Concurrent deletes when clearing an inbox
+PURGE_CONCURRENCY = int(os.getenv("PURGE_CONCURRENCY", 4))
+
+# Background teardown of replaced Mail.tm accounts
+REAPER_INTERVAL = int(os.getenv("REAPER_INTERVAL", 60))
+REAPER_BATCH = int(os.getenv("REAPER_BATCH", 20))
+REAPER_MAX_ATTEMPTS = int(os.getenv("REAPER_MAX_ATTEMPTS", 5))
 
 # Polling interval for checking new emails (in seconds)
 POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", 30))
 
-# Database path
+# The notifier wakes every POLL_TICK seconds and polls the addresses that are
+# due; addresses whose checks fail back off exponentially up to POLL_BACKOFF_MAX
+POLL_TICK = int(os.getenv("POLL_TICK", 5))
+POLL_BACKOFF_MAX = int(os.getenv("POLL_BACKOFF_MAX", 900))
+# Most addresses polled per tick; the rest stay due for the next tick
+POLL_BATCH = int(os.getenv("POLL_BATCH", 500))
+
+# Addresses a user can keep; creating one more retires the oldest
+MAX_ADDRESSES = int(os.getenv("MAX_ADDRESSES", 5))
+
+# Age (in seconds) after which a cached inbox is refreshed in the background;
+# inboxes of at most INBOX_CACHE_MAX_USERS users are kept (least recently used go)
+INBOX_CACHE_TTL = int(os.getenv("INBOX_CACHE_TTL", POLL_INTERVAL))
+INBOX_CACHE_MAX_USERS = int(os.getenv("INBOX_CACHE_MAX_USERS", 20000))
+
+# Token refresh: renew tokens this many seconds before they expire
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", 300))
+TOKEN_REFRESH_INTERVAL = int(os.getenv("TOKEN_REFRESH_INTERVAL", 60))
+TOKEN_REFRESH_BATCH = int(os.getenv("TOKEN_REFRESH_BATCH", 200))
+TOKEN_REFRESH_RATE = float(os.getenv("TOKEN_REFRESH_RATE", 4))
+
+# Session lifecycle: idle users are polled IDLE_POLL_EVERY times less often,
+# expired (or blocked) users are removed and their accounts deleted
+IDLE_AFTER = int(os.getenv("IDLE_AFTER_DAYS", 7)) * 86400
+EXPIRE_AFTER = int(os.getenv("EXPIRE_AFTER_DAYS", 30)) * 86400
+IDLE_POLL_EVERY = int(os.getenv("IDLE_POLL_EVERY", 10))
+LIFECYCLE_INTERVAL = int(os.getenv("LIFECYCLE_INTERVAL", 3600))
+LIFECYCLE_BATCH = int(os.getenv("LIFECYCLE_BATCH", 100))
+
+# Maximum number of body characters shown when reading an email (across all pages)
+MAX_BODY_CHARS = int(os.getenv("MAX_BODY_CHARS", 40000))
+
+# Number of paginated email bodies kept in memory
+MESSAGE_CACHE_SIZE = int(os.getenv("MESSAGE_CACHE_SIZE", 500))
+
+# Fetch the full body of new mail that looks like a verification email
+# when its preview has no code or link (one extra Mail.tm request each)
+VERIFICATION_FETCH_BODY = os.getenv("VERIFICATION_FETCH_BODY", "true").lower() in ("1", "true", "yes")
+
+# HTML bodies larger than this (in characters) are converted off the event loop
+HTML_OFFLOAD_THRESHOLD = int(os.getenv("HTML_OFFLOAD_THRESHOLD", 262144))
+
+# Prometheus metrics endpoint (GET /metrics); port 0 disables it
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9108))
+
+# Mini App files and inbox API (GET /api/inbox) served by the bot process;
+# port 0 disables it. WEBAPP_API_URL is where the Mini App reaches that
+# server (e.g. behind a reverse proxy); leave it empty if it is not public.
+# Init data older than WEBAPP_AUTH_MAX_AGE seconds is rejected and inbox
+# long-polls are held for up to WEBAPP_LONG_POLL seconds. At most
+# WEBAPP_CONCURRENCY requests touch storage or Mail.tm at once.
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "127.0.0.1")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", 0))
+WEBAPP_API_URL = os.getenv("WEBAPP_API_URL", "").rstrip("/")
+WEBAPP_AUTH_MAX_AGE = int(os.getenv("WEBAPP_AUTH_MAX_AGE", 86400))
+WEBAPP_LONG_POLL = int(os.getenv("WEBAPP_LONG_POLL", 25))
+WEBAPP_CONCURRENCY = int(os.getenv("WEBAPP_CONCURRENCY", 16))
+
+# Profiling: admins may run /profile; reports are written to PROFILE_DIR.
+# Event-loop stalls longer than SLOW_CALLBACK_THRESHOLD seconds are logged
+# with the blocking stack (0 disables).
+ADMIN_IDS = {int(i) for i in os.getenv("ADMIN_IDS", "").split(",") if i.strip()}
+PROFILE_RUNS = int(os.getenv("PROFILE_RUNS", 3))
+SLOW_CALLBACK_THRESHOLD = float(os.getenv("SLOW_CALLBACK_THRESHOLD", 0.5))
+
+# Fraction of updates and per-user mail checks traced (JSON lines on the
+# bot.trace logger); 0 disables tracing
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.01))
+
+# Database path (directories are created on first write, not on import)
 DATA_DIR = Path(__file__).parent.parent / "data"
-DATA_DIR.mkdir(exist_ok=True)
 DB_PATH = DATA_DIR / "bot.db"
+WEB_DIR = Path(__file__).parent.parent / "web"
+
+# Number of SQLite files users are spread over (each has its own writer);
+# change it only together with: python -m bot.database.reshard --shards N
+DB_SHARDS = int(os.getenv("DB_SHARDS", 1))
+PROFILE_DIR = DATA_DIR / "profiles"
+
+# Attachment forwarding
+ATTACHMENT_CACHE_DIR = DATA_DIR / "attachments"
+ATTACHMENT_MAX_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", 20 * 1024 * 1024))
+ATTACHMENT_CACHE_MAX_BYTES = int(os.getenv("ATTACHMENT_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+ATTACHMENT_CONCURRENCY = int(os.getenv("ATTACHMENT_CONCURRENCY", 4))
@@ -0,0 +1,299 @@
+"""
+Versioned schema migrations.
+
+Each database file records the last migration applied in SQLite's
+``user_version``; on start-up the newer ones run in order, each in its
+own transaction. Add a migration by appending a ``@migration(n, ...)``
+function with the next number; never edit one that has shipped.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import aiosqlite
+
+from ..utils.helpers import decode_jwt_exp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Migration:
+    """One schema change."""
+    version: int
+    description: str
+    apply: Callable[[aiosqlite.Connection], Awaitable[None]]
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Register a migration function (applied in version order)."""
+    def register(func):
+        MIGRATIONS.append(Migration(version, description, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+    return register
+
+
+async def schema_version(db: aiosqlite.Connection) -> int:
+    """Last migration applied to a database file (0 for unversioned files)."""
+    async with db.execute("PRAGMA user_version") as cursor:
+        return (await cursor.fetchone())[0]
+
+
+async def migrate(db: aiosqlite.Connection) -> int:
+    """
+    Apply the migrations a database file has not seen yet.
+
+    Returns:
+        The schema version after migrating.
+    """
+    version = await schema_version(db)
+    for step in MIGRATIONS:
+        if step.version <= version:
+            continue
+        await db.execute("BEGIN")
+        try:
+            await step.apply(db)
+            await db.execute(f"PRAGMA user_version = {step.version}")
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        logger.info(f"Applied schema migration {step.version}: {step.description}")
+        version = step.version
+    return version
+
+
+async def has_table(db: aiosqlite.Connection, name: str) -> bool:
+    """Whether a table (or virtual table) exists."""
+    async with db.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)) as cursor:
+        return await cursor.fetchone() is not None
+
+
+# ==================== Migrations ====================
+
+@migration(1, "baseline schema")
+async def _baseline(db: aiosqlite.Connection) -> None:
+    """
+    Create the schema as it stood before versioning.
+
+    Files from before versioning may be in any earlier state, so every
+    step here tolerates existing tables and upgrades old layouts.
+    """
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            telegram_id INTEGER PRIMARY KEY,
+            account_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_active_at INTEGER,
+            status TEXT NOT NULL DEFAULT 'active'
+        )
+    """)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS accounts (
+            account_id TEXT PRIMARY KEY,
+            telegram_id INTEGER NOT NULL,
+            email TEXT NOT NULL,
+            password TEXT NOT NULL,
+            token TEXT NOT NULL,
+            provider TEXT,
+            last_message_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            token_expires_at INTEGER,
+            next_poll_at REAL,
+            poll_backoff INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_accounts_user ON accounts (telegram_id)"
+    )
+    await _split_accounts(db)
+    # Sessions from before activity tracking start their idle clock now
+    await db.execute(
+        "UPDATE users SET last_active_at = ? WHERE last_active_at IS NULL",
+        (int(time.time()),)
+    )
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS attachments (
+            key TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            file_id TEXT
+        )
+    """)
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_attachments_sha256 ON attachments (sha256)"
+    )
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS retired_accounts (
+            account_id TEXT PRIMARY KEY,
+            email TEXT NOT NULL,
+            password TEXT NOT NULL,
+            token TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            retired_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            provider TEXT
+        )
+    """)
+    await _add_legacy_columns(db, "retired_accounts", {"provider": "TEXT"})
+    await _create_message_index(db)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+
+
+@migration(2, "indexes for due-work queries")
+async def _due_work_indexes(db: aiosqlite.Connection) -> None:
+    """
+    Index the columns the background jobs select and order by.
+
+    The poll and token indexes carry the columns the scheduler reads, so
+    "due before T, limit N" is a range scan that stops after N rows.
+    The idle/expiry queries filter ``users`` on status and activity.
+    """
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_accounts_next_poll "
+        "ON accounts (next_poll_at, telegram_id, account_id, poll_backoff)"
+    )
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_accounts_token_expiry "
+        "ON accounts (token_expires_at, telegram_id)"
+    )
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_status_activity ON users (status, last_active_at)"
+    )
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_last_active ON users (last_active_at)"
+    )
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_retired_accounts_age ON retired_accounts (retired_at)"
+    )
+
+
+@migration(3, "token expiry of sessions saved before it was stored")
+async def _backfill_token_expiry(db: aiosqlite.Connection) -> None:
+    """
+    Read ``token_expires_at`` from the token of accounts that lack it.
+
+    The token refresher selects accounts by that column, so without it
+    older sessions would only be re-authenticated after a 401.
+    """
+    async with db.execute(
+        "SELECT account_id, token FROM accounts WHERE token_expires_at IS NULL AND token IS NOT NULL"
+    ) as cursor:
+        rows = await cursor.fetchall()
+    updates = [(exp, account_id) for account_id, token in rows if (exp := decode_jwt_exp(token)) is not None]
+    await db.executemany("UPDATE accounts SET token_expires_at = ? WHERE account_id = ?", updates)
+    if updates:
+        logger.info(f"Read the token expiry of {len(updates)} account(s)")
+
+
+# ==================== Helpers ====================
+
+async def _add_legacy_columns(db: aiosqlite.Connection, table: str, columns: dict[str, str]) -> None:
+    """Add columns that unversioned files may predate."""
+    async with db.execute(f"PRAGMA table_info({table})") as cursor:
+        existing = {row[1] for row in await cursor.fetchall()}
+    for name, decl in columns.items():
+        if name not in existing:
+            await db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
+async def _split_accounts(db: aiosqlite.Connection) -> None:
+    """Move addresses out of a ``users`` table from the one-address-per-user schema."""
+    async with db.execute("PRAGMA table_info(users)") as cursor:
+        if "email" not in {row[1] for row in await cursor.fetchall()}:
+            return
+    await _add_legacy_columns(db, "users", {
+        "token_expires_at": "INTEGER",
+        "last_active_at": "INTEGER",
+        "status": "TEXT NOT NULL DEFAULT 'active'",
+        "provider": "TEXT",
+        "next_poll_at": "REAL",
+        "poll_backoff": "INTEGER NOT NULL DEFAULT 0",
+    })
+    await db.execute("""
+        INSERT OR IGNORE INTO accounts (account_id, telegram_id, email, password, token, provider,
+                                        last_message_id, created_at, token_expires_at,
+                                        next_poll_at, poll_backoff)
+        SELECT account_id, telegram_id, email, password, token, provider,
+               last_message_id, created_at, token_expires_at, next_poll_at, poll_backoff
+        FROM users
+    """)
+    await db.execute("ALTER TABLE users RENAME TO users_single")
+    await db.execute("""
+        CREATE TABLE users (
+            telegram_id INTEGER PRIMARY KEY,
+            account_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_active_at INTEGER,
+            status TEXT NOT NULL DEFAULT 'active'
+        )
+    """)
+    await db.execute("""
+        INSERT INTO users (telegram_id, account_id, created_at, last_active_at, status)
+        SELECT telegram_id, account_id, created_at, last_active_at, status FROM users_single
+    """)
+    await db.execute("DROP TABLE users_single")
+    logger.info("Moved addresses from users into the accounts table")
+
+
+async def _create_message_index(db: aiosqlite.Connection) -> None:
+    """Create the table of received messages and, if FTS5 is available, its full-text index."""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY,
+            telegram_id INTEGER NOT NULL,
+            account_id TEXT NOT NULL,
+            msg_id TEXT NOT NULL,
+            sender TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            created_at TEXT,
+            owner TEXT GENERATED ALWAYS AS ('u' || telegram_id) VIRTUAL,
+            UNIQUE (telegram_id, msg_id)
+        )
+    """)
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_messages_account ON messages (telegram_id, account_id)"
+    )
+    try:
+        # External-content index over ``messages``, kept in sync by triggers
+        await db.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                owner, sender, subject, body,
+                content='messages', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        """)
+    except aiosqlite.OperationalError as e:
+        logger.warning(f"Message search disabled, SQLite has no FTS5: {e}")
+        return
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, owner, sender, subject, body)
+            VALUES (new.id, new.owner, new.sender, new.subject, new.body);
+        END
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, owner, sender, subject, body)
+            VALUES ('delete', old.id, old.owner, old.sender, old.subject, old.body);
+        END
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, owner, sender, subject, body)
+            VALUES ('delete', old.id, old.owner, old.sender, old.subject, old.body);
+            INSERT INTO messages_fts (rowid, owner, sender, subject, body)
+            VALUES (new.id, new.owner, new.sender, new.subject, new.body);
+        END
+    """)
@@ -0,0 +1,120 @@
+"""
+Move users between database files after changing ``DB_SHARDS``.
+
+Users (with their addresses and indexed messages) are copied to the file
+of their new shard, then removed from the old one; files beyond the new
+shard count are deleted once empty. Bot-wide tables stay in ``bot.db``.
+Run it with the bot stopped; an interrupted run can simply be repeated.
+
+Usage:
+    python -m bot.database.reshard --shards 4
+    python -m bot.database.reshard --shards 1          # back to one file
+"""
+
+import argparse
+import asyncio
+import re
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+from ..config import DB_PATH
+from .storage import Storage
+
+# Tables whose rows belong to one user and move with them
+USER_TABLES = ("users", "accounts", "messages")
+
+
+def existing_shards(db_path: Path) -> list[int]:
+    """Indexes of the shard files present next to the main database."""
+    pattern = re.compile(rf"{re.escape(db_path.stem)}\.(\d+){re.escape(db_path.suffix)}")
+    found = {0}
+    for path in db_path.parent.iterdir():
+        match = pattern.fullmatch(path.name)
+        if match:
+            found.add(int(match.group(1)))
+    return sorted(found)
+
+
+def _columns(db: sqlite3.Connection, table: str) -> str:
+    """Stored columns of a table (``table_info`` omits generated ones); message row IDs are reassigned."""
+    names = [row[1] for row in db.execute(f"PRAGMA table_info({table})")]
+    return ", ".join(name for name in names if not (table == "messages" and name == "id"))
+
+
+def move_users(source: Path, source_index: int, target: Storage) -> int:
+    """
+    Move the users of one file that belong to other shards.
+
+    Args:
+        source: Database file
+        source_index: Shard index of the file (0 for the main database)
+        target: Storage configured with the new shard count
+
+    Returns:
+        Number of users moved out of the file
+    """
+    moved = 0
+    with closing(sqlite3.connect(source)) as db:
+        for shard in range(target.shards):
+            if shard == source_index:
+                continue
+            db.execute("ATTACH DATABASE ? AS target", (str(target.shard_path(shard)),))
+            for table in USER_TABLES:
+                columns = _columns(db, table)
+                conflict = "IGNORE" if table == "messages" else "REPLACE"
+                cursor = db.execute(
+                    f"INSERT OR {conflict} INTO target.{table} ({columns}) "
+                    f"SELECT {columns} FROM main.{table} WHERE telegram_id % ? = ?",
+                    (target.shards, shard)
+                )
+                if table == "users":
+                    moved += cursor.rowcount
+            db.commit()
+            db.execute("DETACH DATABASE target")
+        # Only after every copy is committed
+        for table in USER_TABLES:
+            db.execute(f"DELETE FROM {table} WHERE telegram_id % ? != ?", (target.shards, source_index))
+        db.commit()
+    return moved
+
+
+def reshard(db_path: Path, shards: int) -> None:
+    """Redistribute all users over ``shards`` files."""
+    current = existing_shards(db_path)
+    source = Storage(shards=max(current) + 1)
+    source.db_path = db_path
+    target = Storage(shards=shards)
+    target.db_path = db_path
+
+    # Bring every file to the current schema first
+    asyncio.run(source.init_db(check_layout=False))
+    asyncio.run(target.init_db(check_layout=False))
+
+    for index in current:
+        moved = move_users(source.shard_path(index), index, target)
+        print(f"{source.shard_path(index).name}: moved {moved} user(s)")
+
+    for index in current:
+        if index >= shards:
+            source.shard_path(index).unlink()
+            print(f"{source.shard_path(index).name}: removed")
+
+    with closing(sqlite3.connect(db_path)) as db:
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('shards', ?)", (str(shards),))
+        db.commit()
+    print(f"Database now has {shards} shard(s); set DB_SHARDS={shards}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--shards", type=int, required=True, help="new number of database files")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="main database file")
+    args = parser.parse_args(argv)
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+    reshard(args.db, args.shards)
+
+
+if __name__ == "__main__":
+    main()
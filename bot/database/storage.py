@@ -1,15 +1,43 @@
 """SQLite storage for user sessions."""
 
 import aiosqlite
-from typing import Optional
+import asyncio
+import heapq
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, AsyncIterator, Optional
 from dataclasses import dataclass
 from datetime import datetime
-from ..config import DB_PATH
+from pathlib import Path
+from ..config import DB_PATH, DB_SHARDS
+from .migrations import has_table, migrate
+from ..utils.helpers import decode_jwt_exp
+from ..utils.metrics import Counter, Histogram, instrumented
+from ..utils.tracing import traced_methods
+
+logger = logging.getLogger(__name__)
+
+# Search queries use at most this many words
+MAX_SEARCH_TERMS = 8
+
+STORAGE_SECONDS = Histogram(
+    "storage_operation_seconds", "SQLite storage operation latency", ("operation",)
+)
+STORAGE_ERRORS = Counter(
+    "storage_errors_total", "Failed SQLite storage operations", ("operation",)
+)
+
+
+class StorageLayoutError(Exception):
+    """The database files on disk are sharded differently than configured."""
+    pass
 
 
 @dataclass
 class UserSession:
-    """User session data."""
+    """One email address of a user, with the user's lifecycle state."""
     telegram_id: int
     email: str
     password: str
@@ -17,149 +45,857 @@ class UserSession:
     account_id: str
     last_message_id: Optional[str] = None
     created_at: Optional[str] = None
+    token_expires_at: Optional[int] = None
+    last_active_at: Optional[int] = None
+    status: str = "active"
+    provider: Optional[str] = None  # API base URL; None means the default provider
+    next_poll_at: Optional[float] = None  # None: poll on the next notifier tick
+    poll_backoff: int = 0
+    is_current: bool = True  # The address /inbox shows
+    account_count: int = 1  # Addresses the user holds
+
+
+@dataclass
+class RetiredAccount:
+    """Replaced Mail.tm account waiting to be deleted."""
+    account_id: str
+    email: str
+    password: str
+    token: str
+    attempts: int = 0
+    provider: Optional[str] = None
+
+
+@dataclass
+class SearchHit:
+    """Indexed message matching a search."""
+    msg_id: str
+    sender: str
+    subject: str
+    snippet: str
+    created_at: str
+
+
+@dataclass
+class CachedAttachment:
+    """Downloaded attachment stored in the content-addressed cache."""
+    key: str
+    sha256: str
+    size: int
+    file_id: Optional[str] = None
+
+
+def _match_query(telegram_id: int, text: str) -> Optional[str]:
+    """
+    Build an FTS5 query for a user's search text.
+    
+    Every word must appear (as a prefix) in the sender, subject or body,
+    and only the user's own messages match. Words are quoted, so FTS5
+    operators in the input are searched for literally.
+    """
+    words = re.findall(r"\w+", text.lower())[:MAX_SEARCH_TERMS]
+    if not words:
+        return None
+    terms = " ".join(f'"{word}"*' for word in words)
+    return f'owner:"u{telegram_id}" AND {{sender subject body}}: ({terms})'
 
 
+# Addresses joined with their user; ``is_current`` and ``account_count``
+# tell the scheduler how often to poll each one
+_SESSION_QUERY = (
+    "SELECT a.*, u.last_active_at, u.status, a.account_id = u.account_id AS is_current, "
+    "(SELECT COUNT(*) FROM accounts b WHERE b.telegram_id = a.telegram_id) AS account_count "
+    "FROM accounts a JOIN users u ON u.telegram_id = a.telegram_id"
+)
+
+
+def _row_to_session(row) -> UserSession:
+    """Build a UserSession from a row of ``_SESSION_QUERY``."""
+    return UserSession(
+        telegram_id=row["telegram_id"],
+        email=row["email"],
+        password=row["password"],
+        token=row["token"],
+        account_id=row["account_id"],
+        last_message_id=row["last_message_id"],
+        created_at=row["created_at"],
+        token_expires_at=row["token_expires_at"],
+        last_active_at=row["last_active_at"],
+        status=row["status"],
+        provider=row["provider"],
+        next_poll_at=row["next_poll_at"],
+        poll_backoff=row["poll_backoff"],
+        is_current=bool(row["is_current"]),
+        account_count=row["account_count"]
+    )
+
+
+@instrumented(STORAGE_SECONDS, STORAGE_ERRORS)
+@traced_methods("storage")
 class Storage:
-    """SQLite database storage for user sessions."""
+    """
+    SQLite database storage for user sessions.
+    
+    Users (with their addresses and indexed messages) can be spread over
+    several database files, each with its own writer lock: user ``t``
+    lives in shard ``t % shards``. Shard 0 is ``db_path`` itself and also
+    holds the bot-wide tables (retired accounts, attachment cache,
+    metadata), so one shard is the plain single-file layout. Queries
+    over all users run on every shard concurrently and merge results.
     
-    def __init__(self):
+    Each file is used through one long-lived connection (and its worker
+    thread), opened on first use and shut with ``close()``. Operations
+    on a file take turns on its connection, one transaction at a time;
+    different files are written in parallel.
+    
+    Args:
+        shards: Number of database files
+    """
+    
+    def __init__(self, shards: int = DB_SHARDS):
         self.db_path = DB_PATH
+        self.shards = shards
+        self.search_enabled = True
+        self._connections: dict[Path, aiosqlite.Connection] = {}
+        self._locks: dict[Path, asyncio.Lock] = {}
     
-    async def init_db(self):
-        """Initialize the database and create tables."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    telegram_id INTEGER PRIMARY KEY,
-                    email TEXT NOT NULL,
-                    password TEXT NOT NULL,
-                    token TEXT NOT NULL,
-                    account_id TEXT NOT NULL,
-                    last_message_id TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            await db.commit()
+    def shard_of(self, telegram_id: int) -> int:
+        """Index of the shard holding a user."""
+        return telegram_id % self.shards
+    
+    def shard_path(self, shard: int) -> Path:
+        """Database file of a shard (``bot.db``, ``bot.1.db``, ...)."""
+        path = Path(self.db_path)
+        return path if shard == 0 else path.with_name(f"{path.stem}.{shard}{path.suffix}")
+    
+    @asynccontextmanager
+    async def _open(self, path: Path) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        The shared connection of a database file, held for one operation.
+        
+        Writes the operation left uncommitted (it failed or was
+        cancelled) are rolled back before the next one gets the connection.
+        """
+        async with self._locks.setdefault(path, asyncio.Lock()):
+            db = self._connections.get(path)
+            if db is None:
+                db = self._connections[path] = await aiosqlite.connect(path)
+            try:
+                yield db
+            finally:
+                db.row_factory = None
+                if db.in_transaction:
+                    await db.rollback()
+    
+    def _connect(self, telegram_id: Optional[int] = None) -> AsyncContextManager[aiosqlite.Connection]:
+        """Connection to the shard holding a user, or to shard 0 for bot-wide data."""
+        shard = 0 if telegram_id is None else self.shard_of(telegram_id)
+        return self._open(self.shard_path(shard))
+    
+    async def _each_shard(self, func) -> list:
+        """Run ``func(db)`` on every shard concurrently; results in shard order."""
+        async def run(shard: int):
+            async with self._open(self.shard_path(shard)) as db:
+                return await func(db)
+        
+        return await asyncio.gather(*(run(shard) for shard in range(self.shards)))
+    
+    async def init_db(self, check_layout: bool = True):
+        """
+        Initialize the database files and create tables.
+        
+        Args:
+            check_layout: Verify the files were written with this shard
+                count (the reshard tool skips this)
+        
+        Raises:
+            StorageLayoutError: If the files were written with another
+                shard count (see ``python -m bot.database.reshard``)
+        """
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        await self._init_shard(self.shard_path(0))
+        if check_layout:
+            await self._check_layout()
+        await asyncio.gather(*(self._init_shard(self.shard_path(i)) for i in range(1, self.shards)))
+    
+    async def close(self) -> None:
+        """Close the database connections; the next operation reopens them."""
+        connections, self._connections = self._connections, {}
+        for db in connections.values():
+            await db.close()
     
-    async def save_user(self, session: UserSession) -> None:
+    async def _check_layout(self) -> None:
+        """Compare the shard count recorded in shard 0 with ``shards``."""
+        async with self._connect() as db:
+            async with db.execute("SELECT value FROM meta WHERE key = 'shards'") as cursor:
+                row = await cursor.fetchone()
+            if row:
+                layout = int(row[0])
+            else:
+                # Databases from before sharding are a single file
+                async with db.execute("SELECT EXISTS (SELECT 1 FROM users)") as cursor:
+                    layout = 1 if (await cursor.fetchone())[0] else self.shards
+                await db.execute("INSERT INTO meta (key, value) VALUES ('shards', ?)", (str(layout),))
+                await db.commit()
+        if layout != self.shards:
+            raise StorageLayoutError(
+                f"Database has {layout} shard(s) but DB_SHARDS is {self.shards}; "
+                f"run: python -m bot.database.reshard --shards {self.shards}"
+            )
+    
+    async def _init_shard(self, path: Path) -> None:
+        """Bring one database file to the current schema (see ``migrations``)."""
+        async with aiosqlite.connect(path) as db:
+            await migrate(db)
+            if not await has_table(db, "messages_fts"):
+                self.search_enabled = False
+    
+    async def save_account(self, session: UserSession) -> None:
         """
-        Save or update a user session.
+        Save or update an address and make it the user's current one.
         
         Args:
             session: UserSession object to save
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect(session.telegram_id) as db:
             await db.execute("""
-                INSERT OR REPLACE INTO users 
-                (telegram_id, email, password, token, account_id, last_message_id, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO users (telegram_id, account_id, last_active_at, status)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (telegram_id) DO UPDATE SET
+                    account_id = excluded.account_id,
+                    last_active_at = excluded.last_active_at,
+                    status = excluded.status
             """, (
+                session.telegram_id,
+                session.account_id,
+                session.last_active_at or int(time.time()),
+                session.status
+            ))
+            await db.execute("""
+                INSERT OR REPLACE INTO accounts
+                (account_id, telegram_id, email, password, token, provider, last_message_id,
+                 created_at, token_expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                session.account_id,
                 session.telegram_id,
                 session.email,
                 session.password,
                 session.token,
-                session.account_id,
+                session.provider,
                 session.last_message_id,
-                session.created_at or datetime.now().isoformat()
+                session.created_at or datetime.now().isoformat(),
+                session.token_expires_at or decode_jwt_exp(session.token)
             ))
             await db.commit()
     
     async def get_user(self, telegram_id: int) -> Optional[UserSession]:
         """
-        Get user session by Telegram ID.
+        Get the current address of a user.
         
         Args:
             telegram_id: Telegram user ID
             
         Returns:
-            UserSession object or None if not found
+            UserSession object or None if the user has no address
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect(telegram_id) as db:
             db.row_factory = aiosqlite.Row
             async with db.execute(
-                "SELECT * FROM users WHERE telegram_id = ?",
+                f"{_SESSION_QUERY} WHERE a.telegram_id = ? AND a.account_id = u.account_id",
                 (telegram_id,)
             ) as cursor:
                 row = await cursor.fetchone()
-                if row:
-                    return UserSession(
-                        telegram_id=row["telegram_id"],
-                        email=row["email"],
-                        password=row["password"],
-                        token=row["token"],
-                        account_id=row["account_id"],
-                        last_message_id=row["last_message_id"],
-                        created_at=row["created_at"]
-                    )
-                return None
+                return _row_to_session(row) if row else None
     
-    async def update_token(self, telegram_id: int, token: str) -> None:
+    async def get_accounts(self, telegram_id: int) -> list[UserSession]:
         """
-        Update the JWT token for a user.
+        Get all addresses of a user, oldest first.
         
         Args:
             telegram_id: Telegram user ID
-            token: New JWT token
+            
+        Returns:
+            List of UserSession objects
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect(telegram_id) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(
+                f"{_SESSION_QUERY} WHERE a.telegram_id = ? ORDER BY a.created_at, a.rowid",
+                (telegram_id,)
+            ) as cursor:
+                return [_row_to_session(row) for row in await cursor.fetchall()]
+    
+    async def get_account(self, telegram_id: int, account_id: str) -> Optional[UserSession]:
+        """
+        Get one of a user's addresses.
+        
+        Args:
+            telegram_id: Telegram user ID
+            account_id: Mail.tm account ID
+            
+        Returns:
+            UserSession object or None if the user has no such address
+        """
+        async with self._connect(telegram_id) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(
+                f"{_SESSION_QUERY} WHERE a.telegram_id = ? AND a.account_id = ?",
+                (telegram_id, account_id)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return _row_to_session(row) if row else None
+    
+    async def get_account_for_message(self, telegram_id: int, msg_id: str) -> Optional[UserSession]:
+        """
+        Get the address a received message belongs to.
+        
+        Messages are looked up in the ``messages`` table; messages never
+        recorded there are assumed to be in the current address.
+        
+        Args:
+            telegram_id: Telegram user ID
+            msg_id: Mail.tm message ID
+            
+        Returns:
+            UserSession object or None if the user has no address
+        """
+        async with self._connect(telegram_id) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(
+                f"{_SESSION_QUERY} WHERE a.telegram_id = ? AND (a.account_id = u.account_id "
+                "OR a.account_id IN (SELECT account_id FROM messages WHERE telegram_id = ? AND msg_id = ?)) "
+                "ORDER BY is_current LIMIT 1",
+                (telegram_id, telegram_id, msg_id)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return _row_to_session(row) if row else None
+    
+    async def set_current_account(self, telegram_id: int, account_id: str) -> None:
+        """
+        Choose the address /inbox shows.
+        
+        Args:
+            telegram_id: Telegram user ID
+            account_id: Mail.tm account ID (one of the user's)
+        """
+        async with self._connect(telegram_id) as db:
             await db.execute(
-                "UPDATE users SET token = ? WHERE telegram_id = ?",
-                (token, telegram_id)
+                "UPDATE users SET account_id = ? WHERE telegram_id = ?",
+                (account_id, telegram_id)
             )
             await db.commit()
     
-    async def update_last_message(self, telegram_id: int, message_id: str) -> None:
+    async def delete_account(self, telegram_id: int, account_id: str) -> None:
         """
-        Update the last seen message ID for a user.
+        Delete one address of a user and its indexed messages.
+        
+        If it was the current address, the newest remaining one takes
+        its place.
         
         Args:
             telegram_id: Telegram user ID
+            account_id: Mail.tm account ID
+        """
+        async with self._connect(telegram_id) as db:
+            await db.execute(
+                "DELETE FROM accounts WHERE telegram_id = ? AND account_id = ?",
+                (telegram_id, account_id)
+            )
+            await db.execute(
+                "DELETE FROM messages WHERE telegram_id = ? AND account_id = ?",
+                (telegram_id, account_id)
+            )
+            await db.execute("""
+                UPDATE users SET account_id = (
+                    SELECT account_id FROM accounts WHERE telegram_id = users.telegram_id
+                    ORDER BY created_at DESC, rowid DESC LIMIT 1
+                )
+                WHERE telegram_id = ? AND account_id = ?
+            """, (telegram_id, account_id))
+            await db.commit()
+    
+    async def update_token(self, telegram_id: int, account_id: str, token: str) -> None:
+        """
+        Update the JWT token (and its expiry) of an address.
+        
+        Args:
+            telegram_id: Telegram user ID owning the address
+            account_id: Mail.tm account ID
+            token: New JWT token
+        """
+        async with self._connect(telegram_id) as db:
+            await db.execute(
+                "UPDATE accounts SET token = ?, token_expires_at = ? WHERE account_id = ?",
+                (token, decode_jwt_exp(token), account_id)
+            )
+            await db.commit()
+    
+    async def clear_token_expiry(self, telegram_id: int, account_id: str) -> None:
+        """
+        Stop tracking token expiry for an address (e.g. credentials rejected).
+        
+        Args:
+            telegram_id: Telegram user ID owning the address
+            account_id: Mail.tm account ID
+        """
+        async with self._connect(telegram_id) as db:
+            await db.execute(
+                "UPDATE accounts SET token_expires_at = NULL WHERE account_id = ?",
+                (account_id,)
+            )
+            await db.commit()
+    
+    async def update_last_message(self, telegram_id: int, account_id: str, message_id: str) -> None:
+        """
+        Update the last seen message ID of an address.
+        
+        Args:
+            telegram_id: Telegram user ID owning the address
+            account_id: Mail.tm account ID
             message_id: Last message ID
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect(telegram_id) as db:
             await db.execute(
-                "UPDATE users SET last_message_id = ? WHERE telegram_id = ?",
-                (message_id, telegram_id)
+                "UPDATE accounts SET last_message_id = ? WHERE account_id = ?",
+                (message_id, account_id)
             )
             await db.commit()
     
     async def delete_user(self, telegram_id: int) -> None:
         """
-        Delete a user session.
+        Delete a user with all their addresses.
+        
+        Args:
+            telegram_id: Telegram user ID
+        """
+        async with self._connect(telegram_id) as db:
+            for table in ("users", "accounts", "messages"):
+                await db.execute(
+                    f"DELETE FROM {table} WHERE telegram_id = ?",
+                    (telegram_id,)
+                )
+            await db.commit()
+    
+    async def touch_user(self, telegram_id: int) -> None:
+        """
+        Record user activity and mark the user active again.
+        
+        Addresses of idle users returning are polled again on the next
+        notifier tick.
         
         Args:
             telegram_id: Telegram user ID
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect(telegram_id) as db:
             await db.execute(
-                "DELETE FROM users WHERE telegram_id = ?",
-                (telegram_id,)
+                "UPDATE accounts SET next_poll_at = NULL WHERE telegram_id = ? "
+                "AND (SELECT status FROM users WHERE telegram_id = ?) = 'idle'",
+                (telegram_id, telegram_id)
+            )
+            await db.execute(
+                "UPDATE users SET last_active_at = ?, status = 'active' WHERE telegram_id = ?",
+                (int(time.time()), telegram_id)
+            )
+            await db.commit()
+    
+    async def set_user_status(self, telegram_id: int, status: str) -> None:
+        """
+        Update the lifecycle status of a user.
+        
+        Args:
+            telegram_id: Telegram user ID
+            status: New status ("active", "idle" or "blocked")
+        """
+        async with self._connect(telegram_id) as db:
+            await db.execute(
+                "UPDATE users SET status = ? WHERE telegram_id = ?",
+                (status, telegram_id)
             )
             await db.commit()
     
-    async def get_all_users(self) -> list[UserSession]:
+    async def mark_idle_users(self, inactive_since: int) -> int:
+        """
+        Demote active users with no activity since a given time to idle.
+        
+        Args:
+            inactive_since: Unix timestamp
+            
+        Returns:
+            Number of users demoted
+        """
+        async def update(db) -> int:
+            cursor = await db.execute(
+                "UPDATE users SET status = 'idle' WHERE status = 'active' AND last_active_at < ?",
+                (inactive_since,)
+            )
+            await db.commit()
+            return cursor.rowcount
+        
+        return sum(await self._each_shard(update))
+
+    async def get_expired_users(self, inactive_since: int, limit: int) -> list[int]:
         """
-        Get all user sessions (for background notifications).
+        Get users who blocked the bot or have been inactive since a given time.
         
+        Args:
+            inactive_since: Unix timestamp
+            limit: Maximum number of users to return
+            
         Returns:
-            List of all UserSession objects
+            List of Telegram user IDs
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        async def query(db) -> list[int]:
+            async with db.execute(
+                "SELECT telegram_id FROM users WHERE status = 'blocked' OR last_active_at < ? LIMIT ?",
+                (inactive_since, limit)
+            ) as cursor:
+                return [row[0] for row in await cursor.fetchall()]
+        
+        return [uid for shard in await self._each_shard(query) for uid in shard][:limit]
+
+    async def get_accounts_with_expiring_tokens(self, before: int, limit: int) -> list[UserSession]:
+        """
+        Get addresses whose token expires before a given time, soonest first.
+        
+        Args:
+            before: Unix timestamp
+            limit: Maximum number of addresses to return
+            
+        Returns:
+            List of UserSession objects
+        """
+        async def query(db) -> list[UserSession]:
             db.row_factory = aiosqlite.Row
-            async with db.execute("SELECT * FROM users") as cursor:
-                rows = await cursor.fetchall()
-                return [
-                    UserSession(
-                        telegram_id=row["telegram_id"],
-                        email=row["email"],
-                        password=row["password"],
-                        token=row["token"],
-                        account_id=row["account_id"],
-                        last_message_id=row["last_message_id"],
-                        created_at=row["created_at"]
-                    )
-                    for row in rows
-                ]
+            async with db.execute(
+                f"{_SESSION_QUERY} WHERE a.token_expires_at < ? AND u.status != 'blocked' "
+                "ORDER BY a.token_expires_at LIMIT ?",
+                (before, limit)
+            ) as cursor:
+                return [_row_to_session(row) for row in await cursor.fetchall()]
+        
+        shards = await self._each_shard(query)
+        return list(heapq.merge(*shards, key=lambda user: user.token_expires_at))[:limit]
+
+    # ==================== Poll Schedule ====================
+    
+    async def get_accounts_due(self, now: float, limit: int) -> list[UserSession]:
+        """
+        Get addresses the notifier should poll now, most overdue first.
+        
+        Args:
+            now: Unix timestamp
+            limit: Maximum number of addresses to return
+            
+        Returns:
+            List of UserSession objects (never of blocked users)
+        """
+        async def query(db) -> list[UserSession]:
+            db.row_factory = aiosqlite.Row
+            # Two index ranges rather than an OR, so only due rows are read
+            async with db.execute(
+                f"{_SESSION_QUERY} WHERE u.status != 'blocked' AND a.rowid IN ("
+                "SELECT rowid FROM accounts WHERE next_poll_at IS NULL UNION ALL "
+                "SELECT rowid FROM accounts WHERE next_poll_at <= ?"
+                ") ORDER BY a.next_poll_at LIMIT ?",
+                (now, limit)
+            ) as cursor:
+                return [_row_to_session(row) for row in await cursor.fetchall()]
+        
+        # Unscheduled (NULL) first, as SQLite orders them
+        return list(heapq.merge(
+            *await self._each_shard(query),
+            key=lambda user: (user.next_poll_at is not None, user.next_poll_at or 0)
+        ))[:limit]
+
+    async def get_overdue_polls(self, now: float) -> list[tuple[int, str, Optional[float], int]]:
+        """
+        Get the addresses whose next poll is unscheduled or already past.
+        
+        Args:
+            now: Unix timestamp
+            
+        Returns:
+            List of (telegram_id, account_id, next_poll_at, poll_backoff) tuples
+        """
+        async def query(db) -> list[tuple]:
+            async with db.execute(
+                "SELECT a.telegram_id, a.account_id, a.next_poll_at, a.poll_backoff "
+                "FROM accounts a JOIN users u ON u.telegram_id = a.telegram_id "
+                "WHERE u.status != 'blocked' AND (a.next_poll_at IS NULL OR a.next_poll_at < ?)",
+                (now,)
+            ) as cursor:
+                return [tuple(row) for row in await cursor.fetchall()]
+        
+        return [entry for shard in await self._each_shard(query) for entry in shard]
+
+    async def save_poll_schedule(self, entries: list[tuple[int, str, float, int]]) -> None:
+        """
+        Store next poll times and backoff levels, one transaction per shard.
+        
+        Args:
+            entries: (telegram_id, account_id, next_poll_at, poll_backoff) tuples
+        """
+        by_shard: dict[int, list[tuple[float, int, str]]] = {}
+        for telegram_id, account_id, due, backoff in entries:
+            by_shard.setdefault(self.shard_of(telegram_id), []).append((due, backoff, account_id))
+        
+        async def update(shard: int, rows: list[tuple[float, int, str]]) -> None:
+            async with self._open(self.shard_path(shard)) as db:
+                await db.executemany(
+                    "UPDATE accounts SET next_poll_at = ?, poll_backoff = ? WHERE account_id = ?",
+                    rows
+                )
+                await db.commit()
+        
+        await asyncio.gather(*(update(shard, rows) for shard, rows in by_shard.items()))
+
+    # ==================== Retired Accounts ====================
+    
+    async def retire_account(self, session: UserSession) -> None:
+        """
+        Queue a session's Mail.tm account for background deletion.
+        
+        Args:
+            session: Session whose account is no longer used
+        """
+        async with self._connect() as db:
+            await db.execute(
+                "INSERT OR IGNORE INTO retired_accounts (account_id, email, password, token, provider) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session.account_id, session.email, session.password, session.token, session.provider)
+            )
+            await db.commit()
+    
+    async def get_retired_accounts(self, limit: int) -> list[RetiredAccount]:
+        """
+        Get accounts waiting to be deleted, oldest first.
+        
+        Args:
+            limit: Maximum number of accounts to return
+            
+        Returns:
+            List of RetiredAccount objects
+        """
+        async with self._connect() as db:
+            async with db.execute(
+                "SELECT account_id, email, password, token, attempts, provider FROM retired_accounts "
+                "ORDER BY retired_at LIMIT ?",
+                (limit,)
+            ) as cursor:
+                return [RetiredAccount(*row) for row in await cursor.fetchall()]
+    
+    async def delete_retired_account(self, account_id: str) -> None:
+        """
+        Remove an account from the teardown queue.
+        
+        Args:
+            account_id: Mail.tm account ID
+        """
+        async with self._connect() as db:
+            await db.execute(
+                "DELETE FROM retired_accounts WHERE account_id = ?",
+                (account_id,)
+            )
+            await db.commit()
+    
+    async def record_retire_attempt(self, account_id: str) -> None:
+        """
+        Count a failed deletion attempt for a retired account.
+        
+        Args:
+            account_id: Mail.tm account ID
+        """
+        async with self._connect() as db:
+            await db.execute(
+                "UPDATE retired_accounts SET attempts = attempts + 1 WHERE account_id = ?",
+                (account_id,)
+            )
+            await db.commit()
+    
+    # ==================== Attachment Cache ====================
+    
+    async def get_attachment(self, key: str) -> Optional[CachedAttachment]:
+        """
+        Get a cached attachment by its message/attachment key.
+        
+        Args:
+            key: Attachment key ("<message id>/<attachment id>")
+            
+        Returns:
+            CachedAttachment object or None if not cached
+        """
+        async with self._connect() as db:
+            async with db.execute(
+                "SELECT key, sha256, size, file_id FROM attachments WHERE key = ?",
+                (key,)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return CachedAttachment(*row) if row else None
+    
+    async def save_attachment(self, attachment: CachedAttachment) -> None:
+        """
+        Save a cached attachment record.
+        
+        Args:
+            attachment: CachedAttachment object to save
+        """
+        async with self._connect() as db:
+            await db.execute(
+                "INSERT OR REPLACE INTO attachments (key, sha256, size, file_id) VALUES (?, ?, ?, ?)",
+                (attachment.key, attachment.sha256, attachment.size, attachment.file_id)
+            )
+            await db.commit()
+    
+    async def get_attachment_file_id(self, sha256: str) -> Optional[str]:
+        """
+        Get a Telegram file ID already uploaded for the given content.
+        
+        Args:
+            sha256: Content hash
+            
+        Returns:
+            Telegram file ID or None
+        """
+        async with self._connect() as db:
+            async with db.execute(
+                "SELECT file_id FROM attachments WHERE sha256 = ? AND file_id IS NOT NULL LIMIT 1",
+                (sha256,)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row else None
+    
+    async def set_attachment_file_id(self, sha256: str, file_id: str) -> None:
+        """
+        Record the Telegram file ID for all attachments with the given content.
+        
+        Args:
+            sha256: Content hash
+            file_id: Telegram file ID
+        """
+        async with self._connect() as db:
+            await db.execute(
+                "UPDATE attachments SET file_id = ? WHERE sha256 = ?",
+                (file_id, sha256)
+            )
+            await db.commit()
+    
+    # ==================== Message Search ====================
+    
+    async def index_messages(
+        self,
+        telegram_id: int,
+        account_id: str,
+        messages: list[tuple[str, str, str, str, str]]
+    ) -> None:
+        """
+        Add received messages to the search index.
+        
+        Re-indexing a message keeps the longer body, so a preview never
+        replaces a full body indexed earlier. Rows are written even when
+        search is disabled: they also record which address a message
+        arrived at.
+        
+        Args:
+            telegram_id: Telegram user ID
+            account_id: Mail.tm account the messages belong to
+            messages: (msg_id, sender, subject, body, created_at) tuples
+        """
+        async with self._connect(telegram_id) as db:
+            await db.executemany("""
+                INSERT INTO messages (telegram_id, account_id, msg_id, sender, subject, body, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (telegram_id, msg_id) DO UPDATE SET body = excluded.body
+                WHERE length(excluded.body) > length(messages.body)
+            """, [(telegram_id, account_id, *message) for message in messages])
+            await db.commit()
+    
+    async def search_messages(self, telegram_id: int, text: str, limit: int) -> list[SearchHit]:
+        """
+        Search a user's indexed messages, best matches first.
+        
+        Args:
+            telegram_id: Telegram user ID
+            text: Words to look for (prefixes match)
+            limit: Maximum number of hits
+            
+        Returns:
+            List of SearchHit objects
+        """
+        query = _match_query(telegram_id, text)
+        if query is None or not self.search_enabled:
+            return []
+        async with self._connect(telegram_id) as db:
+            async with db.execute("""
+                SELECT m.msg_id, m.sender, m.subject,
+                       snippet(messages_fts, 3, '', '', '…', 12), m.created_at
+                FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+                WHERE messages_fts MATCH ?
+                ORDER BY rank LIMIT ?
+            """, (query, limit)) as cursor:
+                return [SearchHit(*row) for row in await cursor.fetchall()]
+    
+    async def unindex_messages(self, telegram_id: int, msg_ids: list[str]) -> None:
+        """
+        Remove deleted messages from the search index.
+        
+        Args:
+            telegram_id: Telegram user ID
+            msg_ids: Message IDs
+        """
+        async with self._connect(telegram_id) as db:
+            await db.executemany(
+                "DELETE FROM messages WHERE telegram_id = ? AND msg_id = ?",
+                [(telegram_id, msg_id) for msg_id in msg_ids]
+            )
+            await db.commit()
+    
+    async def unindex_account(self, telegram_id: int, account_id: str) -> None:
+        """
+        Remove all indexed messages of an account the user no longer has.
+        
+        Args:
+            telegram_id: Telegram user ID
+            account_id: Mail.tm account ID
+        """
+        async with self._connect(telegram_id) as db:
+            await db.execute(
+                "DELETE FROM messages WHERE telegram_id = ? AND account_id = ?",
+                (telegram_id, account_id)
+            )
+            await db.commit()
+    
+    # ==================== Metadata ====================
+    
+    async def get_meta(self, key: str) -> Optional[str]:
+        """
+        Get a stored bot-level setting.
+        
+        Args:
+            key: Setting name
+            
+        Returns:
+            The value or None if not set
+        """
+        async with self._connect() as db:
+            async with db.execute("SELECT value FROM meta WHERE key = ?", (key,)) as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row else None
+    
+    async def set_meta(self, key: str, value: str) -> None:
+        """
+        Store a bot-level setting.
+        
+        Args:
+            key: Setting name
+            value: Setting value
+        """
+        async with self._connect() as db:
+            await db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, value)
+            )
+            await db.commit()
 
 
 # Global storage instance
@@ -1,5 +1,5 @@
 """Handlers package."""
 
-from . import start
+from . import start, inbox, callbacks, admin, search, email
 
-__all__ = ["start"]
+__all__ = ["start", "inbox", "callbacks", "admin", "search", "email"]
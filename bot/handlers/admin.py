@@ -0,0 +1,35 @@
+"""Admin-only command handlers."""
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from ..config import ADMIN_IDS, PROFILE_DIR, PROFILE_RUNS
+from ..utils.profiling import profiler, TARGETS
+
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /profile [notifier|handlers] [runs] - profile the next calls."""
+    if update.effective_user.id not in ADMIN_IDS:
+        return
+    
+    args = context.args or []
+    if not args:
+        status = profiler.active or "idle"
+        await update.message.reply_text(
+            f"Profiler: {status}\n\nUsage: /profile <{'|'.join(TARGETS)}> [runs]"
+        )
+        return
+    
+    target = args[0]
+    if target not in TARGETS or (len(args) > 1 and not args[1].isdigit()):
+        await update.message.reply_text(f"Usage: /profile <{'|'.join(TARGETS)}> [runs]")
+        return
+    
+    runs = int(args[1]) if len(args) > 1 else PROFILE_RUNS
+    if not profiler.arm(target, runs):
+        await update.message.reply_text(f"Already profiling: {profiler.active}")
+        return
+    
+    await update.message.reply_text(
+        f"Profiling the next {runs} {target} call(s); the report is written to {PROFILE_DIR}"
+    )
@@ -1,39 +1,87 @@
 """Inline keyboard callback handlers."""
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ChatAction
 from telegram.ext import ContextTypes
 
-from ..services.mailtm import mailtm_service, MailTMError
-from ..database.storage import storage, UserSession
-from ..utils.helpers import generate_username, generate_password, strip_html, format_timestamp
+from ..services.mailtm import MailTMError, MessageSummary
+from ..database.storage import storage
+from ..services.inbox_cache import inbox_cache
+from ..services.lifecycle import record_activity
+from ..services.message_cache import message_cache
+from ..services.providers import provider_registry
+from ..services.reaper import add_session, retire_session
+from ..services.search import index_body
+from ..services.tokens import ensure_fresh_token
+from ..utils.render import INBOX_PAGE_SIZE, render_addresses, render_inbox, render_message_page
+from ..utils.tracing import annotate, traced
 
+# Callback prefixes routed by handle_message_action / handle_address_action
+MESSAGE_ACTIONS = ("read_", "page_", "att_", "delete_", "confirm_delete_")
+ADDRESS_ACTIONS = ("use_", "drop_", "confirm_drop_")
 
+
+@traced("handle_callback", root=True)
 async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle all inline keyboard callbacks."""
     query = update.callback_query
-    await query.answer()
-    
     user_id = update.effective_user.id
     callback_data = query.data
+    annotate(user=user_id, action=callback_data.split("_", 1)[0])
+    
+    await query.answer()
+    await record_activity(user_id)
+    
+    # Any view other than the inbox replaces what the message shows
+    if callback_data != "check_inbox":
+        inbox_cache.forget_view((query.message.chat_id, query.message.message_id))
     
     # Route to appropriate handler
     if callback_data == "copy_email":
         await handle_copy_email(query, user_id)
     elif callback_data == "new_email":
         await handle_new_email(query, user_id)
-    elif callback_data == "check_inbox":
+    elif callback_data in ("check_inbox", "back_to_inbox"):
         await handle_check_inbox(query, user_id)
-    elif callback_data.startswith("read_"):
+    elif callback_data.startswith(MESSAGE_ACTIONS):
+        await handle_message_action(query, context, user_id, callback_data)
+    elif callback_data == "clear_inbox":
+        await handle_clear_inbox(query, user_id)
+    elif callback_data == "confirm_clear_inbox":
+        await handle_confirm_clear_inbox(query, user_id)
+    elif callback_data == "addresses":
+        await handle_addresses(query, user_id)
+    elif callback_data.startswith(ADDRESS_ACTIONS):
+        await handle_address_action(query, user_id, callback_data)
+
+
+async def handle_message_action(query, context: ContextTypes.DEFAULT_TYPE, user_id: int, callback_data: str) -> None:
+    """Route callbacks acting on one message (read, page, attachment, delete)."""
+    if callback_data.startswith("read_"):
         msg_id = callback_data.replace("read_", "")
         await handle_read_message(query, user_id, msg_id)
+    elif callback_data.startswith("page_"):
+        msg_id, _, page = callback_data.replace("page_", "", 1).rpartition("_")
+        await handle_read_message(query, user_id, msg_id, int(page))
+    elif callback_data.startswith("att_"):
+        msg_id, _, index = callback_data.replace("att_", "", 1).rpartition("_")
+        await handle_send_attachment(query, context, user_id, msg_id, int(index))
     elif callback_data.startswith("delete_"):
         msg_id = callback_data.replace("delete_", "")
         await handle_delete_message(query, user_id, msg_id)
     elif callback_data.startswith("confirm_delete_"):
         msg_id = callback_data.replace("confirm_delete_", "")
         await handle_confirm_delete(query, user_id, msg_id)
-    elif callback_data == "back_to_inbox":
-        await handle_check_inbox(query, user_id)
+
+
+async def handle_address_action(query, user_id: int, callback_data: str) -> None:
+    """Route callbacks acting on one of the user's addresses."""
+    if callback_data.startswith("use_"):
+        await handle_use_address(query, user_id, callback_data.replace("use_", "", 1))
+    elif callback_data.startswith("drop_"):
+        await handle_drop_address(query, callback_data.replace("drop_", "", 1))
+    elif callback_data.startswith("confirm_drop_"):
+        await handle_confirm_drop_address(query, user_id, callback_data.replace("confirm_drop_", "", 1))
 
 
 async def handle_copy_email(query, user_id: int) -> None:
@@ -55,29 +103,13 @@ async def handle_new_email(query, user_id: int) -> None:
     await query.edit_message_text("⏳ Creating new email...")
     
     try:
-        # Get available domain
-        domain = await mailtm_service.get_active_domain()
-        
-        # Generate random credentials
-        username = generate_username()
-        password = generate_password()
-        email_address = f"{username}@{domain}"
-        
-        # Create account
-        account = await mailtm_service.create_account(email_address, password)
-        
-        # Get authentication token
-        auth = await mailtm_service.get_token(email_address, password)
+        # Create an account on one of the providers
+        session = await provider_registry.create_session(user_id)
+        email_address = session.email
         
         # Save session to database
-        session = UserSession(
-            telegram_id=user_id,
-            email=email_address,
-            password=password,
-            token=auth["token"],
-            account_id=account["id"]
-        )
-        await storage.save_user(session)
+        await add_session(session)
+        inbox_cache.invalidate(user_id)
         
         # Create response with buttons
         keyboard = InlineKeyboardMarkup([
@@ -86,14 +118,15 @@ async def handle_new_email(query, user_id: int) -> None:
                 InlineKeyboardButton("🔄 New Email", callback_data="new_email")
             ],
             [
-                InlineKeyboardButton("📬 Check Inbox", callback_data="check_inbox")
+                InlineKeyboardButton("📬 Check Inbox", callback_data="check_inbox"),
+                InlineKeyboardButton("📮 Addresses", callback_data="addresses")
             ]
         ])
         
         await query.edit_message_text(
             f"✅ *Your new temporary email is ready\\!*\n\n"
             f"📧 `{email_address}`\n\n"
-            f"💡 _Emails will be forwarded to you automatically\\._",
+            f"💡 _Your other addresses keep receiving mail\\._",
             parse_mode="MarkdownV2",
             reply_markup=keyboard
         )
@@ -110,129 +143,110 @@ async def handle_check_inbox(query, user_id: int) -> None:
         await query.edit_message_text("❌ No email found. Use /new to create one.")
         return
     
-    await query.edit_message_text("⏳ Loading inbox...")
+    key = (query.message.chat_id, query.message.message_id)
     
-    try:
-        messages = await mailtm_service.get_messages(session.token)
-        
-        if not messages:
-            await query.edit_message_text(
-                "📭 *Your inbox is empty*\n\n"
-                "Waiting for emails\\.\\.\\.",
-                parse_mode="MarkdownV2",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("🔄 Refresh", callback_data="check_inbox")]
-                ])
-            )
-            return
-        
-        # Build message list
-        text = f"📬 *Your Inbox* \\({len(messages)} message{'s' if len(messages) != 1 else ''}\\)\n\n"
-        buttons = []
-        
-        for i, msg in enumerate(messages[:10], 1):
-            sender = msg.get("from", {}).get("address", "Unknown")
-            subject = msg.get("subject", "No Subject")
-            time_ago = format_timestamp(msg.get("createdAt", ""))
-            seen = "✓" if msg.get("seen", False) else "•"
-            
-            # Escape special characters
-            def escape_md(s):
-                chars = r'_*[]()~`>#+-=|{}.!'
-                return ''.join(f'\\{c}' if c in chars else c for c in s)
-            
-            text += f"{seen} *{i}\\)* {escape_md(subject[:40])}\n"
-            text += f"   _From: {escape_md(sender)}_\n"
-            text += f"   📅 {escape_md(time_ago)}\n\n"
-            
-            msg_id = msg["id"]
-            buttons.append([
-                InlineKeyboardButton(f"📖 Read #{i}", callback_data=f"read_{msg_id}"),
-                InlineKeyboardButton(f"🗑️ Delete #{i}", callback_data=f"delete_{msg_id}")
-            ])
-        
-        buttons.append([InlineKeyboardButton("🔄 Refresh", callback_data="check_inbox")])
-        
-        await query.edit_message_text(
-            text,
-            parse_mode="MarkdownV2",
-            reply_markup=InlineKeyboardMarkup(buttons)
+    async def fetch() -> tuple[list[MessageSummary], int]:
+        messages, total = await provider_registry.for_session(session).get_recent_messages(
+            await ensure_fresh_token(session), INBOX_PAGE_SIZE
         )
-        
         if messages:
-            await storage.update_last_message(user_id, messages[0]["id"])
+            await storage.update_last_message(user_id, session.account_id, messages[0].id)
+        return messages, total
+    
+    async def show(entry) -> None:
+        text, keyboard = render_inbox(entry.messages, entry.total)
+        await inbox_cache.show_view(key, query.edit_message_text, text, keyboard)
+    
+    entry = inbox_cache.get(user_id)
+    if entry:
+        # Serve from cache, revalidate in the background if stale
+        await show(entry)
+        if not inbox_cache.is_fresh(entry):
+            inbox_cache.refresh(user_id, fetch, show)
+        return
+    
+    try:
+        messages, total = await fetch()
+        inbox_cache.put(user_id, messages, total)
+        await show(inbox_cache.get(user_id))
             
     except MailTMError as e:
         await query.edit_message_text(f"❌ Error: {str(e)}")
 
 
-async def handle_read_message(query, user_id: int, msg_id: str) -> None:
-    """Read a specific message."""
-    session = await storage.get_user(user_id)
+async def handle_read_message(query, user_id: int, msg_id: str, page: int = 0) -> None:
+    """Read a specific message, one page at a time."""
+    # Page flips are served from memory
+    entry = message_cache.get(user_id, msg_id)
+    if entry:
+        await _show_message_page(query, entry, page)
+        return
+    
+    session = await storage.get_account_for_message(user_id, msg_id)
     
     if not session:
         await query.edit_message_text("❌ No email found. Use /new to create one.")
         return
     
     try:
-        message = await mailtm_service.get_message(session.token, msg_id)
-        
-        # Extract message details
-        sender = message.get("from", {}).get("address", "Unknown")
-        subject = message.get("subject", "No Subject")
-        date = format_timestamp(message.get("createdAt", ""))
+        token = await ensure_fresh_token(session)
+        service = provider_registry.for_session(session)
+        message = await service.get_message(token, msg_id)
         
-        # Get text content (prefer text over HTML)
-        content = message.get("text", "")
-        if not content:
-            html_content = message.get("html", [])
-            if html_content:
-                content = strip_html(html_content[0] if isinstance(html_content, list) else html_content)
+        entry = await message_cache.put_message(user_id, message)
+        await _show_message_page(query, entry, page)
+        await index_body(session, entry)
         
-        if not content:
-            content = "(No content)"
-        
-        # Truncate if too long
-        if len(content) > 3000:
-            content = content[:3000] + "..."
-        
-        # Escape for MarkdownV2
-        def escape_md(s):
-            chars = r'_*[]()~`>#+-=|{}.!'
-            return ''.join(f'\\{c}' if c in chars else c for c in str(s))
-        
-        text = (
-            f"📧 *Email Details*\n\n"
-            f"*From:* {escape_md(sender)}\n"
-            f"*Subject:* {escape_md(subject)}\n"
-            f"*Date:* {escape_md(date)}\n\n"
-            f"━━━━━━━━━━━━━━━━\n\n"
-            f"{escape_md(content)}"
-        )
-        
-        # Check for attachments
-        attachments = message.get("attachments", [])
-        if attachments:
-            text += f"\n\n📎 *Attachments:* {len(attachments)} file\\(s\\)"
+        # Mark as read
+        await service.mark_as_read(token, msg_id)
+        inbox_cache.mark_seen(user_id, msg_id)
         
-        keyboard = InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("🗑️ Delete", callback_data=f"delete_{msg_id}"),
-                InlineKeyboardButton("⬅️ Back", callback_data="back_to_inbox")
-            ]
-        ])
+    except MailTMError as e:
+        await query.edit_message_text(f"❌ Error reading message: {str(e)}")
+
+
+async def _show_message_page(query, entry, page: int) -> None:
+    """Edit the message to show one page of a cached email."""
+    page = min(max(page, 0), len(entry.pages) - 1)
+    text, keyboard = render_message_page(entry.message, entry.pages[page], page, len(entry.pages))
+    
+    await query.edit_message_text(
+        text,
+        parse_mode="MarkdownV2",
+        reply_markup=keyboard
+    )
+
+
+async def handle_send_attachment(query, context: ContextTypes.DEFAULT_TYPE, user_id: int, msg_id: str, index: int) -> None:
+    """Send a message attachment as a document."""
+    # Imported on first use to keep startup lean
+    from ..services.attachments import attachment_forwarder, AttachmentTooLargeError
+    
+    session = await storage.get_account_for_message(user_id, msg_id)
+    
+    if not session:
+        await query.edit_message_text("❌ No email found. Use /new to create one.")
+        return
+    
+    try:
+        token = await ensure_fresh_token(session)
+        service = provider_registry.for_session(session)
+        entry = message_cache.get(user_id, msg_id)
+        message = entry.message if entry else await service.get_message(token, msg_id)
+        attachments = message.attachments
+        if index >= len(attachments):
+            await query.message.reply_text("❌ Attachment not found.")
+            return
         
-        await query.edit_message_text(
-            text,
-            parse_mode="MarkdownV2",
-            reply_markup=keyboard
+        await context.bot.send_chat_action(chat_id=query.message.chat_id, action=ChatAction.UPLOAD_DOCUMENT)
+        await attachment_forwarder.send(
+            context.bot, query.message.chat_id, service, token, msg_id, attachments[index]
         )
         
-        # Mark as read
-        await mailtm_service.mark_as_read(session.token, msg_id)
-        
+    except AttachmentTooLargeError as e:
+        await query.message.reply_text(f"❌ {str(e)}")
     except MailTMError as e:
-        await query.edit_message_text(f"❌ Error reading message: {str(e)}")
+        await query.message.reply_text(f"❌ Error downloading attachment: {str(e)}")
 
 
 async def handle_delete_message(query, user_id: int, msg_id: str) -> None:
@@ -254,14 +268,19 @@ async def handle_delete_message(query, user_id: int, msg_id: str) -> None:
 
 async def handle_confirm_delete(query, user_id: int, msg_id: str) -> None:
     """Confirm and delete a message."""
-    session = await storage.get_user(user_id)
+    session = await storage.get_account_for_message(user_id, msg_id)
     
     if not session:
         await query.edit_message_text("❌ No email found. Use /new to create one.")
         return
     
     try:
-        await mailtm_service.delete_message(session.token, msg_id)
+        await provider_registry.for_session(session).delete_message(
+            await ensure_fresh_token(session), msg_id
+        )
+        inbox_cache.remove_message(user_id, msg_id)
+        message_cache.discard(user_id, msg_id)
+        await storage.unindex_messages(user_id, [msg_id])
         
         await query.edit_message_text(
             "✅ *Message deleted successfully\\!*",
@@ -273,3 +292,108 @@ async def handle_confirm_delete(query, user_id: int, msg_id: str) -> None:
         
     except MailTMError as e:
         await query.edit_message_text(f"❌ Error deleting message: {str(e)}")
+
+
+async def handle_clear_inbox(query, user_id: int) -> None:
+    """Confirm clearing the whole inbox."""
+    keyboard = InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("✅ Yes, Clear All", callback_data="confirm_clear_inbox"),
+            InlineKeyboardButton("❌ Cancel", callback_data="back_to_inbox")
+        ]
+    ])
+    
+    await query.edit_message_text(
+        "🧹 *Delete all messages in your inbox?*\n\n"
+        "This action cannot be undone\\.",
+        parse_mode="MarkdownV2",
+        reply_markup=keyboard
+    )
+
+
+async def handle_confirm_clear_inbox(query, user_id: int) -> None:
+    """Delete every message in the inbox."""
+    session = await storage.get_user(user_id)
+    
+    if not session:
+        await query.edit_message_text("❌ No email found. Use /new to create one.")
+        return
+    
+    await query.edit_message_text("⏳ Clearing inbox...")
+    
+    try:
+        token = await ensure_fresh_token(session)
+        service = provider_registry.for_session(session)
+        message_ids = [msg.id async for msg in service.iter_messages(token)]
+        deleted = await service.delete_messages(token, message_ids)
+        
+        inbox_cache.invalidate(user_id)
+        for msg_id in message_ids:
+            message_cache.discard(user_id, msg_id)
+        # Which deletions failed is not known, so a partial clear keeps the index
+        if deleted == len(message_ids):
+            await storage.unindex_account(user_id, session.account_id)
+        
+        failed = len(message_ids) - deleted
+        text = f"✅ *Deleted {deleted} message{'s' if deleted != 1 else ''}\\.*"
+        if failed:
+            text += f"\n\n⚠️ {failed} could not be deleted, try again later\\."
+        
+        await query.edit_message_text(
+            text,
+            parse_mode="MarkdownV2",
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("📬 Back to Inbox", callback_data="check_inbox")]
+            ])
+        )
+        
+    except MailTMError as e:
+        await query.edit_message_text(f"❌ Error clearing inbox: {str(e)}")
+
+
+async def handle_addresses(query, user_id: int) -> None:
+    """List the user's addresses."""
+    text, keyboard = render_addresses(await storage.get_accounts(user_id))
+    await query.edit_message_text(text, parse_mode="MarkdownV2", reply_markup=keyboard)
+
+
+async def handle_use_address(query, user_id: int, account_id: str) -> None:
+    """Make another address the one /inbox shows."""
+    account = await storage.get_account(user_id, account_id)
+    
+    if not account:
+        await query.edit_message_text("❌ Address not found.")
+        return
+    
+    await storage.set_current_account(user_id, account_id)
+    inbox_cache.invalidate(user_id)
+    await handle_addresses(query, user_id)
+
+
+async def handle_drop_address(query, account_id: str) -> None:
+    """Confirm removing an address."""
+    keyboard = InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("✅ Yes, Remove", callback_data=f"confirm_drop_{account_id}"),
+            InlineKeyboardButton("❌ Cancel", callback_data="addresses")
+        ]
+    ])
+    
+    await query.edit_message_text(
+        "🗑️ *Remove this address?*\n\n"
+        "Mail sent to it will no longer reach you\\.",
+        parse_mode="MarkdownV2",
+        reply_markup=keyboard
+    )
+
+
+async def handle_confirm_drop_address(query, user_id: int, account_id: str) -> None:
+    """Remove an address and queue its account for deletion."""
+    account = await storage.get_account(user_id, account_id)
+    
+    if account:
+        await retire_session(account)
+        if account.is_current:
+            inbox_cache.invalidate(user_id)
+    
+    await handle_addresses(query, user_id)
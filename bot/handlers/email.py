@@ -3,9 +3,13 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from ..services.mailtm import mailtm_service, MailTMError
-from ..database.storage import storage, UserSession
-from ..utils.helpers import generate_username, generate_password
+from ..services.mailtm import MailTMError
+from ..services.inbox_cache import inbox_cache
+from ..services.lifecycle import record_activity
+from ..services.providers import provider_registry
+from ..services.reaper import add_session
+from ..database.storage import storage
+from ..utils.render import render_addresses
 
 
 async def new_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -16,29 +20,13 @@ async def new_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     loading_msg = await update.message.reply_text("⏳ Creating your temporary email...")
     
     try:
-        # Get available domain
-        domain = await mailtm_service.get_active_domain()
-        
-        # Generate random credentials
-        username = generate_username()
-        password = generate_password()
-        email_address = f"{username}@{domain}"
-        
-        # Create account
-        account = await mailtm_service.create_account(email_address, password)
-        
-        # Get authentication token
-        auth = await mailtm_service.get_token(email_address, password)
+        # Create an account on one of the providers
+        session = await provider_registry.create_session(user_id)
+        email_address = session.email
         
         # Save session to database
-        session = UserSession(
-            telegram_id=user_id,
-            email=email_address,
-            password=password,
-            token=auth["token"],
-            account_id=account["id"]
-        )
-        await storage.save_user(session)
+        await add_session(session)
+        inbox_cache.invalidate(user_id)
         
         # Create response with buttons
         keyboard = InlineKeyboardMarkup([
@@ -47,14 +35,15 @@ async def new_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
                 InlineKeyboardButton("🔄 New Email", callback_data="new_email")
             ],
             [
-                InlineKeyboardButton("📬 Check Inbox", callback_data="check_inbox")
+                InlineKeyboardButton("📬 Check Inbox", callback_data="check_inbox"),
+                InlineKeyboardButton("📮 Addresses", callback_data="addresses")
             ]
         ])
         
         await loading_msg.edit_text(
             f"✅ *Your temporary email is ready\\!*\n\n"
             f"📧 `{email_address}`\n\n"
-            f"💡 _Emails will be forwarded to you automatically\\._",
+            f"💡 _Your other addresses keep receiving mail\\._",
             parse_mode="MarkdownV2",
             reply_markup=keyboard
         )
@@ -96,3 +85,12 @@ async def mymail_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         parse_mode="MarkdownV2",
         reply_markup=keyboard
     )
+
+
+async def addresses_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle the /addresses command - list, switch and remove addresses."""
+    user_id = update.effective_user.id
+    await record_activity(user_id)
+    
+    text, keyboard = render_addresses(await storage.get_accounts(user_id))
+    await update.message.reply_text(text, parse_mode="MarkdownV2", reply_markup=keyboard)
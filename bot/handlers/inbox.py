@@ -1,26 +1,52 @@
 """Inbox management command handlers."""
 
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from typing import Optional
+
+from telegram import Update
 from telegram.ext import ContextTypes
 
-from ..services.mailtm import mailtm_service, MailTMError, AuthenticationError
+from ..services.mailtm import MailTMError, AuthenticationError, MessageSummary
+from ..services.inbox_cache import inbox_cache
+from ..services.lifecycle import record_activity
+from ..services.providers import provider_registry
+from ..services.tokens import ensure_fresh_token, refresh_token
 from ..database.storage import storage
-from ..utils.helpers import format_timestamp, strip_html, truncate_text
+from ..utils.render import INBOX_PAGE_SIZE, render_inbox
 
 
 async def _refresh_token_if_needed(session):
     """Try to refresh token if authentication fails."""
     try:
-        auth = await mailtm_service.get_token(session.email, session.password)
-        await storage.update_token(session.telegram_id, auth["token"])
-        return auth["token"]
+        return await refresh_token(session)
     except MailTMError:
         return None
 
 
+async def _fetch_inbox(update: Update, session, fetch) -> Optional[tuple[list[MessageSummary], int]]:
+    """Fetch and cache the first inbox page, replying with the error if that fails."""
+    try:
+        messages, total = await fetch()
+    except AuthenticationError:
+        # Try to refresh token
+        new_token = await _refresh_token_if_needed(session)
+        if new_token:
+            await update.message.reply_text("🔄 Session refreshed. Please try again.")
+        else:
+            await update.message.reply_text(
+                "❌ Session expired. Please create a new email with /new"
+            )
+        return None
+    except MailTMError as e:
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+        return None
+    inbox_cache.put(session.telegram_id, messages, total)
+    return messages, total
+
+
 async def inbox_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle the /inbox command - list all emails."""
     user_id = update.effective_user.id
+    await record_activity(user_id)
     
     # Get user session
     session = await storage.get_user(user_id)
@@ -33,73 +59,39 @@ async def inbox_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         )
         return
     
-    loading_msg = await update.message.reply_text("⏳ Loading inbox...")
+    async def fetch() -> tuple[list[MessageSummary], int]:
+        messages, total = await provider_registry.for_session(session).get_recent_messages(
+            await ensure_fresh_token(session), INBOX_PAGE_SIZE
+        )
+        if messages:
+            await storage.update_last_message(user_id, session.account_id, messages[0].id)
+        return messages, total
     
-    try:
-        # Fetch messages
-        messages = await mailtm_service.get_messages(session.token)
-        
-        if not messages:
-            await loading_msg.edit_text(
-                "📭 *Your inbox is empty*\n\n"
-                "Waiting for emails\\.\\.\\.",
-                parse_mode="MarkdownV2",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("🔄 Refresh", callback_data="check_inbox")]
-                ])
-            )
+    entry = inbox_cache.get(user_id)
+    if entry is None:
+        fetched = await _fetch_inbox(update, session, fetch)
+        if fetched is None:
             return
+        messages, total = fetched
+    else:
+        messages, total = entry.messages, entry.total
+    
+    # Render once, straight into the reply
+    text, keyboard = render_inbox(messages, total)
+    sent = await update.message.reply_text(
+        text,
+        parse_mode="MarkdownV2",
+        reply_markup=keyboard
+    )
+    key = (sent.chat_id, sent.message_id)
+    inbox_cache.remember_view(key, text, keyboard)
+    
+    if entry is not None and not inbox_cache.is_fresh(entry):
+        async def show(entry) -> None:
+            text, keyboard = render_inbox(entry.messages, entry.total)
+            await inbox_cache.show_view(key, sent.edit_text, text, keyboard)
         
-        # Build message list
-        text = f"📬 *Your Inbox* \\({len(messages)} message{'s' if len(messages) != 1 else ''}\\)\n\n"
-        buttons = []
-        
-        for i, msg in enumerate(messages[:10], 1):  # Show first 10 messages
-            sender = msg.get("from", {}).get("address", "Unknown")
-            subject = msg.get("subject", "No Subject")
-            time_ago = format_timestamp(msg.get("createdAt", ""))
-            seen = "✓" if msg.get("seen", False) else "•"
-            
-            # Escape for MarkdownV2
-            sender_escaped = sender.replace(".", "\\.").replace("-", "\\-").replace("_", "\\_")
-            subject_escaped = truncate_text(subject, 40).replace(".", "\\.").replace("-", "\\-").replace("_", "\\_").replace("!", "\\!").replace("(", "\\(").replace(")", "\\)")
-            time_escaped = time_ago.replace(".", "\\.")
-            
-            text += f"{seen} *{i}\\)* {subject_escaped}\n"
-            text += f"   _From: {sender_escaped}_\n"
-            text += f"   📅 {time_escaped}\n\n"
-            
-            # Add buttons for each message
-            msg_id = msg["id"]
-            buttons.append([
-                InlineKeyboardButton(f"📖 Read #{i}", callback_data=f"read_{msg_id}"),
-                InlineKeyboardButton(f"🗑️ Delete #{i}", callback_data=f"delete_{msg_id}")
-            ])
-        
-        # Add refresh button
-        buttons.append([InlineKeyboardButton("🔄 Refresh", callback_data="check_inbox")])
-        
-        await loading_msg.edit_text(
-            text,
-            parse_mode="MarkdownV2",
-            reply_markup=InlineKeyboardMarkup(buttons)
-        )
-        
-        # Update last message ID
-        if messages:
-            await storage.update_last_message(user_id, messages[0]["id"])
-            
-    except AuthenticationError:
-        # Try to refresh token
-        new_token = await _refresh_token_if_needed(session)
-        if new_token:
-            await loading_msg.edit_text("🔄 Session refreshed. Please try again.")
-        else:
-            await loading_msg.edit_text(
-                "❌ Session expired. Please create a new email with /new"
-            )
-    except MailTMError as e:
-        await loading_msg.edit_text(f"❌ Error: {str(e)}")
+        inbox_cache.refresh(user_id, fetch, show)
 
 
 async def refresh_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -0,0 +1,51 @@
+"""Search command and inline-query handlers."""
+
+from telegram import InlineQueryResultArticle, InputTextMessageContent, Update
+from telegram.ext import ContextTypes
+
+from ..services.lifecycle import record_activity
+from ..services.search import search
+from ..utils.helpers import truncate_text
+from ..utils.render import SEARCH_RESULTS_LIMIT, SEARCH_USAGE, render_search_results
+from ..utils.tracing import annotate, traced
+
+# Seconds Telegram may cache inline results (per user, see is_personal)
+INLINE_CACHE_TIME = 10
+
+
+@traced("search_command", root=True)
+async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /search <words> - search received emails locally."""
+    user_id = update.effective_user.id
+    annotate(user=user_id)
+    await record_activity(user_id)
+
+    text = " ".join(context.args or [])
+    if not text.strip():
+        await update.message.reply_text(SEARCH_USAGE, parse_mode="MarkdownV2")
+        return
+
+    hits = await search(user_id, text, SEARCH_RESULTS_LIMIT)
+    reply, keyboard = render_search_results(text, hits)
+    await update.message.reply_text(reply, parse_mode="MarkdownV2", reply_markup=keyboard)
+
+
+@traced("inline_search", root=True)
+async def inline_search(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Answer inline queries (@bot words) with matching emails."""
+    query = update.inline_query
+    annotate(user=query.from_user.id)
+
+    hits = await search(query.from_user.id, query.query, SEARCH_RESULTS_LIMIT) if query.query.strip() else []
+    results = [
+        InlineQueryResultArticle(
+            id=hit.msg_id[:64],
+            title=truncate_text(hit.subject or "(No subject)", 60),
+            description=f"{hit.sender}: {' '.join(hit.snippet.split())}",
+            input_message_content=InputTextMessageContent(
+                f"📧 {hit.subject}\nFrom: {hit.sender}\n\n{' '.join(hit.snippet.split())}"
+            )
+        )
+        for hit in hits
+    ]
+    await query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=True)
@@ -2,12 +2,17 @@
 
 import base64
 import logging
+from urllib.parse import quote
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
 from telegram.ext import ContextTypes
 
-from ..services.mailtm import mailtm_service, MailTMError
+from ..config import WEBAPP_API_URL
+from ..services.mailtm import MailTMError
+from ..services.lifecycle import record_activity
+from ..services.providers import provider_registry
+from ..services.reaper import add_session
 from ..database.storage import storage, UserSession
-from ..utils.helpers import generate_username, generate_password
+from ..utils.tracing import annotate, traced
 
 logger = logging.getLogger(__name__)
 
@@ -18,41 +23,25 @@ MINI_APP_URL = "https://mohdakil2426.github.io/TempHiveBot"
 def get_mini_app_url(email: str, password: str, page: str = "inbox") -> str:
     """Generate Mini App URL with auth credentials."""
     credentials = base64.urlsafe_b64encode(f"{email}:{password}".encode()).decode()
-    return f"{MINI_APP_URL}/?auth={credentials}&page={page}"
+    url = f"{MINI_APP_URL}/?auth={credentials}&page={page}"
+    if WEBAPP_API_URL:
+        # The Mini App then reads the inbox from the bot instead of Mail.tm
+        url += f"&api={quote(WEBAPP_API_URL, safe='')}"
+    return url
 
 
 async def create_new_email(user_id: int) -> UserSession:
     """Create a new email account and return the session."""
-    # Get available domain
-    domain = await mailtm_service.get_active_domain()
-    
-    # Generate random credentials
-    username = generate_username()
-    password = generate_password()
-    email_address = f"{username}@{domain}"
-    
-    # Create account
-    account = await mailtm_service.create_account(email_address, password)
-    
-    # Get authentication token
-    auth = await mailtm_service.get_token(email_address, password)
-    
-    # Create session
-    session = UserSession(
-        telegram_id=user_id,
-        email=email_address,
-        password=password,
-        token=auth["token"],
-        account_id=account["id"]
-    )
-    
-    return session
+    return await provider_registry.create_session(user_id)
 
 
+@traced("start_command", root=True)
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle the /start command - Auto-generate email and show app launcher."""
     user_id = update.effective_user.id
+    annotate(user=user_id)
     logger.info(f"Start command from user {user_id}")
+    await record_activity(user_id)
     
     # Check for Sync Start Parameter
     if context.args and context.args[0].startswith("SYNC_"):
@@ -72,13 +61,12 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
             decoded = base64.b64decode(payload).decode()
             email, password = decoded.split(":")
             
-            # Verify and get token
-            auth = await mailtm_service.get_token(email, password)
-            token = auth["token"]
+            # Verify and get token from the provider hosting the account
+            service, token = await provider_registry.login(email, password)
             
             # Get Account ID
-            account_info = await mailtm_service.get_account(token)
-            account_id = account_info["id"] or "unknown"
+            account_info = await service.get_account(token)
+            account_id = account_info.id or "unknown"
 
             # Update Session
             session = UserSession(
@@ -86,9 +74,10 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
                 email=email,
                 password=password,
                 token=token,
-                account_id=account_id
+                account_id=account_id,
+                provider=service.base_url
             )
-            await storage.save_user(session)
+            await add_session(session)
             
             # Simple sync success message
             await update.message.reply_text(
@@ -110,7 +99,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         # Create new email for first-time user
         try:
             session = await create_new_email(user_id)
-            await storage.save_user(session)
+            await storage.save_account(session)
         except Exception as e:
             logger.error(f"Error creating email: {e}")
             await update.message.reply_text("❌ Service temporarily unavailable.")
@@ -138,5 +127,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 • Tap **Open TempMail** to manage your emails.
 • All features (generation, inbox, reading) are inside the Mini App.
 • The bot will notify you when new emails arrive.
+• /search <words> finds emails you received, instantly.
+• /addresses lists your addresses; all of them keep receiving mail.
     """
     await update.message.reply_text(help_text, parse_mode="Markdown")
@@ -1,13 +1,40 @@
 """TempMail Telegram Bot - Entry Point."""
 
+import asyncio
+import hashlib
+import json
 import logging
+import signal
 from telegram import BotCommand
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
+from telegram.ext import (
+    Application, CallbackQueryHandler, CommandHandler, InlineQueryHandler, MessageHandler, filters
+)
 
-from .config import BOT_TOKEN, POLL_INTERVAL
-from .handlers import start
+from .config import (
+    BOT_TOKEN,
+    LIFECYCLE_INTERVAL,
+    METRICS_HOST,
+    METRICS_PORT,
+    POLL_INTERVAL,
+    POLL_TICK,
+    PROFILE_RUNS,
+    REAPER_INTERVAL,
+    SLOW_CALLBACK_THRESHOLD,
+    TOKEN_REFRESH_INTERVAL,
+    WEBAPP_HOST,
+    WEBAPP_PORT,
+)
+from .handlers import start, inbox, callbacks, admin, search, email
 from .services.notifier import check_new_emails
+from .services.lifecycle import expire_sessions
+from .services.providers import provider_registry
+from .services.reaper import reap_retired_accounts
+from .services.scheduler import poll_scheduler
+from .services.tokens import refresh_expiring_tokens
 from .database.storage import storage
+from .utils.metrics import InstrumentedHTTPXRequest, start_metrics_server
+from .utils.profiling import LoopMonitor, profiler
+from .web.api import start_webapp_server
 
 # Configure logging
 logging.basicConfig(
@@ -16,6 +43,41 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Traces are JSON lines; keep them free of the text log prefix
+_trace_handler = logging.StreamHandler()
+_trace_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.getLogger("bot.trace").addHandler(_trace_handler)
+logging.getLogger("bot.trace").propagate = False
+
+# Bot menu commands: (command, description)
+BOT_COMMANDS = (
+    ("start", "Generate new email address, show inbox"),
+    ("inbox", "Show your inbox"),
+    ("search", "Search your emails"),
+    ("addresses", "Switch between your addresses"),
+    ("help", "Show help information"),
+)
+
+
+async def set_commands(application: Application) -> bool:
+    """
+    Set the bot menu commands unless this bot already has this list.
+    
+    A hash of the bot ID and the command list is stored after each
+    successful call, so restarts skip the Telegram round-trip.
+    
+    Returns:
+        True if the commands were sent to Telegram.
+    """
+    digest = hashlib.sha256(
+        json.dumps([application.bot.id, BOT_COMMANDS]).encode()
+    ).hexdigest()
+    if await storage.get_meta("bot_commands") == digest:
+        return False
+    await application.bot.set_my_commands([BotCommand(*c) for c in BOT_COMMANDS])
+    await storage.set_meta("bot_commands", digest)
+    return True
+
 
 async def post_init(application: Application) -> None:
     """Initialize database and set bot commands after application starts."""
@@ -23,13 +85,51 @@ async def post_init(application: Application) -> None:
     await storage.init_db()
     logger.info("Database initialized")
     
-    # Set bot menu commands
-    commands = [
-        BotCommand("start", "Generate new email address, show inbox"),
-        BotCommand("help", "Show help information"),
-    ]
-    await application.bot.set_my_commands(commands)
-    logger.info("Bot commands set")
+    # Resume the poll schedule of the previous run, spreading overdue users
+    await poll_scheduler.resume()
+    
+    # Open the Mail.tm HTTP clients so the first requests reuse a warm pool
+    await provider_registry.open()
+    
+    # Expose metrics on a local port
+    application.bot_data["metrics_server"] = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+    
+    # Serve the Mini App and its inbox API (answered from the bot's cache)
+    application.bot_data["webapp_server"] = await start_webapp_server(WEBAPP_HOST, WEBAPP_PORT)
+    
+    # Log event-loop stalls; SIGUSR1 profiles the next notifier cycles
+    if SLOW_CALLBACK_THRESHOLD > 0:
+        monitor = LoopMonitor(SLOW_CALLBACK_THRESHOLD)
+        monitor.start()
+        application.bot_data["loop_monitor"] = monitor
+    if hasattr(signal, "SIGUSR1"):
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGUSR1, profiler.arm, "notifier", PROFILE_RUNS
+        )
+    
+    # Set bot menu commands (skipped when unchanged since the last start)
+    if await set_commands(application):
+        logger.info("Bot commands set")
+
+
+async def post_shutdown(application: Application) -> None:
+    """Persist the poll schedule and release network resources once stopped."""
+    # Application.stop() has waited for the running notifier job, which
+    # flushes its own results; this catches anything still buffered
+    await poll_scheduler.flush()
+    
+    monitor = application.bot_data.get("loop_monitor")
+    if monitor:
+        monitor.stop()
+    metrics_server = application.bot_data.get("metrics_server")
+    if metrics_server:
+        metrics_server.close()
+    webapp_server = application.bot_data.get("webapp_server")
+    if webapp_server:
+        webapp_server.close()
+    await provider_registry.close()
+    logger.info("Mail.tm clients closed")
+    await storage.close()
 
 
 def main():
@@ -39,18 +139,57 @@ def main():
         return
     
     # Build application
-    application = Application.builder().token(BOT_TOKEN).post_init(post_init).build()
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .request(InstrumentedHTTPXRequest(connection_pool_size=256))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
     # Register command handlers
-    application.add_handler(CommandHandler("start", start.start_command))
+    application.add_handler(CommandHandler("start", profiler.wrap("handlers", start.start_command)))
     application.add_handler(CommandHandler("help", start.help_command))
+    application.add_handler(CommandHandler("inbox", profiler.wrap("handlers", inbox.inbox_command)))
+    application.add_handler(CommandHandler("search", profiler.wrap("handlers", search.search_command)))
+    application.add_handler(CommandHandler("addresses", profiler.wrap("handlers", email.addresses_command)))
+    application.add_handler(CommandHandler("profile", admin.profile_command))
+    
+    # Register inline keyboard handler (notification and inbox buttons)
+    application.add_handler(CallbackQueryHandler(profiler.wrap("handlers", callbacks.handle_callback)))
     
-    # Set up background job for checking new emails
+    # Inline mode (@bot words) searches the user's emails
+    application.add_handler(InlineQueryHandler(profiler.wrap("handlers", search.inline_search)))
+    
+    # Set up background job for checking new emails; each run polls the
+    # users that are due, so polls stay spread over POLL_INTERVAL
     job_queue = application.job_queue
     job_queue.run_repeating(
-        check_new_emails,
-        interval=POLL_INTERVAL,
-        first=10  # Start checking 10 seconds after bot starts
+        profiler.wrap("notifier", check_new_emails),
+        interval=POLL_TICK,
+        first=POLL_TICK
+    )
+    
+    # Renew tokens shortly before they expire
+    job_queue.run_repeating(
+        refresh_expiring_tokens,
+        interval=TOKEN_REFRESH_INTERVAL,
+        first=TOKEN_REFRESH_INTERVAL
+    )
+    
+    # Delete replaced Mail.tm accounts in the background
+    job_queue.run_repeating(
+        reap_retired_accounts,
+        interval=REAPER_INTERVAL,
+        first=REAPER_INTERVAL
+    )
+    
+    # Demote idle users and expire abandoned sessions
+    job_queue.run_repeating(
+        expire_sessions,
+        interval=LIFECYCLE_INTERVAL,
+        first=60
     )
     
     logger.info("Starting TempMail Bot...")
@@ -0,0 +1,221 @@
+"""Attachment forwarding from Mail.tm to Telegram."""
+
+import asyncio
+import hashlib
+import logging
+import os
+import stat
+import tempfile
+import threading
+from pathlib import Path
+
+from telegram import Bot, InputFile
+
+from ..config import (
+    ATTACHMENT_CACHE_DIR,
+    ATTACHMENT_CACHE_MAX_BYTES,
+    ATTACHMENT_CONCURRENCY,
+    ATTACHMENT_MAX_BYTES,
+)
+from ..database.storage import storage, CachedAttachment
+from .mailtm import MailTMService, Attachment
+
+logger = logging.getLogger(__name__)
+
+
+class AttachmentTooLargeError(Exception):
+    """Attachment exceeds the configured size cap."""
+    pass
+
+
+class AttachmentForwarder:
+    """
+    Streams attachments from Mail.tm to disk and uploads them to Telegram.
+
+    Downloads are written to a content-addressed cache (files named by
+    SHA-256), so an attachment is fetched from Mail.tm once. The Telegram
+    file ID of every upload is recorded, so re-sending the same content
+    is a single API call with no upload.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = ATTACHMENT_CACHE_DIR,
+        max_bytes: int = ATTACHMENT_MAX_BYTES,
+        cache_max_bytes: int = ATTACHMENT_CACHE_MAX_BYTES,
+        concurrency: int = ATTACHMENT_CONCURRENCY
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.cache_max_bytes = cache_max_bytes
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._prune_lock = asyncio.Lock()
+        # Files about to be opened for upload (sha256 -> count); pruning
+        # skips them. Guarded by a thread lock since pruning runs in a thread
+        self._pinned: dict[str, int] = {}
+        self._pin_lock = threading.Lock()
+
+    async def send(
+        self,
+        bot: Bot,
+        chat_id: int,
+        service: MailTMService,
+        token: str,
+        msg_id: str,
+        attachment: Attachment
+    ) -> None:
+        """
+        Forward one attachment to a Telegram chat.
+
+        Args:
+            bot: Telegram bot
+            chat_id: Target chat
+            service: Provider hosting the mailbox
+            token: JWT authentication token of the mailbox
+            msg_id: Message ID the attachment belongs to
+            attachment: Attachment of the message
+
+        Raises:
+            AttachmentTooLargeError: If the attachment exceeds the size cap
+            MailTMError: If the download fails
+        """
+        if attachment.size > self.max_bytes:
+            raise AttachmentTooLargeError(f"Attachment exceeds {self.max_bytes // (1024 * 1024)} MB")
+
+        key = f"{msg_id}/{attachment.id}"
+        filename = attachment.filename or attachment.id
+
+        async with self._semaphore:
+            cached = await self._cached(key, service, token, attachment.download_url)
+            try:
+                if cached.file_id:
+                    await bot.send_document(chat_id=chat_id, document=cached.file_id, filename=filename)
+                    return
+                f = open(self.cache_dir / cached.sha256, "rb")
+            finally:
+                # An open file stays readable even if it is evicted meanwhile
+                self._unpin(cached.sha256)
+            # Streamed from disk during the upload instead of read into memory
+            with f:
+                document = InputFile(f, filename=filename, read_file_handle=False)
+                sent = await bot.send_document(chat_id=chat_id, document=document)
+            if sent.document:
+                await storage.set_attachment_file_id(cached.sha256, sent.document.file_id)
+
+    async def _cached(
+        self,
+        key: str,
+        service: MailTMService,
+        token: str,
+        download_url: str
+    ) -> CachedAttachment:
+        """
+        The cache record of an attachment, downloading the file if it is missing.
+
+        The file is returned pinned; the caller must ``_unpin`` it.
+        """
+        cached = await storage.get_attachment(key)
+        if cached is not None and self._pin(cached.sha256, check=True):
+            return cached
+
+        sha256, size = await self._download(service, token, download_url)
+        try:
+            cached = CachedAttachment(
+                key=key,
+                sha256=sha256,
+                size=size,
+                file_id=await storage.get_attachment_file_id(sha256)
+            )
+            await storage.save_attachment(cached)
+        except BaseException:
+            self._unpin(sha256)
+            raise
+        return cached
+
+    def _pin(self, sha256: str, check: bool = False) -> bool:
+        """
+        Protect a cached file from eviction.
+
+        Args:
+            sha256: Cached file
+            check: Only pin the file if it exists
+
+        Returns:
+            False if ``check`` was set and the file is gone.
+        """
+        with self._pin_lock:
+            if check and not (self.cache_dir / sha256).exists():
+                return False
+            self._pinned[sha256] = self._pinned.get(sha256, 0) + 1
+            return True
+
+    def _unpin(self, sha256: str) -> None:
+        with self._pin_lock:
+            self._pinned[sha256] -= 1
+            if not self._pinned[sha256]:
+                del self._pinned[sha256]
+
+    async def _download(self, service: MailTMService, token: str, download_url: str) -> tuple[str, int]:
+        """Stream an attachment into the cache, returning (sha256, size)."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async with service.stream_attachment(token, download_url) as response:
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            raise AttachmentTooLargeError(
+                                f"Attachment exceeds {self.max_bytes // (1024 * 1024)} MB"
+                            )
+                        digest.update(chunk)
+                        f.write(chunk)
+
+            sha256 = digest.hexdigest()
+            # Pinned as it appears, so no prune can remove it before the upload
+            with self._pin_lock:
+                os.replace(tmp_path, self.cache_dir / sha256)
+                self._pinned[sha256] = self._pinned.get(sha256, 0) + 1
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        try:
+            # One prune at a time, off the event loop
+            async with self._prune_lock:
+                await asyncio.to_thread(self._prune)
+        except BaseException:
+            self._unpin(sha256)
+            raise
+        return sha256, size
+
+    def _prune(self) -> None:
+        """Evict least recently written files while the cache is over its cap; pinned files stay."""
+        files = []
+        for path in self.cache_dir.iterdir():
+            if path.suffix == ".part":
+                continue
+            try:
+                info = path.stat()
+            except FileNotFoundError:
+                continue
+            if stat.S_ISREG(info.st_mode):
+                files.append((info.st_mtime, info.st_size, path))
+        total = sum(size for _, size, _ in files)
+
+        for _, size, path in sorted(files):
+            if total <= self.cache_max_bytes:
+                break
+            with self._pin_lock:
+                if path.name in self._pinned:
+                    continue
+                path.unlink(missing_ok=True)
+            total -= size
+            logger.info(f"Evicted cached attachment {path.name}")
+
+
+# Global forwarder instance
+attachment_forwarder = AttachmentForwarder()
@@ -0,0 +1,258 @@
+"""Per-user inbox summary cache with stale-while-revalidate refresh."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from telegram import InlineKeyboardMarkup
+
+from ..config import INBOX_CACHE_MAX_USERS, INBOX_CACHE_TTL
+from .mailtm import MessageSummary
+
+logger = logging.getLogger(__name__)
+
+# Max number of rendered views remembered for edit de-duplication
+MAX_TRACKED_VIEWS = 10000
+
+
+def _view_digest(text: str, reply_markup: Optional[InlineKeyboardMarkup]) -> int:
+    """Hash a rendered view (text and keyboard)."""
+    return hash((text, reply_markup.to_json() if reply_markup else None))
+
+
+def _inbox_digest(messages: list[MessageSummary], total: int) -> int:
+    """Hash what a client shows of an inbox (messages, read flags, total)."""
+    return hash((total, tuple((m.id, m.seen) for m in messages)))
+
+
+@dataclass
+class InboxEntry:
+    """Cached inbox summary for a user."""
+    messages: list[MessageSummary]
+    total: int
+    fetched_at: float
+
+
+class InboxCache:
+    """
+    In-memory inbox summaries, filled by the notifier's polls.
+
+    Views are rendered straight from the cache and refreshed in the
+    background when the entry is older than the TTL. Each change to a
+    user's inbox bumps its version, which long-polling clients wait on.
+    Inboxes and versions of at most ``max_users`` users are kept, the
+    least recently used are dropped first.
+    """
+
+    def __init__(self, ttl: float = INBOX_CACHE_TTL, max_users: int = INBOX_CACHE_MAX_USERS):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._entries: OrderedDict[int, InboxEntry] = OrderedDict()
+        self._views: OrderedDict[tuple[int, int], int] = OrderedDict()
+        self._refreshing: dict[int, asyncio.Task] = {}
+        self._versions: OrderedDict[int, int] = OrderedDict()
+        # Versions start at the boot time in ms, so they differ across restarts
+        self._clock = time.time_ns() // 1_000_000
+        self._changed: dict[int, asyncio.Event] = {}
+        self._listeners: dict[int, int] = {}
+
+    # ==================== Inbox Entries ====================
+
+    def get(self, user_id: int) -> Optional[InboxEntry]:
+        """Get the cached inbox for a user, fresh or stale."""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            self._entries.move_to_end(user_id)
+        return entry
+
+    def put(self, user_id: int, messages: list[MessageSummary], total: int) -> None:
+        """
+        Store the latest inbox summary for a user.
+        
+        Args:
+            user_id: Telegram user ID
+            messages: Newest message summaries
+            total: Total number of messages in the inbox
+        """
+        old = self._entries.pop(user_id, None)
+        self._entries[user_id] = InboxEntry(
+            messages=messages, total=total, fetched_at=time.monotonic()
+        )
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+        if old is None or _inbox_digest(old.messages, old.total) != _inbox_digest(messages, total):
+            self._bump(user_id)
+
+    def is_fresh(self, entry: InboxEntry) -> bool:
+        """Check whether an entry is younger than the TTL."""
+        return time.monotonic() - entry.fetched_at < self.ttl
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop the cached inbox for a user."""
+        if self._entries.pop(user_id, None) is not None:
+            self._bump(user_id)
+
+    def remove_message(self, user_id: int, msg_id: str) -> None:
+        """Remove a deleted message from the cached inbox."""
+        entry = self._entries.get(user_id)
+        if entry:
+            remaining = [m for m in entry.messages if m.id != msg_id]
+            if len(remaining) < len(entry.messages):
+                entry.total -= len(entry.messages) - len(remaining)
+                entry.messages = remaining
+                self._bump(user_id)
+
+    def mark_seen(self, user_id: int, msg_id: str) -> None:
+        """Flag a cached message as read."""
+        entry = self._entries.get(user_id)
+        if entry:
+            for msg in entry.messages:
+                if msg.id == msg_id:
+                    if not msg.seen:
+                        msg.seen = True
+                        self._bump(user_id)
+                    break
+
+    def forget(self, user_id: int) -> None:
+        """Drop everything kept for a user whose session is gone."""
+        self._entries.pop(user_id, None)
+        self._versions.pop(user_id, None)
+        # Waiting clients see the version change and find no session
+        event = self._changed.pop(user_id, None)
+        if event:
+            event.set()
+
+    # ==================== Change Notification ====================
+
+    def version(self, user_id: int) -> int:
+        """Version of a user's inbox; changes whenever its content does."""
+        return self._versions.get(user_id, 0)
+
+    async def wait_for_change(self, user_id: int, version: int, timeout: float) -> bool:
+        """
+        Wait until a user's inbox differs from a known version.
+
+        Args:
+            user_id: Telegram user ID
+            version: Version the caller has seen
+            timeout: Seconds to wait at most
+
+        Returns:
+            True if the inbox changed, False on timeout.
+        """
+        if self.version(user_id) != version:
+            return True
+        event = self._changed.setdefault(user_id, asyncio.Event())
+        self._listeners[user_id] = self._listeners.get(user_id, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._listeners[user_id] -= 1
+            if not self._listeners[user_id]:
+                del self._listeners[user_id]
+                if self._changed.get(user_id) is event:
+                    del self._changed[user_id]
+
+    def _bump(self, user_id: int) -> None:
+        """Give a user's inbox a new version and wake its waiters."""
+        self._clock += 1
+        self._versions.pop(user_id, None)
+        self._versions[user_id] = self._clock
+        # A dropped version reads as 0, so clients holding it just reload
+        while len(self._versions) > self.max_users:
+            self._versions.popitem(last=False)
+        event = self._changed.pop(user_id, None)
+        if event:
+            event.set()
+
+    # ==================== Background Refresh ====================
+
+    def refresh(
+        self,
+        user_id: int,
+        fetch: Callable[[], Awaitable[tuple[list[MessageSummary], int]]],
+        on_update: Callable[[InboxEntry], Awaitable[None]]
+    ) -> None:
+        """
+        Refresh a user's inbox in the background.
+
+        Only one refresh per user runs at a time; concurrent requests
+        are dropped.
+
+        Args:
+            user_id: Telegram user ID
+            fetch: Coroutine factory returning (messages, total)
+            on_update: Called with the new entry once cached
+        """
+        if user_id in self._refreshing:
+            return
+
+        async def _run():
+            try:
+                messages, total = await fetch()
+                self.put(user_id, messages, total)
+                await on_update(self._entries[user_id])
+            except Exception as e:
+                logger.warning(f"Background inbox refresh failed for user {user_id}: {e}")
+            finally:
+                self._refreshing.pop(user_id, None)
+
+        self._refreshing[user_id] = asyncio.create_task(_run())
+
+    # ==================== Rendered Views ====================
+
+    async def show_view(
+        self,
+        key: tuple[int, int],
+        edit: Callable[..., Awaitable],
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None
+    ) -> bool:
+        """
+        Edit a message to show a view, skipping the call if unchanged.
+
+        Args:
+            key: (chat_id, message_id) of the message being edited
+            edit: Bound edit coroutine (e.g. ``query.edit_message_text``)
+            text: MarkdownV2 text
+            reply_markup: Inline keyboard
+
+        Returns:
+            True if the message was edited.
+        """
+        digest = _view_digest(text, reply_markup)
+        if self._views.get(key) == digest:
+            return False
+
+        await edit(text, parse_mode="MarkdownV2", reply_markup=reply_markup)
+        self._remember(key, digest)
+        return True
+
+    def remember_view(
+        self,
+        key: tuple[int, int],
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None
+    ) -> None:
+        """Record the view shown in a freshly sent message."""
+        self._remember(key, _view_digest(text, reply_markup))
+
+    def _remember(self, key: tuple[int, int], digest: int) -> None:
+        self._views[key] = digest
+        self._views.move_to_end(key)
+        while len(self._views) > MAX_TRACKED_VIEWS:
+            self._views.popitem(last=False)
+
+    def forget_view(self, key: tuple[int, int]) -> None:
+        """Forget a message's view after it is edited to something else."""
+        self._views.pop(key, None)
+
+
+# Global cache instance
+inbox_cache = InboxCache()
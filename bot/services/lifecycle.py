@@ -0,0 +1,84 @@
+"""Session lifecycle: activity tracking, idle demotion and expiry."""
+
+import logging
+import time
+from itertools import islice
+from telegram.ext import ContextTypes
+
+from ..config import EXPIRE_AFTER, IDLE_AFTER, IDLE_POLL_EVERY, LIFECYCLE_BATCH, POLL_INTERVAL
+from ..database.storage import storage, UserSession
+from .inbox_cache import inbox_cache
+
+logger = logging.getLogger(__name__)
+
+STATUS_ACTIVE = "active"
+STATUS_IDLE = "idle"
+STATUS_BLOCKED = "blocked"
+
+# Activity is written at most once per this many seconds per user
+_TOUCH_INTERVAL = 60
+_last_touch: dict[int, float] = {}
+
+
+async def record_activity(telegram_id: int) -> None:
+    """Note that a user interacted with the bot."""
+    now = time.monotonic()
+    if now - _last_touch.get(telegram_id, float("-inf")) < _TOUCH_INTERVAL:
+        return
+    # Kept in touch order, so entries past the interval are at the front
+    _last_touch.pop(telegram_id, None)
+    _last_touch[telegram_id] = now
+    for user_id, touched in list(islice(_last_touch.items(), 8)):
+        if now - touched < _TOUCH_INTERVAL:
+            break
+        del _last_touch[user_id]
+    await storage.touch_user(telegram_id)
+
+
+async def mark_blocked(telegram_id: int) -> None:
+    """Flag a user who blocked the bot; the session expires on the next run."""
+    logger.info(f"User {telegram_id} blocked the bot")
+    await storage.set_user_status(telegram_id, STATUS_BLOCKED)
+
+
+def poll_interval(user: UserSession) -> int:
+    """
+    Seconds between new-mail checks for one address of a user.
+
+    Idle users are polled ``IDLE_POLL_EVERY`` times less often than active
+    ones; blocked users are not polled at all. The current address is
+    polled every interval and the others take turns, so a user costs at
+    most two polls per interval however many addresses they keep.
+    """
+    interval = POLL_INTERVAL * IDLE_POLL_EVERY if user.status == STATUS_IDLE else POLL_INTERVAL
+    if user.is_current:
+        return interval
+    return interval * max(user.account_count - 1, 1)
+
+
+async def expire_sessions(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Background job demoting idle users and expiring abandoned sessions.
+
+    Expired users are removed and all their Mail.tm accounts queued for
+    the reaper, which deletes them in rate-limited batches.
+    """
+    now = int(time.time())
+    try:
+        demoted = await storage.mark_idle_users(now - IDLE_AFTER)
+        if demoted:
+            logger.info(f"Demoted {demoted} idle user(s) to slow polling")
+
+        expired = await storage.get_expired_users(now - EXPIRE_AFTER, LIFECYCLE_BATCH)
+        for telegram_id in expired:
+            for account in await storage.get_accounts(telegram_id):
+                await storage.retire_account(account)
+            await storage.delete_user(telegram_id)
+            inbox_cache.forget(telegram_id)
+            _last_touch.pop(telegram_id, None)
+
+        if expired:
+            logger.info(f"Expired {len(expired)} session(s)")
+
+    except Exception as e:
+        logger.error(f"Error in session lifecycle job: {e}")
@@ -1,9 +1,58 @@
 """Mail.tm API async wrapper service."""
 
 import asyncio
+import importlib.util
+import json
+import logging
+import time
 import httpx
-from typing import Optional
-from ..config import MAILTM_API_BASE
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from ..config import (
+    MAILTM_API_BASE,
+    MAILTM_CONNECT_TIMEOUT,
+    MAILTM_HTTP2,
+    MAILTM_KEEPALIVE_EXPIRY,
+    MAILTM_MAX_CONNECTIONS,
+    MAILTM_MAX_KEEPALIVE,
+    MAILTM_POOL_TIMEOUT,
+    MAILTM_RATE_LIMIT,
+    MAILTM_READ_TIMEOUT,
+    PROVIDER_COOLDOWN,
+    PROVIDER_MIN_HEALTH,
+    PURGE_CONCURRENCY,
+)
+from ..utils.metrics import Counter, Histogram
+from ..utils.ratelimit import AsyncRateLimiter
+from ..utils.tracing import annotate, traced
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover - optional speedup
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+MAILTM_REQUESTS = Counter(
+    "mailtm_requests_total", "Mail.tm API requests", ("provider", "method", "endpoint", "status")
+)
+MAILTM_SECONDS = Histogram(
+    "mailtm_request_seconds", "Mail.tm API request latency", ("method", "endpoint")
+)
+MAILTM_RATE_LIMITED = Counter(
+    "mailtm_rate_limited_total", "Mail.tm 429 responses", ("provider",)
+)
+MAILTM_LIMITER_WAIT = Histogram(
+    "mailtm_limiter_wait_seconds", "Time spent waiting for the client-side rate limiter"
+)
+
+
+def _endpoint_template(endpoint: str) -> str:
+    """Collapse IDs and query strings, e.g. ``/messages/{id}``."""
+    path = endpoint.split("?", 1)[0]
+    return "/".join(part if part.isalpha() or not part else "{id}" for part in path.split("/"))
 
 
 class MailTMError(Exception):
@@ -26,27 +75,279 @@ class NotFoundError(MailTMError):
     pass
 
 
+# ==================== Response Models ====================
+
+class Domain:
+    """Email domain offered by Mail.tm."""
+    __slots__ = ("id", "domain", "is_active")
+    
+    def __init__(self, id: str, domain: str, is_active: bool):
+        self.id = id
+        self.domain = domain
+        self.is_active = is_active
+    
+    @classmethod
+    def from_json(cls, data: dict) -> "Domain":
+        """Parse from API JSON."""
+        return cls(data.get("id", ""), data["domain"], data.get("isActive", False))
+
+
+class Account:
+    """Mail.tm account."""
+    __slots__ = ("id", "address")
+    
+    def __init__(self, id: str, address: str):
+        self.id = id
+        self.address = address
+    
+    @classmethod
+    def from_json(cls, data: dict) -> "Account":
+        """Parse from API JSON."""
+        return cls(data["id"], data.get("address", ""))
+
+
+class Attachment:
+    """Attachment metadata of a message."""
+    __slots__ = ("id", "filename", "content_type", "size", "download_url")
+    
+    def __init__(self, id: str, filename: str, content_type: str, size: int, download_url: str):
+        self.id = id
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.download_url = download_url
+    
+    @classmethod
+    def from_json(cls, data: dict) -> "Attachment":
+        """Parse from API JSON."""
+        return cls(
+            data["id"],
+            data.get("filename") or "",
+            data.get("contentType") or "",
+            data.get("size") or 0,
+            data.get("downloadUrl") or ""
+        )
+
+
+class MessageSummary:
+    """Message as listed in the inbox."""
+    __slots__ = ("id", "sender", "subject", "intro", "created_at", "seen", "has_attachments")
+    
+    def __init__(
+        self,
+        id: str,
+        sender: str,
+        subject: str,
+        intro: str,
+        created_at: str,
+        seen: bool,
+        has_attachments: bool
+    ):
+        self.id = id
+        self.sender = sender
+        self.subject = subject
+        self.intro = intro
+        self.created_at = created_at
+        self.seen = seen
+        self.has_attachments = has_attachments
+    
+    @staticmethod
+    def _summary_fields(data: dict) -> tuple:
+        """Extract the summary constructor arguments from API JSON."""
+        return (
+            data["id"],
+            (data.get("from") or {}).get("address") or "Unknown",
+            data.get("subject") or "No Subject",
+            data.get("intro") or "",
+            data.get("createdAt") or "",
+            data.get("seen", False),
+            data.get("hasAttachments", False)
+        )
+    
+    @classmethod
+    def from_json(cls, data: dict) -> "MessageSummary":
+        """Parse from API JSON."""
+        return cls(*cls._summary_fields(data))
+
+
+class MessageDetail(MessageSummary):
+    """Full message, including body and attachments."""
+    __slots__ = ("text", "html", "attachments")
+    
+    def __init__(self, *summary, text: str = "", html: str = "", attachments: tuple = ()):
+        super().__init__(*summary)
+        self.text = text
+        self.html = html
+        self.attachments = attachments
+    
+    @classmethod
+    def from_json(cls, data: dict) -> "MessageDetail":
+        """Parse from API JSON."""
+        html = data.get("html") or ""
+        return cls(
+            *cls._summary_fields(data),
+            text=data.get("text") or "",
+            html="".join(html) if isinstance(html, list) else html,
+            attachments=tuple(Attachment.from_json(a) for a in data.get("attachments") or ())
+        )
+    
+    def without_body(self) -> "MessageDetail":
+        """Return a copy with the text and HTML bodies dropped."""
+        return MessageDetail(
+            self.id, self.sender, self.subject, self.intro,
+            self.created_at, self.seen, self.has_attachments,
+            attachments=self.attachments
+        )
+
+
+class MessageIterator:
+    """
+    Lazily iterates over an inbox, newest first, one API page at a time.
+    
+    Pages are only requested once the consumer has used up the previous
+    one; stop iterating (``break``) to avoid further requests. After the
+    first page is loaded, ``total`` holds the inbox size reported by the
+    API (``hydra:totalItems``).
+    """
+    
+    def __init__(self, service: "MailTMService", token: str):
+        self._service = service
+        self._token = token
+        self._page = 0
+        self._buffer: deque[MessageSummary] = deque()
+        self._yielded = 0
+        self._exhausted = False
+        self.total: Optional[int] = None
+    
+    def __aiter__(self) -> "MessageIterator":
+        return self
+    
+    async def __anext__(self) -> MessageSummary:
+        if not self._buffer:
+            if self._exhausted:
+                raise StopAsyncIteration
+            await self._fetch_next_page()
+            if not self._buffer:
+                raise StopAsyncIteration
+        self._yielded += 1
+        return self._buffer.popleft()
+    
+    async def _fetch_next_page(self) -> None:
+        self._page += 1
+        response = await self._service._request(
+            "GET", f"/messages?page={self._page}", token=self._token
+        )
+        self._buffer = deque(
+            MessageSummary.from_json(m) for m in response.get("hydra:member", [])
+        )
+        self.total = response.get("hydra:totalItems", self.total)
+        # Stop once the API-reported total is reached or a page comes back empty
+        fetched = self._yielded + len(self._buffer)
+        if not self._buffer or (self.total is not None and fetched >= self.total):
+            self._exhausted = True
+
+
 class MailTMService:
-    """Async service for interacting with Mail.tm API."""
+    """
+    Async service for interacting with a Mail.tm-compatible API.
+    
+    Each instance talks to one provider and has its own HTTP client,
+    rate limiter and health score.
+    
+    Args:
+        base_url: API base URL of the provider
+    """
     
-    def __init__(self):
-        self.base_url = MAILTM_API_BASE
+    # Weight of the latest request in the health score
+    HEALTH_DECAY = 0.2
+    
+    def __init__(self, base_url: str = MAILTM_API_BASE):
+        self.base_url = base_url
         self._client: Optional[httpx.AsyncClient] = None
+        self._limiter = AsyncRateLimiter(MAILTM_RATE_LIMIT)
+        self.health = 1.0
+        self._failed_at = 0.0
+    
+    @property
+    def is_healthy(self) -> bool:
+        """
+        Whether the provider should receive new accounts.
+        
+        An unhealthy provider is retried once ``PROVIDER_COOLDOWN`` seconds
+        have passed since its last failure.
+        """
+        return (
+            self.health >= PROVIDER_MIN_HEALTH
+            or time.monotonic() - self._failed_at >= PROVIDER_COOLDOWN
+        )
+    
+    def _record(self, method: str, endpoint: str, status: int | str, started: float) -> None:
+        """
+        Record the outcome of a request in the health score and metrics.
+        
+        Args:
+            method: HTTP method
+            endpoint: Requested path
+            status: HTTP status code, or "error" for connection errors
+            started: ``time.perf_counter()`` when the request was sent
+        """
+        template = _endpoint_template(endpoint)
+        MAILTM_SECONDS.observe(time.perf_counter() - started, method, template)
+        MAILTM_REQUESTS.inc(self.base_url, method, template, str(status))
+        annotate(provider=self.base_url, method=method, endpoint=template, status=status)
+        if status == 429:
+            MAILTM_RATE_LIMITED.inc(self.base_url)
+        
+        ok = status != "error" and status != 429 and status < 500
+        self.health += self.HEALTH_DECAY * (ok - self.health)
+        if not ok:
+            self._failed_at = time.monotonic()
+    
+    async def _acquire(self) -> None:
+        """Wait for the rate limiter, recording how long that took."""
+        started = time.perf_counter()
+        await self._limiter.acquire()
+        waited = time.perf_counter() - started
+        MAILTM_LIMITER_WAIT.observe(waited)
+        annotate(limiter_wait_ms=round(waited * 1000, 3))
+    
+    def _build_client(self) -> httpx.AsyncClient:
+        """Create an httpx client with the configured pool and timeouts."""
+        # h2 is only looked up when HTTP/2 is wanted; httpx imports it itself
+        http2 = MAILTM_HTTP2 and importlib.util.find_spec("h2") is not None
+        if MAILTM_HTTP2 and not http2:
+            logger.warning("MAILTM_HTTP2 is set but the h2 package is not installed, using HTTP/1.1")
+        return httpx.AsyncClient(
+            headers={"Content-Type": "application/json"},
+            timeout=httpx.Timeout(
+                MAILTM_READ_TIMEOUT,
+                connect=MAILTM_CONNECT_TIMEOUT,
+                pool=MAILTM_POOL_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=MAILTM_MAX_CONNECTIONS,
+                max_keepalive_connections=MAILTM_MAX_KEEPALIVE,
+                keepalive_expiry=MAILTM_KEEPALIVE_EXPIRY
+            ),
+            http2=http2
+        )
     
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create httpx client."""
         if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(
-                headers={"Content-Type": "application/json"},
-                timeout=30.0
-            )
+            self._client = self._build_client()
         return self._client
     
+    async def open(self) -> None:
+        """Create the httpx client ahead of the first request."""
+        await self._get_client()
+    
     async def close(self):
         """Close the httpx client."""
         if self._client and not self._client.is_closed:
             await self._client.aclose()
     
+    @traced("mailtm.request")
     async def _request(
         self,
         method: str,
@@ -64,10 +365,13 @@ class MailTMService:
             headers["Authorization"] = f"Bearer {token}"
         
         for attempt in range(retries):
+            await self._acquire()
+            started = time.perf_counter()
             try:
                 response = await client.request(
                     method, url, json=json_data, headers=headers
                 )
+                self._record(method, endpoint, response.status_code, started)
                 
                 # Handle rate limiting
                 if response.status_code == 429:
@@ -92,9 +396,10 @@ class MailTMService:
                 if response.status_code >= 400:
                     raise MailTMError(f"API error {response.status_code}: {response.text}")
                 
-                return response.json()
+                return _json_loads(response.content)
                     
             except httpx.RequestError as e:
+                self._record(method, endpoint, "error", started)
                 if attempt < retries - 1:
                     await asyncio.sleep(0.5)
                     continue
@@ -104,27 +409,27 @@ class MailTMService:
     
     # ==================== Domain Operations ====================
     
-    async def get_domains(self) -> list[dict]:
+    async def get_domains(self) -> list[Domain]:
         """
         Fetch available email domains.
         
         Returns:
-            List of domain objects with 'domain' and 'isActive' fields.
+            List of Domain objects.
         """
         response = await self._request("GET", "/domains")
-        return response.get("hydra:member", [])
+        return [Domain.from_json(d) for d in response.get("hydra:member", [])]
     
     async def get_active_domain(self) -> str:
         """Get the first active domain available."""
         domains = await self.get_domains()
         for domain in domains:
-            if domain.get("isActive", False):
-                return domain["domain"]
+            if domain.is_active:
+                return domain.domain
         raise MailTMError("No active domains available")
     
     # ==================== Account Operations ====================
     
-    async def create_account(self, address: str, password: str) -> dict:
+    async def create_account(self, address: str, password: str) -> Account:
         """
         Create a new email account.
         
@@ -133,10 +438,10 @@ class MailTMService:
             password: Account password
             
         Returns:
-            Account object with 'id', 'address', etc.
+            Account object.
         """
         data = {"address": address, "password": password}
-        return await self._request("POST", "/accounts", json_data=data)
+        return Account.from_json(await self._request("POST", "/accounts", json_data=data))
     
     async def get_token(self, address: str, password: str) -> dict:
         """
@@ -152,7 +457,7 @@ class MailTMService:
         data = {"address": address, "password": password}
         return await self._request("POST", "/token", json_data=data)
     
-    async def get_account(self, token: str) -> dict:
+    async def get_account(self, token: str) -> Account:
         """
         Get current account info.
         
@@ -162,7 +467,7 @@ class MailTMService:
         Returns:
             Account object.
         """
-        return await self._request("GET", "/me", token=token)
+        return Account.from_json(await self._request("GET", "/me", token=token))
     
     async def delete_account(self, token: str, account_id: str) -> None:
         """
@@ -176,7 +481,7 @@ class MailTMService:
     
     # ==================== Message Operations ====================
     
-    async def get_messages(self, token: str, page: int = 1) -> list[dict]:
+    async def get_messages(self, token: str, page: int = 1) -> list[MessageSummary]:
         """
         Get list of messages in inbox.
         
@@ -185,12 +490,43 @@ class MailTMService:
             page: Page number (30 messages per page)
             
         Returns:
-            List of message objects.
+            List of MessageSummary objects.
         """
         response = await self._request("GET", f"/messages?page={page}", token=token)
-        return response.get("hydra:member", [])
+        return [MessageSummary.from_json(m) for m in response.get("hydra:member", [])]
     
-    async def get_message(self, token: str, message_id: str) -> dict:
+    def iter_messages(self, token: str) -> MessageIterator:
+        """
+        Iterate over all messages in the inbox, fetching pages on demand.
+        
+        Args:
+            token: JWT authentication token
+            
+        Returns:
+            Async iterator of MessageSummary objects, newest first.
+        """
+        return MessageIterator(self, token)
+    
+    async def get_recent_messages(self, token: str, limit: int) -> tuple[list[MessageSummary], int]:
+        """
+        Get the newest messages and the total inbox size.
+        
+        Args:
+            token: JWT authentication token
+            limit: Maximum number of messages to return
+            
+        Returns:
+            Tuple of (messages, total message count).
+        """
+        messages = []
+        iterator = self.iter_messages(token)
+        async for message in iterator:
+            messages.append(message)
+            if len(messages) >= limit:
+                break
+        return messages, iterator.total if iterator.total is not None else len(messages)
+    
+    async def get_message(self, token: str, message_id: str) -> MessageDetail:
         """
         Get full message content.
         
@@ -199,9 +535,11 @@ class MailTMService:
             message_id: Message ID
             
         Returns:
-            Full message object with content.
+            MessageDetail object with content.
         """
-        return await self._request("GET", f"/messages/{message_id}", token=token)
+        return MessageDetail.from_json(
+            await self._request("GET", f"/messages/{message_id}", token=token)
+        )
     
     async def delete_message(self, token: str, message_id: str) -> None:
         """
@@ -213,19 +551,81 @@ class MailTMService:
         """
         await self._request("DELETE", f"/messages/{message_id}", token=token)
     
-    async def mark_as_read(self, token: str, message_id: str) -> dict:
+    async def delete_messages(self, token: str, message_ids: list[str]) -> int:
         """
-        Mark a message as read.
+        Delete many messages concurrently.
+        
+        At most ``PURGE_CONCURRENCY`` deletes are in flight, and all of
+        them go through the service's rate limiter. Messages that are
+        already gone count as deleted.
         
         Args:
             token: JWT authentication token
-            message_id: Message ID
+            message_ids: Message IDs to delete
             
         Returns:
-            Updated message object.
+            Number of messages deleted.
         """
-        return await self._request("PATCH", f"/messages/{message_id}", token=token)
-
+        semaphore = asyncio.Semaphore(PURGE_CONCURRENCY)
+        
+        async def delete_one(message_id: str) -> bool:
+            async with semaphore:
+                try:
+                    await self.delete_message(token, message_id)
+                except NotFoundError:
+                    pass
+                except MailTMError:
+                    return False
+                return True
+        
+        results = await asyncio.gather(*(delete_one(m) for m in message_ids))
+        return sum(results)
+    
+    async def mark_as_read(self, token: str, message_id: str) -> None:
+        """
+        Mark a message as read.
+        
+        Args:
+            token: JWT authentication token
+            message_id: Message ID
+        """
+        await self._request("PATCH", f"/messages/{message_id}", token=token)
 
-# Global service instance
-mailtm_service = MailTMService()
+    # ==================== Attachment Operations ====================
+    
+    @asynccontextmanager
+    async def stream_attachment(self, token: str, download_url: str) -> AsyncIterator[httpx.Response]:
+        """
+        Open a streamed download of a message attachment.
+        
+        The body is not read; iterate ``response.aiter_bytes()`` inside
+        the ``async with`` block.
+        
+        Args:
+            token: JWT authentication token
+            download_url: Attachment ``downloadUrl`` (path relative to the API)
+            
+        Yields:
+            Streaming httpx response.
+        """
+        client = await self._get_client()
+        url = f"{self.base_url}{download_url}"
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        await self._acquire()
+        started = time.perf_counter()
+        try:
+            async with client.stream("GET", url, headers=headers) as response:
+                self._record("GET", download_url, response.status_code, started)
+                if response.status_code == 429:
+                    raise RateLimitError("Rate limit exceeded. Try again later.")
+                if response.status_code == 401:
+                    raise AuthenticationError("Invalid or expired token.")
+                if response.status_code == 404:
+                    raise NotFoundError("Resource not found.")
+                if response.status_code >= 400:
+                    raise MailTMError(f"API error {response.status_code}")
+                yield response
+        except httpx.RequestError as e:
+            self._record("GET", download_url, "error", started)
+            raise MailTMError(f"Connection error: {str(e)}")
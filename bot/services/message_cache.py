@@ -0,0 +1,88 @@
+"""Per-user cache of converted, paginated email bodies."""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from ..config import MAX_BODY_CHARS, MESSAGE_CACHE_SIZE
+from ..utils.render import paginate_body
+from .mailtm import MessageDetail
+
+
+@dataclass
+class PagedMessage:
+    """A message header plus its body split into display pages."""
+    message: MessageDetail
+    pages: list[str]
+
+
+class MessageCache:
+    """LRU cache of paginated messages keyed by (user, message id)."""
+
+    def __init__(self, max_entries: int = MESSAGE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[int, str], PagedMessage] = OrderedDict()
+
+    def get(self, user_id: int, msg_id: str) -> Optional[PagedMessage]:
+        """Get a cached message and mark it as recently used."""
+        key = (user_id, msg_id)
+        entry = self._entries.get(key)
+        if entry:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, user_id: int, message: MessageDetail, pages: list[str]) -> PagedMessage:
+        """
+        Cache a converted message.
+
+        Args:
+            user_id: Telegram user ID
+            message: Full message (the body is not kept)
+            pages: Plain-text body pages
+
+        Returns:
+            The cached entry.
+        """
+        entry = PagedMessage(message=message.without_body(), pages=pages)
+        key = (user_id, message.id)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    async def put_message(self, user_id: int, message: MessageDetail) -> PagedMessage:
+        """
+        Convert a message body to text, paginate it and cache it.
+
+        Args:
+            user_id: Telegram user ID
+            message: Full message
+
+        Returns:
+            The cached entry.
+        """
+        # Prefer text over HTML
+        content = message.text
+        if not content and message.html:
+            # Imported on first use to keep startup lean
+            from ..utils.html2text import html_to_text_async
+
+            # Convert one character past the limit so truncation is detectable
+            content = await html_to_text_async(message.html, MAX_BODY_CHARS + 1)
+
+        if not content:
+            content = "(No content)"
+
+        if len(content) > MAX_BODY_CHARS:
+            content = content[:MAX_BODY_CHARS] + "..."
+
+        return self.put(user_id, message, paginate_body(message, content))
+
+    def discard(self, user_id: int, msg_id: str) -> None:
+        """Drop a message, e.g. after it is deleted."""
+        self._entries.pop((user_id, msg_id), None)
+
+
+# Global cache instance
+message_cache = MessageCache()
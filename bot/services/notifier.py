@@ -1,106 +1,246 @@
 """Background email notification service."""
 
 import logging
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+import time
+from typing import AsyncIterator, Optional
+from telegram.error import Forbidden
 from telegram.ext import ContextTypes
 
-from ..services.mailtm import mailtm_service, MailTMError
-from ..database.storage import storage
-from ..utils.helpers import format_timestamp, truncate_text
+from ..config import VERIFICATION_FETCH_BODY
+from ..services.mailtm import MailTMError, MailTMService, MessageSummary
+from ..services.inbox_cache import inbox_cache
+from ..services.message_cache import message_cache
+from ..services.tokens import ensure_fresh_token, refresh_token
+from ..services.lifecycle import mark_blocked
+from ..services.providers import provider_registry
+from ..services.scheduler import poll_scheduler
+from ..services.search import index_body, index_previews
+from ..database.storage import storage, UserSession
+from ..utils.metrics import Counter, Gauge, Histogram
+from ..utils.render import INBOX_PAGE_SIZE, render_notification
+from ..utils.tracing import annotate, traced
+from ..utils.verification import Verification, extract_verification, looks_like_verification
 
 logger = logging.getLogger(__name__)
 
+# Stop scanning for unseen messages after this many (one API page)
+MAX_NEW_MESSAGES_SCAN = 30
+
+# Notifications sent to one chat per notifier run
+MAX_NOTIFICATIONS = 5
+
+NOTIFIER_CYCLE_SECONDS = Histogram(
+    "notifier_cycle_seconds", "Duration of a notifier run over the users due",
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800)
+)
+NOTIFIER_USERS_POLLED = Gauge(
+    "notifier_users_polled", "Addresses polled in the last notifier run"
+)
+NOTIFICATIONS_SENT = Counter(
+    "notifications_sent_total", "New-mail notifications sent", ("result",)
+)
+
 
 async def check_new_emails(context: ContextTypes.DEFAULT_TYPE) -> None:
     """
-    Background job to check for new emails for all users.
-    Called periodically by the job queue.
+    Background job to check for new emails on the addresses that are due.
+    Called every ``POLL_TICK`` seconds by the job queue.
+    
+    Due addresses are grouped by user, so each chat gets one merged
+    stream of notifications however many addresses are polled.
+    
+    When the application starts shutting down, the current user is
+    finished (including its notifications) and the rest stay due for the
+    next process; the updated schedule is written either way.
     """
+    started = time.perf_counter()
+    polled = 0
+    
     try:
-        users = await storage.get_all_users()
+        accounts = await poll_scheduler.due_accounts()
+        by_user: dict[int, list[UserSession]] = {}
+        for account in accounts:
+            by_user.setdefault(account.telegram_id, []).append(account)
         
-        for user in users:
+        for user_accounts in by_user.values():
+            if not context.application.running:
+                logger.info(f"Shutting down; leaving {len(accounts) - polled} due address(es) for the next start")
+                break
+            polled += len(user_accounts)
             try:
-                await check_user_emails(context, user)
+                await check_user_emails(context, user_accounts)
             except Exception as e:
-                logger.warning(f"Error checking emails for user {user.telegram_id}: {e}")
+                logger.warning(f"Error notifying user {user_accounts[0].telegram_id}: {e}")
                 
     except Exception as e:
         logger.error(f"Error in background email check: {e}")
+    
+    try:
+        await poll_scheduler.flush()
+    except Exception as e:
+        logger.error(f"Failed to save the poll schedule: {e}")
+    
+    NOTIFIER_CYCLE_SECONDS.observe(time.perf_counter() - started)
+    NOTIFIER_USERS_POLLED.set(polled)
+
+
+@traced("check_user_emails", root=True)
+async def check_user_emails(context: ContextTypes.DEFAULT_TYPE, accounts: list[UserSession]) -> None:
+    """
+    Check the due addresses of one user and notify them of new emails.
+    
+    New messages of all addresses are merged newest first and at most
+    ``MAX_NOTIFICATIONS`` are sent; each address's cursor then moves to
+    its newest message.
+    
+    Args:
+        accounts: Due addresses, all of the same user
+    """
+    user_id = accounts[0].telegram_id
+    annotate(user=user_id, addresses=len(accounts))
+    found: list[tuple[UserSession, str, MessageSummary]] = []
+    polled: list[tuple[UserSession, list[MessageSummary]]] = []
+    for account in accounts:
+        try:
+            result = await check_account_emails(account)
+        except Exception as e:
+            logger.warning(f"Error checking emails for user {user_id}: {e}")
+            result = None
+        if result is None:
+            poll_scheduler.failed(account)
+            continue
+        poll_scheduler.succeeded(account)
+        token, new_messages = result
+        if new_messages:
+            polled.append((account, new_messages))
+            found.extend((account, token, msg) for msg in new_messages)
+    
+    if not found:
+        return
+    
+    found.sort(key=lambda item: item[2].created_at, reverse=True)
+    for account, token, msg in found[:MAX_NOTIFICATIONS]:
+        service = provider_registry.for_session(account)
+        verification = await find_verification(account, service, token, msg)
+        recipient = account.email if account.account_count > 1 else None
+        if not await send_email_notification(context, user_id, msg, verification, recipient):
+            break
+    
+    # Update last message IDs
+    for account, new_messages in polled:
+        await storage.update_last_message(account.telegram_id, account.account_id, new_messages[0].id)
 
 
-async def check_user_emails(context: ContextTypes.DEFAULT_TYPE, user) -> None:
-    """Check for new emails for a specific user."""
+async def check_account_emails(account: UserSession) -> Optional[tuple[str, list[MessageSummary]]]:
+    """
+    Look for messages newer than an address's cursor.
+    
+    New messages are added to the search index; the inbox cache is
+    refreshed when this is the address /inbox shows.
+    
+    Returns:
+        Tuple of (token, new messages newest first), or None if Mail.tm
+        could not be reached or rejected the request.
+    """
     try:
-        # Fetch messages
-        messages = await mailtm_service.get_messages(user.token)
-        
-        if not messages:
-            return
-        
-        # Get the latest message
-        latest_msg = messages[0]
-        latest_id = latest_msg["id"]
-        
-        # Check if this is a new message
-        if user.last_message_id == latest_id:
-            return  # No new messages
+        token = await ensure_fresh_token(account)
+        service = provider_registry.for_session(account)
+        iterator = service.iter_messages(token)
+        recent, new_messages = await walk_inbox(iterator, account.last_message_id)
         
-        # Find all new messages
-        new_messages = []
-        for msg in messages:
-            if msg["id"] == user.last_message_id:
-                break
-            new_messages.append(msg)
-        
-        if not new_messages:
-            return
-        
-        # Send notification for each new message (max 5)
-        for msg in new_messages[:5]:
-            await send_email_notification(context, user.telegram_id, msg)
+        if account.is_current:
+            inbox_cache.put(account.telegram_id, recent, iterator.total or len(recent))
+        if new_messages:
+            await index_previews(account, new_messages)
+        return token, new_messages
         
-        # Update last message ID
-        await storage.update_last_message(user.telegram_id, latest_id)
-        
-    except MailTMError as e:
+    except MailTMError:
         # Token might be expired, try to refresh
         try:
-            auth = await mailtm_service.get_token(user.email, user.password)
-            await storage.update_token(user.telegram_id, auth["token"])
+            token = await refresh_token(account)
         except MailTMError:
-            logger.warning(f"Failed to refresh token for user {user.telegram_id}")
-
-
-async def send_email_notification(context: ContextTypes.DEFAULT_TYPE, user_id: int, message: dict) -> None:
-    """Send a notification for a new email."""
-    sender = message.get("from", {}).get("address", "Unknown")
-    subject = message.get("subject", "No Subject")
-    intro = message.get("intro", "")
-    msg_id = message["id"]
-    time_ago = format_timestamp(message.get("createdAt", ""))
-    
-    # Escape for MarkdownV2
-    def escape_md(s):
-        chars = r'_*[]()~`>#+-=|{}.!'
-        return ''.join(f'\\{c}' if c in chars else c for c in str(s))
-    
-    text = (
-        f"📬 *New Email Received\\!*\n\n"
-        f"*From:* {escape_md(sender)}\n"
-        f"*Subject:* {escape_md(truncate_text(subject, 50))}\n"
-        f"📅 {escape_md(time_ago)}\n\n"
-    )
-    
-    if intro:
-        text += f"_{escape_md(truncate_text(intro, 100))}_"
-    
-    keyboard = InlineKeyboardMarkup([
-        [
-            InlineKeyboardButton("📖 Read Full", callback_data=f"read_{msg_id}"),
-            InlineKeyboardButton("🗑️ Delete", callback_data=f"delete_{msg_id}")
-        ]
-    ])
+            logger.warning(f"Failed to refresh token for user {account.telegram_id}")
+            return None
+        return token, []
+
+
+async def walk_inbox(
+    messages: AsyncIterator[MessageSummary],
+    last_message_id: Optional[str]
+) -> tuple[list[MessageSummary], list[MessageSummary]]:
+    """
+    Walk an inbox newest first, only as far as needed.
+    
+    The inbox cache needs the first page of the view, notifications need
+    everything newer than the last seen message.
+    
+    Args:
+        messages: Messages newest first
+        last_message_id: Cursor of the last seen message
+    
+    Returns:
+        Tuple of (first page, messages newer than the cursor).
+    """
+    recent = []
+    new_messages = []
+    caught_up = False
+    async for msg in messages:
+        if msg.id == last_message_id:
+            caught_up = True
+        elif not caught_up:
+            new_messages.append(msg)
+        
+        if len(recent) < INBOX_PAGE_SIZE:
+            recent.append(msg)
+        elif caught_up or len(new_messages) >= MAX_NEW_MESSAGES_SCAN:
+            break
+    return recent, new_messages
+
+
+async def find_verification(
+    user: UserSession,
+    service: MailTMService,
+    token: str,
+    message: MessageSummary
+) -> Optional[Verification]:
+    """
+    Find the code or verification link of a new email.
+    
+    The subject and preview are checked first. Only when they look like a
+    verification email without revealing the code is the full message
+    fetched; its converted body is cached, so "Read Full" costs nothing,
+    and indexed for search.
+    """
+    found = extract_verification(message.subject, message.intro)
+    if found or not VERIFICATION_FETCH_BODY:
+        return found
+    if not looks_like_verification(f"{message.subject}\n{message.intro}"):
+        return None
+    
+    try:
+        detail = await service.get_message(token, message.id)
+    except MailTMError as e:
+        logger.debug(f"Could not fetch message {message.id} for user {user.telegram_id}: {e}")
+        return None
+    entry = await message_cache.put_message(user.telegram_id, detail)
+    await index_body(user, entry)
+    return extract_verification(detail.subject, "\n".join(entry.pages))
+
+
+async def send_email_notification(
+    context: ContextTypes.DEFAULT_TYPE,
+    user_id: int,
+    message: MessageSummary,
+    verification: Optional[Verification] = None,
+    recipient: Optional[str] = None
+) -> bool:
+    """
+    Send a notification for a new email.
+    
+    Returns:
+        False if the user has blocked the bot, True otherwise.
+    """
+    text, keyboard = render_notification(message, verification, recipient)
     
     try:
         await context.bot.send_message(
@@ -109,5 +249,13 @@ async def send_email_notification(context: ContextTypes.DEFAULT_TYPE, user_id: i
             parse_mode="MarkdownV2",
             reply_markup=keyboard
         )
+    except Forbidden:
+        NOTIFICATIONS_SENT.inc("blocked")
+        await mark_blocked(user_id)
+        return False
     except Exception as e:
+        NOTIFICATIONS_SENT.inc("failed")
         logger.warning(f"Failed to send notification to user {user_id}: {e}")
+        return True
+    NOTIFICATIONS_SENT.inc("sent")
+    return True
@@ -0,0 +1,139 @@
+"""Registry of Mail.tm-compatible providers."""
+
+import logging
+from typing import Optional
+
+from ..config import MAILTM_API_BASES
+from ..database.storage import UserSession
+from ..utils.helpers import generate_username, generate_password
+from .mailtm import MailTMService, MailTMError
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderRegistry:
+    """
+    Mail.tm-compatible API hosts, one ``MailTMService`` per host.
+
+    New accounts are spread round-robin across healthy providers and fail
+    over to the next one on errors. Existing sessions always use the
+    provider their account lives on.
+
+    Args:
+        base_urls: API base URLs; the first is the default provider
+    """
+
+    def __init__(self, base_urls: list[str] = MAILTM_API_BASES):
+        self.default = base_urls[0]
+        self._configured = list(base_urls)
+        self._services = {url: MailTMService(url) for url in base_urls}
+        self._next = 0
+
+    def get(self, base_url: Optional[str] = None) -> MailTMService:
+        """
+        Get the service for a provider.
+
+        Providers no longer configured are created on demand, so sessions
+        created on them keep working; they just get no new accounts.
+
+        Args:
+            base_url: API base URL, or None for the default provider
+        """
+        base_url = base_url or self.default
+        service = self._services.get(base_url)
+        if service is None:
+            service = self._services[base_url] = MailTMService(base_url)
+        return service
+
+    def for_session(self, session: UserSession) -> MailTMService:
+        """Get the service hosting a session's account."""
+        return self.get(session.provider)
+
+    def candidates(self) -> list[MailTMService]:
+        """
+        Configured providers in the order new accounts should try them.
+
+        Healthy providers come first, rotating on every call; unhealthy
+        ones follow, best health score first.
+        """
+        start = self._next % len(self._configured)
+        self._next += 1
+        ordered = [self._services[url] for url in self._configured[start:] + self._configured[:start]]
+        healthy = [s for s in ordered if s.is_healthy]
+        unhealthy = sorted((s for s in ordered if not s.is_healthy), key=lambda s: -s.health)
+        return healthy + unhealthy
+
+    async def create_session(self, telegram_id: int) -> UserSession:
+        """
+        Create a new account on the first provider that accepts it.
+
+        Args:
+            telegram_id: Telegram user ID owning the account
+
+        Returns:
+            Unsaved UserSession for the new account.
+
+        Raises:
+            MailTMError: If every provider fails
+        """
+        error = MailTMError("No email providers available")
+        for service in self.candidates():
+            try:
+                domain = await service.get_active_domain()
+                email_address = f"{generate_username()}@{domain}"
+                password = generate_password()
+                account = await service.create_account(email_address, password)
+                auth = await service.get_token(email_address, password)
+            except MailTMError as e:
+                logger.warning(f"Account creation failed on {service.base_url}: {e}")
+                error = e
+                continue
+
+            return UserSession(
+                telegram_id=telegram_id,
+                email=email_address,
+                password=password,
+                token=auth["token"],
+                account_id=account.id,
+                provider=service.base_url
+            )
+        raise error
+
+    async def login(self, email: str, password: str) -> tuple[MailTMService, str]:
+        """
+        Find the provider an existing account lives on and authenticate.
+
+        Args:
+            email: Email address
+            password: Account password
+
+        Returns:
+            Tuple of (service, JWT token).
+
+        Raises:
+            MailTMError: If no provider accepts the credentials
+        """
+        error = MailTMError("No email providers available")
+        for url in self._configured:
+            service = self._services[url]
+            try:
+                auth = await service.get_token(email, password)
+            except MailTMError as e:
+                error = e
+                continue
+            return service, auth["token"]
+        raise error
+
+    async def open(self) -> None:
+        """Create the HTTP clients of all configured providers."""
+        for url in self._configured:
+            await self._services[url].open()
+
+    async def close(self) -> None:
+        """Close the HTTP clients of all providers."""
+        for service in self._services.values():
+            await service.close()
+
+
+# Global registry instance
+provider_registry = ProviderRegistry()
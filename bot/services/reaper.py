@@ -0,0 +1,86 @@
+"""Background teardown of replaced Mail.tm accounts."""
+
+import asyncio
+import logging
+import time
+from telegram.ext import ContextTypes
+
+from ..config import MAX_ADDRESSES, REAPER_BATCH, REAPER_MAX_ATTEMPTS
+from ..database.storage import storage, UserSession, RetiredAccount
+from ..utils.helpers import decode_jwt_exp
+from .mailtm import MailTMError, AuthenticationError, NotFoundError
+from .providers import provider_registry
+
+logger = logging.getLogger(__name__)
+
+
+async def add_session(session: UserSession) -> None:
+    """
+    Save a new address as the user's current one.
+
+    The user's other addresses keep receiving mail. Beyond
+    ``MAX_ADDRESSES`` the oldest ones are queued for deletion.
+
+    Args:
+        session: New (or re-authenticated) address of the user
+    """
+    await storage.save_account(session)
+    accounts = await storage.get_accounts(session.telegram_id)
+    others = [account for account in accounts if not account.is_current]
+    for old in others[:max(len(accounts) - MAX_ADDRESSES, 0)]:
+        await retire_session(old)
+
+
+async def retire_session(session: UserSession) -> None:
+    """
+    Remove one address of a user and queue its account for deletion.
+
+    Args:
+        session: Address to give up
+    """
+    await storage.retire_account(session)
+    await storage.delete_account(session.telegram_id, session.account_id)
+
+
+async def _delete_account(account: RetiredAccount) -> None:
+    """Delete one retired account, re-authenticating if its token expired."""
+    service = provider_registry.get(account.provider)
+    token = account.token
+    expires_at = decode_jwt_exp(token)
+    if expires_at is None or expires_at < time.time():
+        auth = await service.get_token(account.email, account.password)
+        token = auth["token"]
+    await service.delete_account(token, account.account_id)
+
+
+async def reap_retired_accounts(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Background job deleting replaced accounts on the Mail.tm side.
+
+    Processes up to ``REAPER_BATCH`` accounts per run. Requests go through
+    the service's rate limiter. Accounts that fail ``REAPER_MAX_ATTEMPTS``
+    times are dropped from the queue.
+    """
+    try:
+        accounts = await storage.get_retired_accounts(REAPER_BATCH)
+    except Exception as e:
+        logger.error(f"Error loading retired accounts: {e}")
+        return
+
+    async def reap(account: RetiredAccount) -> None:
+        try:
+            await _delete_account(account)
+        except (AuthenticationError, NotFoundError):
+            pass  # Already gone
+        except MailTMError as e:
+            if account.attempts + 1 < REAPER_MAX_ATTEMPTS:
+                await storage.record_retire_attempt(account.account_id)
+                logger.warning(f"Failed to delete account {account.email}: {e}")
+                return
+            logger.warning(f"Giving up deleting account {account.email}: {e}")
+        await storage.delete_retired_account(account.account_id)
+
+    await asyncio.gather(*(reap(account) for account in accounts))
+
+    if accounts:
+        logger.info(f"Reaped {len(accounts)} retired account(s)")
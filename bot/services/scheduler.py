@@ -0,0 +1,102 @@
+"""Per-address poll schedule: staggered due times with failure backoff."""
+
+import logging
+import time
+import zlib
+from typing import Optional
+
+from ..config import POLL_BACKOFF_MAX, POLL_BATCH, POLL_INTERVAL
+from ..database.storage import storage, UserSession
+from .lifecycle import poll_interval
+
+logger = logging.getLogger(__name__)
+
+# Multiplier spreading account ID hashes evenly over the unit interval (Knuth)
+_STAGGER_HASH = 2654435761
+
+# Backoff doubles the delay per consecutive failure up to this many times
+_MAX_BACKOFF_LEVEL = 10
+
+
+class PollScheduler:
+    """
+    Decides when the notifier next polls each user.
+
+    Due times and backoff levels live in the ``accounts`` table
+    (``next_poll_at``, ``poll_backoff``), so a restarted process carries
+    on with the same staggered schedule instead of polling everyone at
+    once. Results of a notifier tick are buffered in memory and written
+    in one transaction by :meth:`flush`.
+
+    Args:
+        interval: Base seconds between polls, used to spread start times
+        backoff_max: Upper bound (seconds) for the delay after failures
+        batch: Most addresses handed to the notifier per tick
+    """
+
+    def __init__(
+        self,
+        interval: int = POLL_INTERVAL,
+        backoff_max: int = POLL_BACKOFF_MAX,
+        batch: int = POLL_BATCH
+    ):
+        self.interval = interval
+        self.backoff_max = backoff_max
+        self.batch = batch
+        self._pending: dict[tuple[int, str], tuple[float, int]] = {}
+
+    def stagger(self, account_id: str) -> float:
+        """Fixed offset in ``[0, interval)`` for an address's first poll."""
+        return (zlib.crc32(account_id.encode()) * _STAGGER_HASH) % 2**32 / 2**32 * self.interval
+
+    async def resume(self, now: Optional[float] = None) -> int:
+        """
+        Spread unscheduled and overdue users over the next interval.
+
+        Called at startup: overdue users keep their phase within the
+        interval, users never scheduled get a per-ID offset.
+
+        Returns:
+            Number of users rescheduled
+        """
+        now = time.time() if now is None else now
+        entries = []
+        for telegram_id, account_id, due, backoff in await storage.get_overdue_polls(now):
+            offset = (due - now) % self.interval if due is not None else self.stagger(account_id)
+            entries.append((telegram_id, account_id, now + offset, backoff))
+        if entries:
+            await storage.save_poll_schedule(entries)
+            logger.info(f"Spread {len(entries)} pending poll(s) over the next {self.interval}s")
+        return len(entries)
+
+    async def due_accounts(self) -> list[UserSession]:
+        """Addresses whose next poll time has come, at most ``batch``, most overdue first."""
+        return await storage.get_accounts_due(time.time(), self.batch)
+
+    def succeeded(self, user: UserSession) -> None:
+        """Schedule the next regular poll and clear any backoff."""
+        self._pending[user.telegram_id, user.account_id] = (time.time() + poll_interval(user), 0)
+
+    def failed(self, user: UserSession) -> None:
+        """Push the next poll back exponentially after a failed check."""
+        level = min(user.poll_backoff + 1, _MAX_BACKOFF_LEVEL)
+        delay = min(poll_interval(user) * 2 ** level, self.backoff_max)
+        self._pending[user.telegram_id, user.account_id] = (time.time() + delay, level)
+
+    async def flush(self) -> None:
+        """Write buffered schedule changes to the database."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            await storage.save_poll_schedule(
+                [(*key, due, backoff) for key, (due, backoff) in pending.items()]
+            )
+        except Exception:
+            # Keep the changes for the next flush; newer ones take precedence
+            self._pending = {**pending, **self._pending}
+            raise
+
+
+# Global scheduler instance
+poll_scheduler = PollScheduler()
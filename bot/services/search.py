@@ -0,0 +1,51 @@
+"""Local full-text search over received mail."""
+
+import logging
+
+from ..database.storage import storage, SearchHit, UserSession
+from .mailtm import MessageSummary
+from .message_cache import PagedMessage
+
+logger = logging.getLogger(__name__)
+
+
+async def index_previews(session: UserSession, messages: list[MessageSummary]) -> None:
+    """
+    Index new messages by their preview text.
+
+    Indexing is best effort: a failure is logged and never stops the
+    notifications that follow.
+    """
+    try:
+        await storage.index_messages(session.telegram_id, session.account_id, [
+            (msg.id, msg.sender, msg.subject, msg.intro, msg.created_at)
+            for msg in messages
+        ])
+    except Exception as e:
+        logger.warning(f"Failed to index messages for user {session.telegram_id}: {e}")
+
+
+async def index_body(session: UserSession, entry: PagedMessage) -> None:
+    """Index the full converted body of a message, replacing its preview."""
+    message = entry.message
+    try:
+        await storage.index_messages(session.telegram_id, session.account_id, [
+            (message.id, message.sender, message.subject, "\n".join(entry.pages), message.created_at)
+        ])
+    except Exception as e:
+        logger.warning(f"Failed to index message {message.id} for user {session.telegram_id}: {e}")
+
+
+async def search(user_id: int, text: str, limit: int) -> list[SearchHit]:
+    """
+    Search a user's received mail without calling Mail.tm.
+
+    Args:
+        user_id: Telegram user ID
+        text: Words to look for
+        limit: Maximum number of hits
+
+    Returns:
+        Best matches first.
+    """
+    return await storage.search_messages(user_id, text, limit)
@@ -0,0 +1,80 @@
+"""Proactive Mail.tm token refresh."""
+
+import asyncio
+import logging
+import time
+from telegram.ext import ContextTypes
+
+from ..config import TOKEN_REFRESH_BATCH, TOKEN_REFRESH_MARGIN, TOKEN_REFRESH_RATE
+from ..database.storage import storage, UserSession
+from ..utils.helpers import decode_jwt_exp
+from .mailtm import MailTMError, AuthenticationError
+from .providers import provider_registry
+
+logger = logging.getLogger(__name__)
+
+
+async def refresh_token(session: UserSession) -> str:
+    """
+    Get a new token for a session and persist it.
+
+    The session object is updated in place.
+
+    Returns:
+        The new JWT token.
+
+    Raises:
+        MailTMError: If authentication fails
+    """
+    service = provider_registry.for_session(session)
+    auth = await service.get_token(session.email, session.password)
+    session.token = auth["token"]
+    session.token_expires_at = decode_jwt_exp(session.token)
+    await storage.update_token(session.telegram_id, session.account_id, session.token)
+    return session.token
+
+
+async def ensure_fresh_token(session: UserSession) -> str:
+    """
+    Return a usable token, refreshing it first if it is about to expire.
+
+    Falls back to the current token if the refresh fails, so callers
+    still get the reactive 401 handling.
+    """
+    expires_at = session.token_expires_at
+    if expires_at is not None and expires_at - TOKEN_REFRESH_MARGIN < time.time():
+        try:
+            return await refresh_token(session)
+        except MailTMError as e:
+            logger.warning(f"Failed to refresh token for user {session.telegram_id}: {e}")
+    return session.token
+
+
+async def refresh_expiring_tokens(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Background job renewing tokens shortly before they expire.
+
+    At most ``TOKEN_REFRESH_BATCH`` tokens are renewed per run, paced at
+    ``TOKEN_REFRESH_RATE`` per second to stay clear of rate limits.
+    """
+    try:
+        users = await storage.get_accounts_with_expiring_tokens(
+            int(time.time()) + TOKEN_REFRESH_MARGIN, TOKEN_REFRESH_BATCH
+        )
+    except Exception as e:
+        logger.error(f"Error loading expiring tokens: {e}")
+        return
+
+    for user in users:
+        try:
+            await refresh_token(user)
+        except AuthenticationError:
+            # Credentials no longer valid; stop scheduling this account
+            await storage.clear_token_expiry(user.telegram_id, user.account_id)
+            logger.warning(f"Credentials rejected for user {user.telegram_id}, token left to expire")
+        except MailTMError as e:
+            logger.warning(f"Failed to refresh token for user {user.telegram_id}: {e}")
+        await asyncio.sleep(1 / TOKEN_REFRESH_RATE)
+
+    if users:
+        logger.info(f"Processed {len(users)} expiring token(s)")
@@ -1,10 +1,11 @@
 """Utility helper functions."""
 
+import base64
+import json
 import secrets
 import string
-import re
 from datetime import datetime
-from html import unescape
+from typing import Optional
 
 
 def generate_username(length: int = 10) -> str:
@@ -19,19 +20,6 @@ def generate_password(length: int = 16) -> str:
     return ''.join(secrets.choice(chars) for _ in range(length))
 
 
-def strip_html(html_content: str) -> str:
-    """Strip HTML tags and decode entities."""
-    if not html_content:
-        return ""
-    # Remove HTML tags
-    clean = re.sub(r'<[^>]+>', '', html_content)
-    # Decode HTML entities
-    clean = unescape(clean)
-    # Normalize whitespace
-    clean = re.sub(r'\s+', ' ', clean).strip()
-    return clean
-
-
 def format_timestamp(iso_timestamp: str) -> str:
     """Format ISO timestamp to human-readable relative time."""
     try:
@@ -60,7 +48,17 @@ def truncate_text(text: str, max_length: int = 100) -> str:
     return text[:max_length - 3] + "..."
 
 
-def escape_markdown(text: str) -> str:
-    """Escape special characters for Telegram MarkdownV2."""
-    escape_chars = r'_*[]()~`>#+-=|{}.!'
-    return ''.join(f'\\{c}' if c in escape_chars else c for c in text)
+def decode_jwt_exp(token: str) -> Optional[int]:
+    """
+    Read the expiry (``exp`` claim) of a JWT without verifying it.
+    
+    Returns:
+        Expiry as a Unix timestamp, or None if the token has no readable exp.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return int(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
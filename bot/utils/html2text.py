@@ -0,0 +1,146 @@
+"""Incremental HTML-to-text conversion with an output budget."""
+
+import asyncio
+import re
+from html.parser import HTMLParser
+
+from ..config import HTML_OFFLOAD_THRESHOLD
+
+# Input is fed to the parser in slices of this many characters, so
+# conversion of huge bodies stops soon after the budget is reached
+FEED_CHUNK_SIZE = 16384
+
+# Elements whose content is never shown. Not "head": mailers often leave
+# out </head>, which would hide the whole body
+SKIP_TAGS = frozenset({"style", "script", "noscript", "template", "title", "svg"})
+
+# Elements that start a new paragraph
+BLOCK_TAGS = frozenset({
+    "p", "div", "table", "tr", "ul", "ol", "li", "blockquote", "pre", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "header", "footer",
+})
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class _BudgetExhausted(Exception):
+    """Raised internally once the output budget is used up."""
+
+
+class _TextExtractor(HTMLParser):
+    """HTML parser that emits readable text up to a character budget."""
+
+    def __init__(self, limit: int):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self._parts: list[str] = []
+        self._size = 0
+        self._skip_depth = 0
+        self._links: list[str | None] = []
+        self._link_text: list[str] = []
+        self._trailing_newlines = 2  # Suppress leading blank lines
+
+    def text(self) -> str:
+        """Return the text collected so far."""
+        return "".join(self._parts).rstrip()
+
+    def _emit(self, s: str) -> None:
+        remaining = self.limit - self._size
+        if len(s) >= remaining:
+            self._parts.append(s[:remaining])
+            self._size = self.limit
+            raise _BudgetExhausted()
+        self._parts.append(s)
+        self._size += len(s)
+
+    def _newline(self, count: int) -> None:
+        """Ensure the output ends with at least `count` newlines."""
+        if self._trailing_newlines < count:
+            if self._parts:
+                self._parts[-1] = self._parts[-1].rstrip(" ")
+            self._emit("\n" * (count - self._trailing_newlines))
+            self._trailing_newlines = count
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            # Whatever the head left unclosed ends here
+            self._skip_depth = 0
+        elif tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif self._skip_depth:
+            return
+        elif tag == "br":
+            self._newline(1)
+        elif tag in BLOCK_TAGS:
+            self._newline(2)
+        elif tag == "a":
+            self._links.append(dict(attrs).get("href"))
+            self._link_text.append("")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif self._skip_depth:
+            return
+        elif tag in BLOCK_TAGS:
+            self._newline(2)
+        elif tag == "a" and self._links:
+            href = self._links.pop()
+            label = self._link_text.pop().strip()
+            # Keep link targets unless the label already shows them
+            if href and href.startswith(("http://", "https://")) and href != label:
+                self._emit(f" ({href})" if label else href)
+                self._trailing_newlines = 0
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        data = _WHITESPACE.sub(" ", data)
+        if self._trailing_newlines:
+            data = data.lstrip(" ")
+        if not data:
+            return
+        if self._link_text:
+            self._link_text[-1] += data
+        self._emit(data)
+        self._trailing_newlines = 0
+
+
+def html_to_text(html: str, limit: int) -> str:
+    """
+    Convert an HTML body to plain text, stopping at `limit` characters.
+
+    Drops ``<style>``/``<script>`` content, keeps link targets and
+    paragraph breaks. Only as much input as needed to fill the budget
+    is parsed.
+
+    Args:
+        html: HTML source
+        limit: Maximum number of output characters
+
+    Returns:
+        Plain text, at most `limit` characters long.
+    """
+    if not html:
+        return ""
+
+    parser = _TextExtractor(limit)
+    try:
+        for i in range(0, len(html), FEED_CHUNK_SIZE):
+            parser.feed(html[i:i + FEED_CHUNK_SIZE])
+        parser.close()
+    except _BudgetExhausted:
+        pass
+    return parser.text()
+
+
+async def html_to_text_async(html: str, limit: int) -> str:
+    """
+    Convert HTML to text without blocking the event loop.
+
+    Bodies larger than ``HTML_OFFLOAD_THRESHOLD`` are converted in a
+    worker thread.
+    """
+    if len(html) < HTML_OFFLOAD_THRESHOLD:
+        return html_to_text(html, limit)
+    return await asyncio.to_thread(html_to_text, html, limit)
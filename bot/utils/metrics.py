@@ -0,0 +1,233 @@
+"""Lightweight metrics exposed in the Prometheus text format."""
+
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from bisect import bisect_left
+from typing import Iterator, Optional
+
+from telegram.request import HTTPXRequest
+
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registry: list["_Metric"] = []
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    """Render a label set, e.g. ``{method="GET",le="0.1"}``."""
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base class: a named metric with a fixed list of label names."""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        _registry.append(self)
+
+    def collect(self) -> Iterator[str]:
+        """Yield exposition lines."""
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples()
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, per label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        """Increase the count for the given label values."""
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def _samples(self) -> Iterator[str]:
+        for values, count in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, values)} {count}"
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, per label values."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, *label_values) -> None:
+        """Set the value for the given label values."""
+        self._values[label_values] = value
+
+    def _samples(self) -> Iterator[str]:
+        for values, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, values)} {value}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets, per label values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        """Record one observation."""
+        entry = self._values.get(label_values)
+        if entry is None:
+            entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def _samples(self) -> Iterator[str]:
+        for values, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}"
+            labels = _format_labels(self.labels, values)
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+def render() -> str:
+    """Render every registered metric in the Prometheus text format."""
+    return "\n".join(line for metric in _registry for line in metric.collect()) + "\n"
+
+
+def instrumented(histogram: Histogram, errors: Counter):
+    """
+    Class decorator timing every public coroutine method.
+
+    Each call is observed in ``histogram`` and failures counted in
+    ``errors``, both labelled with the method name.
+    """
+    def wrap(name: str, method):
+        @functools.wraps(method)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            except Exception:
+                errors.inc(name)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started, name)
+        return timed
+
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(method):
+                setattr(cls, name, wrap(name, method))
+        return cls
+
+    return decorate
+
+
+# ==================== Telegram ====================
+
+TELEGRAM_REQUESTS = Counter(
+    "telegram_requests_total", "Telegram Bot API calls", ("method", "status")
+)
+TELEGRAM_SECONDS = Histogram(
+    "telegram_request_seconds", "Telegram Bot API call latency", ("method",)
+)
+
+
+class InstrumentedHTTPXRequest(HTTPXRequest):
+    """PTB request backend recording Telegram API call counts and latency."""
+
+    async def do_request(self, url: str, method: str, *args, **kwargs) -> tuple[int, bytes]:
+        api_method = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        with span(f"telegram.{api_method}") as current:
+            try:
+                code, payload = await super().do_request(url, method, *args, **kwargs)
+            except Exception:
+                TELEGRAM_REQUESTS.inc(api_method, "error")
+                raise
+            finally:
+                TELEGRAM_SECONDS.observe(time.perf_counter() - started, api_method)
+            if current:
+                current.attrs["status"] = code
+        TELEGRAM_REQUESTS.inc(api_method, str(code))
+        return code, payload
+
+
+# ==================== Endpoint ====================
+
+async def _serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Answer one scrape with the current metrics."""
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        if request_line.split(b" ")[1:2] == [b"/metrics"]:
+            status, body = "200 OK", render().encode()
+        else:
+            status, body = "404 Not Found", b"Not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str, port: int) -> Optional[asyncio.AbstractServer]:
+    """
+    Serve ``GET /metrics`` on a local port.
+
+    Args:
+        host: Interface to bind
+        port: TCP port; 0 disables the endpoint
+
+    Returns:
+        The running server, or None if disabled or the port is taken.
+    """
+    if not port:
+        return None
+    try:
+        server = await asyncio.start_server(_serve, host, port)
+    except OSError as e:
+        logger.warning(f"Metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    logger.info(f"Metrics available at http://{host}:{port}/metrics")
+    return server
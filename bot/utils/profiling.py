@@ -0,0 +1,204 @@
+"""On-demand profiling and event-loop stall detection."""
+
+import asyncio
+import cProfile
+import functools
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import traceback
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from ..config import PROFILE_DIR
+
+logger = logging.getLogger(__name__)
+
+# What can be profiled: notifier cycles or update handler calls
+TARGETS = ("notifier", "handlers")
+
+
+def _sampling_profiler():
+    """pyinstrument's profiler class, imported on first use; None if not installed."""
+    try:
+        from pyinstrument import Profiler as SamplingProfiler
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return SamplingProfiler
+
+
+class _Capture:
+    """One armed profiling run covering the next ``runs`` calls of a target."""
+
+    def __init__(self, target: str, runs: int):
+        self.target = target
+        self.runs = runs
+        self.completed = 0
+        self.in_flight = 0
+        self.started_at = time.strftime("%Y%m%d-%H%M%S")
+        sampling_profiler = _sampling_profiler()
+        if sampling_profiler is not None:
+            self.sampler = sampling_profiler(async_mode="disabled")
+            self.profile = None
+        else:
+            self.sampler = None
+            self.profile = cProfile.Profile()
+
+    def resume(self) -> None:
+        if self.sampler is not None:
+            self.sampler.start()
+        else:
+            self.profile.enable()
+
+    def pause(self) -> None:
+        if self.sampler is not None:
+            self.sampler.stop()
+        else:
+            self.profile.disable()
+
+    def write(self, directory: Path) -> Path:
+        """Write the results, returning the path of the readable report."""
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = directory / f"{self.target}-{self.started_at}"
+        if self.sampler is not None:
+            path = stem.with_suffix(".html")
+            path.write_text(self.sampler.output_html())
+            return path
+
+        self.profile.dump_stats(stem.with_suffix(".prof"))
+        report = io.StringIO()
+        pstats.Stats(self.profile, stream=report).sort_stats("cumulative").print_stats(60)
+        path = stem.with_suffix(".txt")
+        path.write_text(report.getvalue())
+        return path
+
+
+class Profiler:
+    """
+    Profiles the next N notifier cycles or handler calls of a live process.
+
+    Uses pyinstrument (sampling, low overhead) when it is installed and
+    cProfile otherwise. Everything running on the event loop while a
+    profiled call is in flight is captured. Results go to ``directory``:
+    a ``.txt`` report plus ``.prof`` stats for cProfile, or an ``.html``
+    report for pyinstrument.
+
+    Args:
+        directory: Where reports are written
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._capture: Optional[_Capture] = None
+
+    @property
+    def active(self) -> Optional[str]:
+        """Description of the armed run, or None."""
+        c = self._capture
+        return f"{c.target} ({c.completed}/{c.runs} done)" if c else None
+
+    def arm(self, target: str, runs: int) -> bool:
+        """
+        Profile the next ``runs`` calls of ``target``.
+
+        Returns:
+            False if a run is already in progress.
+        """
+        if target not in TARGETS:
+            raise ValueError(f"Unknown profiling target: {target}")
+        if self._capture is not None:
+            return False
+        self._capture = _Capture(target, max(1, runs))
+        logger.info(f"Profiling the next {runs} {target} call(s)")
+        return True
+
+    @asynccontextmanager
+    async def track(self, target: str) -> AsyncIterator[None]:
+        """Wrap one notifier cycle or handler call; a no-op unless armed."""
+        capture = self._capture
+        if capture is None or capture.target != target:
+            yield
+            return
+
+        if capture.in_flight == 0:
+            capture.resume()
+        capture.in_flight += 1
+        try:
+            yield
+        finally:
+            capture.in_flight -= 1
+            capture.completed += 1
+            if capture.in_flight == 0:
+                capture.pause()
+                if capture.completed >= capture.runs:
+                    self._capture = None
+                    path = capture.write(self.directory)
+                    logger.info(f"Profile of {capture.completed} {target} call(s) written to {path}")
+
+    def wrap(self, target: str, callback):
+        """Wrap a handler or job callback so its calls can be profiled."""
+        @functools.wraps(callback)
+        async def profiled(*args, **kwargs):
+            async with self.track(target):
+                return await callback(*args, **kwargs)
+        return profiled
+
+
+class LoopMonitor:
+    """
+    Logs event-loop stalls together with the stack that caused them.
+
+    A heartbeat task runs on the loop; a watchdog thread checks it and,
+    when the loop has not run for longer than ``threshold`` seconds,
+    logs the loop thread's current stack (the blocking coroutine step).
+    Unlike asyncio debug mode this adds no per-callback overhead.
+
+    Args:
+        threshold: Stall duration (seconds) that gets logged
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._interval = max(threshold / 4, 0.01)
+        self._beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start watching the running event loop."""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="loop-monitor", daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop watching."""
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self._interval)
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stop.wait(self._interval):
+            beat = self._beat
+            stalled = time.monotonic() - beat - self._interval
+            if stalled < self.threshold or reported == beat:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=15)) if frame else ""
+            logger.warning(f"Event loop blocked for over {stalled:.2f}s; loop thread stack:\n{stack}")
+
+
+# Global profiler instance
+profiler = Profiler(PROFILE_DIR)
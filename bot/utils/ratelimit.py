@@ -0,0 +1,33 @@
+"""Async token-bucket rate limiter."""
+
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket limiting how often an operation may start.
+
+    Args:
+        rate: Sustained operations per second
+        burst: Maximum operations allowed back-to-back (defaults to rate)
+    """
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until an operation may start."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
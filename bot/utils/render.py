@@ -0,0 +1,337 @@
+"""MarkdownV2 rendering for bot views."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+from telegram import CopyTextButton, InlineKeyboardButton, InlineKeyboardMarkup
+
+from .helpers import format_timestamp, truncate_text
+
+if TYPE_CHECKING:
+    from ..database.storage import SearchHit, UserSession
+    from ..services.mailtm import MessageDetail, MessageSummary
+    from .verification import Verification
+
+# Number of messages listed in the inbox view
+INBOX_PAGE_SIZE = 10
+
+# Number of hits shown for a search
+SEARCH_RESULTS_LIMIT = 10
+
+# Maximum length of a Telegram message text
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+# Longer links are not offered as a button
+MAX_BUTTON_URL = 1024
+
+# Characters that must be escaped in MarkdownV2 (backslash included)
+_MD_SPECIAL = '\\_*[]()~`>#+-=|{}.!'
+_MD_TABLE = str.maketrans({c: f'\\{c}' for c in _MD_SPECIAL})
+
+# ==================== Templates ====================
+
+INBOX_EMPTY = (
+    "📭 *Your inbox is empty*\n\n"
+    "Waiting for emails\\.\\.\\."
+)
+INBOX_HEADER = "📬 *Your Inbox* \\({count} message{plural}\\)\n\n"
+INBOX_ITEM = (
+    "{seen} *{index}\\)* {subject}\n"
+    "   _From: {sender}_\n"
+    "   📅 {time_ago}\n\n"
+)
+
+NOTIFICATION = (
+    "📬 *New Email Received\\!*\n\n"
+    "*From:* {sender}\n"
+    "{recipient}"
+    "*Subject:* {subject}\n"
+    "📅 {time_ago}\n\n"
+)
+NOTIFICATION_RECIPIENT = "*To:* {recipient}\n"
+NOTIFICATION_INTRO = "_{intro}_"
+NOTIFICATION_CODE = "\n\n🔑 *Code:* `{code}`"
+
+ADDRESSES_EMPTY = (
+    "📭 *You have no address left*\n\n"
+    "Send /start to get a new one\\."
+)
+ADDRESSES_HEADER = (
+    "📮 *Your addresses* \\({count}\\)\n\n"
+    "All of them receive mail; /inbox shows the current one\\.\n\n"
+)
+ADDRESS_ITEM = "{marker} *{index}\\)* `{email}`\n"
+
+SEARCH_USAGE = (
+    "🔎 *Search your emails*\n\n"
+    "Usage: `/search words`\n"
+    "Matches the sender, subject and text of emails you received\\."
+)
+SEARCH_EMPTY = "🔎 No emails match _{query}_\\."
+SEARCH_HEADER = "🔎 *Results for* _{query}_ \\({count}\\)\n\n"
+SEARCH_ITEM = (
+    "*{index}\\)* {subject}\n"
+    "   _From: {sender}_\n"
+    "   {snippet}\n\n"
+)
+
+MESSAGE_DETAIL = (
+    "📧 *Email Details*\n\n"
+    "*From:* {sender}\n"
+    "*Subject:* {subject}\n"
+    "*Date:* {date}\n\n"
+    "━━━━━━━━━━━━━━━━\n\n"
+    "{content}"
+)
+MESSAGE_ATTACHMENTS = "\n\n📎 *Attachments:* {count} file\\(s\\)"
+MESSAGE_PAGE_FOOTER = "\n\n📄 Page {page}/{total}"
+
+
+def escape_md(text) -> str:
+    """Escape special characters for Telegram MarkdownV2."""
+    return str(text).translate(_MD_TABLE)
+
+
+# ==================== Views ====================
+
+def render_inbox(messages: list[MessageSummary], total: Optional[int] = None) -> tuple[str, InlineKeyboardMarkup]:
+    """
+    Render the inbox list view.
+
+    Args:
+        messages: Message summaries, newest first
+        total: Total number of messages in the inbox (defaults to len(messages))
+
+    Returns:
+        Tuple of (MarkdownV2 text, inline keyboard).
+    """
+    if not messages:
+        keyboard = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔄 Refresh", callback_data="check_inbox")]
+        ])
+        return INBOX_EMPTY, keyboard
+
+    count = total if total is not None else len(messages)
+    parts = [INBOX_HEADER.format(count=count, plural="s" if count != 1 else "")]
+    buttons = []
+
+    for i, msg in enumerate(messages[:INBOX_PAGE_SIZE], 1):
+        parts.append(INBOX_ITEM.format(
+            seen="✓" if msg.seen else "•",
+            index=i,
+            subject=escape_md(msg.subject[:40]),
+            sender=escape_md(msg.sender),
+            time_ago=escape_md(format_timestamp(msg.created_at))
+        ))
+
+        msg_id = msg.id
+        buttons.append([
+            InlineKeyboardButton(f"📖 Read #{i}", callback_data=f"read_{msg_id}"),
+            InlineKeyboardButton(f"🗑️ Delete #{i}", callback_data=f"delete_{msg_id}")
+        ])
+
+    buttons.append([
+        InlineKeyboardButton("🔄 Refresh", callback_data="check_inbox"),
+        InlineKeyboardButton("🧹 Clear Inbox", callback_data="clear_inbox")
+    ])
+
+    return "".join(parts), InlineKeyboardMarkup(buttons)
+
+
+def render_notification(
+    message: MessageSummary,
+    verification: Optional[Verification] = None,
+    recipient: Optional[str] = None
+) -> tuple[str, InlineKeyboardMarkup]:
+    """
+    Render the new-email notification.
+
+    Args:
+        message: Message summary
+        verification: Code and/or link found in the message, shown with
+            a copy button and a link button
+        recipient: Address the message arrived at, shown to users with
+            several addresses
+
+    Returns:
+        Tuple of (MarkdownV2 text, inline keyboard).
+    """
+    msg_id = message.id
+    text = NOTIFICATION.format(
+        sender=escape_md(message.sender),
+        subject=escape_md(truncate_text(message.subject, 50)),
+        time_ago=escape_md(format_timestamp(message.created_at)),
+        recipient=NOTIFICATION_RECIPIENT.format(recipient=escape_md(recipient)) if recipient else ""
+    )
+
+    if message.intro:
+        text += NOTIFICATION_INTRO.format(intro=escape_md(truncate_text(message.intro, 100)))
+
+    buttons = []
+    if verification and verification.code:
+        # Codes are letters, digits and hyphens: nothing to escape in a code span
+        text += NOTIFICATION_CODE.format(code=verification.code)
+        buttons.append([InlineKeyboardButton(
+            f"📋 Copy {verification.code}", copy_text=CopyTextButton(verification.code)
+        )])
+    if verification and verification.link and len(verification.link) <= MAX_BUTTON_URL:
+        buttons.append([InlineKeyboardButton("🔗 Open Verification Link", url=verification.link)])
+
+    buttons.append([
+        InlineKeyboardButton("📖 Read Full", callback_data=f"read_{msg_id}"),
+        InlineKeyboardButton("🗑️ Delete", callback_data=f"delete_{msg_id}")
+    ])
+
+    return text, InlineKeyboardMarkup(buttons)
+
+
+def render_addresses(accounts: list[UserSession]) -> tuple[str, InlineKeyboardMarkup]:
+    """
+    Render the list of a user's addresses.
+
+    Args:
+        accounts: The user's addresses, oldest first
+
+    Returns:
+        Tuple of (MarkdownV2 text, inline keyboard).
+    """
+    new_row = [InlineKeyboardButton("🔄 New Email", callback_data="new_email")]
+    if not accounts:
+        return ADDRESSES_EMPTY, InlineKeyboardMarkup([new_row])
+
+    parts = [ADDRESSES_HEADER.format(count=len(accounts))]
+    buttons = []
+    for i, account in enumerate(accounts, 1):
+        # Addresses are letters, digits, dots and @: nothing to escape in a code span
+        parts.append(ADDRESS_ITEM.format(
+            marker="✅" if account.is_current else "📧",
+            index=i,
+            email=account.email
+        ))
+        use = InlineKeyboardButton(
+            f"✅ #{i} Current" if account.is_current else f"📬 Use #{i}",
+            callback_data=f"use_{account.account_id}"
+        )
+        buttons.append([use, InlineKeyboardButton(f"🗑️ Remove #{i}", callback_data=f"drop_{account.account_id}")])
+
+    buttons.append(new_row + [InlineKeyboardButton("📬 Check Inbox", callback_data="check_inbox")])
+    return "".join(parts), InlineKeyboardMarkup(buttons)
+
+
+def render_search_results(query: str, hits: list[SearchHit]) -> tuple[str, Optional[InlineKeyboardMarkup]]:
+    """
+    Render the result list of a /search.
+
+    Args:
+        query: Search text as typed
+        hits: Matches, best first
+
+    Returns:
+        Tuple of (MarkdownV2 text, inline keyboard or None).
+    """
+    query = escape_md(truncate_text(query, 40))
+    if not hits:
+        return SEARCH_EMPTY.format(query=query), None
+
+    parts = [SEARCH_HEADER.format(query=query, count=len(hits))]
+    buttons = []
+    for i, hit in enumerate(hits, 1):
+        parts.append(SEARCH_ITEM.format(
+            index=i,
+            subject=escape_md(truncate_text(hit.subject, 40)),
+            sender=escape_md(hit.sender),
+            snippet=escape_md(" ".join(hit.snippet.split()))
+        ))
+        buttons.append(InlineKeyboardButton(f"📖 {i}", callback_data=f"read_{hit.msg_id}"))
+
+    # Read buttons five to a row
+    rows = [buttons[i:i + 5] for i in range(0, len(buttons), 5)]
+    return "".join(parts), InlineKeyboardMarkup(rows)
+
+
+def paginate_body(message: MessageDetail, content: str) -> list[str]:
+    """
+    Split a message body into pages that fit in one Telegram message.
+
+    Pages are sized on their escaped length, with room left for the
+    detail header and page footer, and are cut at line or word
+    boundaries where possible.
+
+    Args:
+        message: Full message object (used to size the header)
+        content: Plain-text body
+
+    Returns:
+        List of plain-text pages (at least one).
+    """
+    overhead, _ = render_message_page(message, "", 0, 1)
+    budget = TELEGRAM_MESSAGE_LIMIT - len(overhead) - len(MESSAGE_PAGE_FOOTER) - 16
+    budget = max(budget, 256)
+
+    pages = []
+    rest = content
+    while len(escape_md(rest)) > budget:
+        size = budget
+        # Escaping can double the length; shrink until the slice fits
+        while len(escape_md(rest[:size])) > budget:
+            size = size * budget // len(escape_md(rest[:size])) or 1
+        cut = max(rest.rfind("\n", 0, size), rest.rfind(" ", 0, size))
+        if cut < size // 2:
+            cut = size
+        pages.append(rest[:cut].rstrip())
+        rest = rest[cut:].lstrip()
+    pages.append(rest)
+    return pages
+
+
+def render_message_page(
+    message: MessageDetail,
+    content: str,
+    page: int = 0,
+    total_pages: int = 1
+) -> tuple[str, InlineKeyboardMarkup]:
+    """
+    Render one page of the full message view.
+
+    Args:
+        message: Full message object
+        content: Plain-text body of this page
+        page: Zero-based page index
+        total_pages: Number of pages in the body
+
+    Returns:
+        Tuple of (MarkdownV2 text, inline keyboard).
+    """
+    msg_id = message.id
+    text = MESSAGE_DETAIL.format(
+        sender=escape_md(message.sender),
+        subject=escape_md(message.subject),
+        date=escape_md(format_timestamp(message.created_at)),
+        content=escape_md(content)
+    )
+
+    attachments = message.attachments
+    if attachments:
+        text += MESSAGE_ATTACHMENTS.format(count=len(attachments))
+
+    buttons = []
+    if total_pages > 1:
+        text += MESSAGE_PAGE_FOOTER.format(page=page + 1, total=total_pages)
+        nav = []
+        if page > 0:
+            nav.append(InlineKeyboardButton("◀ Prev", callback_data=f"page_{msg_id}_{page - 1}"))
+        if page < total_pages - 1:
+            nav.append(InlineKeyboardButton("Next ▶", callback_data=f"page_{msg_id}_{page + 1}"))
+        buttons.append(nav)
+
+    for i, attachment in enumerate(attachments):
+        name = truncate_text(attachment.filename or "attachment", 40)
+        buttons.append([InlineKeyboardButton(f"📎 {name}", callback_data=f"att_{msg_id}_{i}")])
+
+    buttons.append([
+        InlineKeyboardButton("🗑️ Delete", callback_data=f"delete_{msg_id}"),
+        InlineKeyboardButton("⬅️ Back", callback_data="back_to_inbox")
+    ])
+
+    return text, InlineKeyboardMarkup(buttons)
@@ -0,0 +1,131 @@
+"""
+Request-scoped tracing with contextvars.
+
+A trace starts at a root span (an update handler, or one user's
+new-mail check) and collects child spans for Mail.tm requests, storage
+operations and Telegram calls made within it, including from tasks it
+spawns. Finished traces are written as one JSON line to the
+``bot.trace`` logger. Only a ``TRACE_SAMPLE_RATE`` fraction of roots is
+traced; outside a sampled trace, spans cost a context-variable lookup.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from ..config import TRACE_SAMPLE_RATE
+
+logger = logging.getLogger("bot.trace")
+
+
+class Span:
+    """One timed step of a trace."""
+    __slots__ = ("trace_id", "spans", "span_id", "parent_id", "name", "attrs", "start", "duration")
+
+    def __init__(self, name: str, parent: Optional["Span"], attrs: dict):
+        if parent is None:
+            self.trace_id = os.urandom(8).hex()
+            self.spans: list[Span] = []
+        else:
+            self.trace_id = parent.trace_id
+            self.spans = parent.spans
+        self.span_id = os.urandom(4).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.spans.append(self)
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+@contextmanager
+def span(name: str, root: bool = False, **attrs) -> Iterator[Optional[Span]]:
+    """
+    Time a step as a child of the current span.
+
+    Args:
+        name: Span name, e.g. ``mailtm.request``
+        root: Start a new (sampled) trace if none is active
+        **attrs: Attributes recorded with the span
+
+    Yields:
+        The span, or None when not tracing.
+    """
+    parent = _current.get()
+    if parent is None and (not root or random.random() >= TRACE_SAMPLE_RATE):
+        yield None
+        return
+
+    current = Span(name, parent, attrs)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        current.duration = time.perf_counter() - current.start
+        _current.reset(token)
+        if parent is None:
+            _emit(current)
+
+
+def annotate(**attrs) -> None:
+    """Add attributes to the current span, if tracing."""
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def traced(name: str, root: bool = False):
+    """Decorator running a coroutine function inside a span."""
+    def decorate(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name, root=root):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def traced_methods(prefix: str):
+    """Class decorator tracing every public coroutine method as ``prefix.<name>``."""
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(method):
+                setattr(cls, name, traced(f"{prefix}.{name}")(method))
+        return cls
+    return decorate
+
+
+def _emit(root: Span) -> None:
+    """Log a finished trace as one JSON line."""
+    record = {
+        "trace_id": root.trace_id,
+        "id": root.span_id,
+        "name": root.name,
+        "duration_ms": round(root.duration * 1000, 3),
+        **root.attrs,
+        "spans": [
+            {
+                "id": s.span_id,
+                "parent": s.parent_id,
+                "name": s.name,
+                "offset_ms": round((s.start - root.start) * 1000, 3),
+                "duration_ms": round(s.duration * 1000, 3),
+                **s.attrs,
+            }
+            for s in root.spans[1:]
+        ],
+    }
+    logger.info(json.dumps(record, default=str))
@@ -0,0 +1,152 @@
+"""Extraction of one-time codes and verification links from email text."""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# Words that name a one-time code ("verification code", "OTP", "PIN", ...)
+_CODE_WORD = (
+    r"(?:(?:verification|security|confirmation|login|log-in|sign[- ]?in|access|"
+    r"authentication|auth|activation|one[- ]time|2fa|temporary)\s+)?"
+    r"(?:code|pin|otp|passcode|one[- ]time\s+password)"
+)
+
+# A code: 4-8 letters/digits with at least one digit, optionally split in
+# two groups ("123 456", "7QX2-9MKA"); in context it may carry a prefix
+# like Google's "G-123456"
+_CODE_TOKEN = (
+    r"(?:(?=[A-Z0-9-]{0,8}\d)[A-Z0-9]{3,4}-[A-Z0-9]{3,4}"
+    r"|(?=[A-Z0-9]{0,7}\d)[A-Z0-9]{4,8}"
+    r"|\d{3} \d{3})"
+)
+_CODE = rf"(?:[A-Z]-)?({_CODE_TOKEN})"
+
+# Filler between the code word and the code ("code for your account is")
+_FILLER = (
+    r"(?:[\s:：\-–=]|\b(?:is|are|was|for|to|of|your|this|the|an?|account|below|here|"
+    r"please|use|enter|following|sign|log|in|verify|confirm|login|one|single)\b)*?"
+)
+
+# One pass finds, in document order: code after its label, code before
+# its label ("123456 is your code") and URLs
+_PATTERN = re.compile(
+    rf"\b{_CODE_WORD}\b{_FILLER}(?<![\w-]){_CODE}(?![\w-])"
+    rf"|(?<![\w-]){_CODE}(?![\w-])\s*(?:is|as|-|–)\s+(?:your|the|a)\b[^\n]{{0,40}}?\b{_CODE_WORD}\b"
+    r"|(https?://[^\s<>\"'()\[\]{}]+)",
+    re.IGNORECASE
+)
+
+# Messages that are probably about verification (decides whether the
+# full body is worth fetching)
+_TOPIC = re.compile(
+    r"verif|confirm|activat|validat|\bcode\b|\botp\b|\bpin\b|passcode|password|"
+    r"sign[- ]?in|log[- ]?in|magic link|two[- ]factor|2fa",
+    re.IGNORECASE
+)
+
+# Link paths, or the text just before a link, that mark it as the action link
+_LINK_HINT = re.compile(
+    r"verif|confirm|activat|validat|magic|sign[-_]?in|log[-_]?in|auth|reset|invite|token",
+    re.IGNORECASE
+)
+_LINK_NOISE = re.compile(
+    r"unsubscribe|preferences|privacy|terms|help|support|\.(?:png|jpe?g|gif|svg)\b",
+    re.IGNORECASE
+)
+
+# Coupons look like codes; text just before a match that marks one
+_PROMO = re.compile(r"promo|coupon|discount|voucher|% off|checkout", re.IGNORECASE)
+
+# Fallbacks when the subject names a code but the body does not label it:
+# a line holding only a code (also "7 4 3 1 9 0"), or else the one bare
+# number in the text; years are not codes
+_CODE_LINE = re.compile(rf"^[ \t]*({_CODE_TOKEN}|\d(?: \d){{3,7}})[ \t]*$", re.IGNORECASE | re.MULTILINE)
+_BARE_NUMBER = re.compile(r"(?<![\w$€£.,:/#+-])(\d{4,8})(?![\w%.,:/-]\d|[\w%])")
+_YEAR = re.compile(r"(?:19|20)\d\d")
+
+# Numeric codes written in groups
+_SPLIT_NUMBER = re.compile(r"\d[\d -]*\d")
+
+# Characters of text before a link (or code) searched for a hint
+_LINK_LABEL_CHARS = 60
+
+
+@dataclass
+class Verification:
+    """A one-time code and/or verification link found in a message."""
+    code: Optional[str] = None
+    link: Optional[str] = None
+
+
+def looks_like_verification(text: str) -> bool:
+    """Whether a subject or preview suggests a code or confirmation email."""
+    return bool(_TOPIC.search(text))
+
+
+def _normalize_code(code: str) -> str:
+    """Join grouped numeric codes ("123 456" -> "123456"); keep others as written."""
+    if _SPLIT_NUMBER.fullmatch(code):
+        return code.replace(" ", "").replace("-", "")
+    return code
+
+
+def extract_verification(subject: str, text: str) -> Optional[Verification]:
+    """
+    Find the one-time code and verification link of an email.
+
+    Codes must be labelled ("Your code is 123456", "123456 is your
+    verification code"); a bare number is accepted only when the subject
+    names a code and the body has exactly one candidate. Links count when
+    their URL or the text just before them looks like an action link.
+
+    Args:
+        subject: Email subject
+        text: Plain-text body (or preview)
+
+    Returns:
+        Verification with whatever was found, or None if nothing was.
+    """
+    code, link = _find_labelled(subject, text)
+    if code is None:
+        code = _unlabelled_code(subject, text)
+    if code is None and link is None:
+        return None
+    return Verification(code, link)
+
+
+def _find_labelled(subject: str, text: str) -> tuple[Optional[str], Optional[str]]:
+    """The first labelled code (subject first) and action link (body only)."""
+    code = link = None
+    for source in (subject, text):
+        for match in _PATTERN.finditer(source):
+            label_code, prefix_code, url = match.groups()
+            if code is None and (label_code or prefix_code):
+                context = source[max(0, match.start() - _LINK_LABEL_CHARS):match.end()]
+                if not _PROMO.search(context):
+                    code = _normalize_code(label_code or prefix_code)
+            elif url and link is None and source is text:
+                link = _action_link(url, text[max(0, match.start() - _LINK_LABEL_CHARS):match.start()])
+            if code and link:
+                return code, link
+    return code, link
+
+
+def _action_link(url: str, label: str) -> Optional[str]:
+    """The URL if it, or the text just before it, looks like an action link."""
+    url = url.rstrip(".,;:!?")
+    if not _LINK_NOISE.search(url) and (_LINK_HINT.search(url) or _LINK_HINT.search(label)):
+        return url
+    return None
+
+
+def _unlabelled_code(subject: str, text: str) -> Optional[str]:
+    """The single unlabelled code candidate of a message whose subject names a code."""
+    if not looks_like_verification(subject):
+        return None
+    candidates = set(_CODE_LINE.findall(text)) or {
+        n for n in _BARE_NUMBER.findall(text)
+        if not (len(n) == 4 and _YEAR.fullmatch(n))
+    }
+    if len(candidates) == 1:
+        return _normalize_code(candidates.pop())
+    return None
@@ -0,0 +1,5 @@
+"""Web package: HTTP server for the Mini App."""
+
+from . import httpserver, static
+
+__all__ = ["httpserver", "static"]
@@ -0,0 +1,195 @@
+"""
+Inbox API for the Mini App, served by the bot process.
+
+``GET /api/inbox`` returns the inbox the bot already keeps for the user
+(the notifier refreshes it on every poll), so open Mini Apps cost no
+Mail.tm requests of their own. Requests are authenticated with the
+Telegram WebApp init data, sent as ``Authorization: tma <initData>``.
+
+With ``?since=<version>`` the request is held until the inbox version
+differs or ``WEBAPP_LONG_POLL`` seconds pass (then 204 No Content), so
+clients see new mail as soon as the bot does.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from ..config import BOT_TOKEN, WEB_DIR, WEBAPP_AUTH_MAX_AGE, WEBAPP_CONCURRENCY, WEBAPP_LONG_POLL
+from ..database.storage import storage, UserSession
+from ..services.inbox_cache import inbox_cache, InboxEntry
+from ..services.lifecycle import record_activity
+from ..services.mailtm import MailTMError, MessageSummary
+from ..services.providers import provider_registry
+from ..services.tokens import ensure_fresh_token
+from ..utils.metrics import Counter
+from ..utils.render import INBOX_PAGE_SIZE
+from .httpserver import HTTPServer, Request, Response
+from .routes import CORS_HEADERS, make_handler
+from .static import StaticSite
+
+logger = logging.getLogger(__name__)
+
+WEBAPP_REQUESTS = Counter(
+    "webapp_api_requests_total", "Mini App API requests", ("endpoint", "status")
+)
+
+# Inbox fetches in flight, shared by concurrent requests of one user
+_loading: dict[int, asyncio.Task] = {}
+
+# Bounds storage and Mail.tm work; held long-polls do not count
+_semaphore = asyncio.Semaphore(WEBAPP_CONCURRENCY)
+
+
+def verify_init_data(init_data: str, bot_token: str, max_age: int = WEBAPP_AUTH_MAX_AGE) -> Optional[int]:
+    """
+    Check Telegram WebApp init data and return the user it was issued to.
+
+    Args:
+        init_data: ``Telegram.WebApp.initData`` query string
+        bot_token: Token of the bot the Mini App was opened from
+        max_age: Seconds after ``auth_date`` the data is accepted
+
+    Returns:
+        Telegram user ID, or None if the signature does not match or the
+        data is too old.
+    """
+    fields = dict(parse_qsl(init_data, keep_blank_values=True))
+    received = fields.pop("hash", "")
+    data_check = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    expected = hmac.new(secret, data_check.encode(), hashlib.sha256).hexdigest()
+    if not received or not hmac.compare_digest(expected, received):
+        return None
+    try:
+        if time.time() - int(fields.get("auth_date", 0)) > max_age:
+            return None
+        return int(json.loads(fields["user"])["id"])
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+def _message_json(msg: MessageSummary) -> dict:
+    """A cached message in the Mail.tm list format the Mini App renders."""
+    return {
+        "id": msg.id,
+        "from": {"address": msg.sender, "name": ""},
+        "subject": msg.subject,
+        "intro": msg.intro,
+        "createdAt": msg.created_at,
+        "seen": msg.seen,
+        "hasAttachments": msg.has_attachments,
+    }
+
+
+def inbox_payload(session: UserSession, entry: InboxEntry) -> dict:
+    """JSON body of ``GET /api/inbox``."""
+    return {
+        "email": session.email,
+        "version": inbox_cache.version(session.telegram_id),
+        "total": entry.total,
+        "messages": [_message_json(msg) for msg in entry.messages],
+    }
+
+
+async def _fetch_inbox(session: UserSession) -> InboxEntry:
+    """Fetch and cache an inbox the bot has no entry for yet."""
+    messages, total = await provider_registry.for_session(session).get_recent_messages(
+        await ensure_fresh_token(session), INBOX_PAGE_SIZE
+    )
+    if messages:
+        await storage.update_last_message(session.telegram_id, session.account_id, messages[0].id)
+    inbox_cache.put(session.telegram_id, messages, total)
+    return inbox_cache.get(session.telegram_id)
+
+
+async def load_inbox(session: UserSession) -> InboxEntry:
+    """The cached inbox of a user, fetched once if the bot has none yet."""
+    entry = inbox_cache.get(session.telegram_id)
+    if entry is not None:
+        return entry
+    user_id = session.telegram_id
+    task = _loading.get(user_id)
+    if task is None:
+        task = _loading[user_id] = asyncio.create_task(_fetch_inbox(session))
+        task.add_done_callback(lambda _: _loading.pop(user_id, None))
+    return await asyncio.shield(task)
+
+
+def _json(status: int, payload: dict) -> Response:
+    return Response(
+        status,
+        json.dumps(payload).encode(),
+        {"Content-Type": "application/json", "Cache-Control": "no-store"}
+    )
+
+
+async def handle_api(request: Request) -> Response:
+    """Answer a request under ``/api/``."""
+    if request.path != "/api/inbox":
+        return _json(404, {"error": "Not found"})
+    if request.method not in ("GET", "HEAD"):
+        return _json(405, {"error": "Method not allowed"})
+    response = await inbox_endpoint(request)
+    WEBAPP_REQUESTS.inc("inbox", str(response.status))
+    return response
+
+
+async def inbox_endpoint(request: Request) -> Response:
+    """``GET /api/inbox[?since=<version>]``."""
+    scheme, _, init_data = request.headers.get("authorization", "").partition(" ")
+    user_id = verify_init_data(init_data, BOT_TOKEN or "") if scheme.lower() == "tma" else None
+    if user_id is None:
+        return _json(401, {"error": "Invalid init data"})
+    async with _semaphore:
+        await record_activity(user_id)
+
+    since = request.query.get("since", [""])[0]
+    if since:
+        try:
+            version = int(since)
+        except ValueError:
+            return _json(400, {"error": "Invalid version"})
+        if not await inbox_cache.wait_for_change(user_id, version, WEBAPP_LONG_POLL):
+            return Response(204, headers={"Cache-Control": "no-store"})
+
+    async with _semaphore:
+        session = await storage.get_user(user_id)
+        if session is None:
+            return _json(404, {"error": "No address yet, send /start to the bot"})
+        try:
+            entry = await load_inbox(session)
+        except MailTMError as e:
+            logger.warning(f"Mini App inbox fetch failed for user {user_id}: {e}")
+            return _json(502, {"error": "Mail service unavailable"})
+    return _json(200, inbox_payload(session, entry))
+
+
+async def start_webapp_server(host: str, port: int) -> Optional[HTTPServer]:
+    """
+    Serve the Mini App files and the inbox API on a port.
+
+    Args:
+        host: Interface to bind
+        port: TCP port; 0 disables the server
+
+    Returns:
+        The running server, or None if disabled or the port is taken.
+    """
+    if not port:
+        return None
+    site = StaticSite(WEB_DIR)
+    site.load()
+    server = HTTPServer(make_handler(site, handle_api), headers=CORS_HEADERS)
+    try:
+        await server.start(host, port)
+    except OSError as e:
+        logger.warning(f"Mini App server not started on {host}:{port}: {e}")
+        return None
+    logger.info(f"Mini App and inbox API available at http://{host}:{port}/")
+    return server
@@ -0,0 +1,224 @@
+"""
+Minimal asyncio HTTP/1.1 server.
+
+Connections are kept alive between requests (until the client closes,
+sends ``Connection: close`` or stays idle for ``idle_timeout``), and
+every request runs as a coroutine on the event loop, so slow clients
+and long-polling requests do not hold up anyone else.
+"""
+
+import asyncio
+import logging
+import socket
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Awaitable, Callable, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Seconds an idle keep-alive connection stays open
+KEEPALIVE_TIMEOUT = 15
+
+# Largest request body accepted, in bytes
+MAX_BODY = 64 * 1024
+
+# Most header lines read per request
+MAX_HEADERS = 100
+
+
+@dataclass
+class Request:
+    """An HTTP request; header names are lower-case."""
+    method: str
+    path: str
+    query: dict[str, list[str]]
+    headers: dict[str, str]
+    body: bytes = b""
+
+
+@dataclass
+class Response:
+    """An HTTP response; ``Content-Length`` is added when sent."""
+    status: int
+    body: bytes = b""
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+class BadRequest(Exception):
+    """The request could not be parsed."""
+    def __init__(self, status: int = 400):
+        super().__init__(HTTPStatus(status).phrase)
+        self.status = status
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class HTTPServer:
+    """
+    Serve a request handler over HTTP/1.1 with keep-alive.
+
+    Args:
+        handler: Coroutine answering each request
+        headers: Headers added to every response
+        idle_timeout: Seconds an idle connection is kept open
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        headers: Optional[dict[str, str]] = None,
+        idle_timeout: float = KEEPALIVE_TIMEOUT
+    ):
+        self.handler = handler
+        self.headers = headers or {}
+        self.idle_timeout = idle_timeout
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: set[asyncio.Task] = set()
+
+    async def start(self, host: str = "", port: int = 0, sock: Optional[socket.socket] = None) -> asyncio.AbstractServer:
+        """Start accepting connections on ``host:port`` (or a bound socket)."""
+        if sock is not None:
+            self._server = await asyncio.start_server(self._serve, sock=sock)
+        else:
+            self._server = await asyncio.start_server(self._serve, host or None, port, backlog=1024)
+        return self._server
+
+    def close(self) -> None:
+        """Stop accepting connections and end open ones (held requests included)."""
+        if self._server:
+            self._server.close()
+        for task in self._connections:
+            task.cancel()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer requests on one connection until it is closed."""
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while await self._serve_one(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Server closing; asyncio would log a cancelled handler as an error
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _serve_one(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """
+        Answer the next request on a connection.
+
+        Returns:
+            Whether the connection stays open for another request.
+        """
+        try:
+            request, keep_alive = await asyncio.wait_for(self._read(reader), self.idle_timeout)
+        except asyncio.TimeoutError:
+            return False
+        except BadRequest as e:
+            self._write(writer, Response(e.status, f"{e}\n".encode()), "GET", keep_alive=False)
+            await writer.drain()
+            return False
+        if request is None:
+            return False
+
+        try:
+            response = await self.handler(request)
+        except Exception as e:
+            logger.error(f"Error answering {request.method} {request.path}: {e}")
+            response = Response(500, b"Internal server error\n")
+        self._write(writer, response, request.method, keep_alive)
+        await writer.drain()
+        return keep_alive
+
+    async def _read(self, reader: asyncio.StreamReader) -> tuple[Optional[Request], bool]:
+        """
+        Read one request.
+
+        Returns:
+            (request, keep_alive), or (None, False) once the client has
+            closed the connection.
+        """
+        line = await self._readline(reader, 414)
+        if not line.strip():
+            return None, False
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise BadRequest()
+
+        headers = await self._read_headers(reader)
+        body = await self._read_body(reader, headers)
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+
+        url = urlsplit(target)
+        return Request(
+            method=method.upper(),
+            path=unquote(url.path),
+            query=parse_qs(url.query),
+            headers=headers,
+            body=body
+        ), keep_alive
+
+    async def _read_headers(self, reader: asyncio.StreamReader) -> dict[str, str]:
+        """Read header lines up to the blank line ending the head; names lower-cased."""
+        headers: dict[str, str] = {}
+        for _ in range(MAX_HEADERS):
+            header = await self._readline(reader, 431)
+            if header in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = header.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        raise BadRequest(431)
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> bytes:
+        """Read a ``Content-Length`` body; chunked and oversized bodies are refused."""
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise BadRequest(411)
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise BadRequest()
+        if length > MAX_BODY:
+            raise BadRequest(413)
+        return await reader.readexactly(length) if length > 0 else b""
+
+    @staticmethod
+    async def _readline(reader: asyncio.StreamReader, status: int) -> bytes:
+        """
+        Read one line of the request head.
+
+        Raises:
+            BadRequest: With ``status`` if the line exceeds the stream limit
+        """
+        try:
+            return await reader.readline()
+        except ValueError:
+            # readline() reports an overrun of the stream limit as ValueError
+            raise BadRequest(status)
+
+    def _write(self, writer: asyncio.StreamWriter, response: Response, method: str, keep_alive: bool) -> None:
+        """Send a response; HEAD requests get the headers only."""
+        headers = {**self.headers, **response.headers}
+        # 204 and 304 carry no content, so no length either
+        if response.status not in (204, 304):
+            headers["Content-Length"] = str(len(response.body))
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        if keep_alive:
+            headers["Keep-Alive"] = f"timeout={int(self.idle_timeout)}"
+        head = f"HTTP/1.1 {response.status} {HTTPStatus(response.status).phrase}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        data = (head + "\r\n").encode("latin-1")
+        if method != "HEAD":
+            data += response.body
+        writer.write(data)
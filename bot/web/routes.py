@@ -0,0 +1,32 @@
+"""Request routing shared by ``server.py`` and the bot's Mini App server."""
+
+from typing import Optional
+
+from .httpserver import Handler, Request, Response
+from .static import StaticSite
+
+# Added to every response (the Mini App is usually hosted on another origin)
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, DELETE, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+}
+
+
+def make_handler(site: StaticSite, api: Optional[Handler] = None) -> Handler:
+    """
+    Request handler serving the files of ``site`` and, if given, ``/api/``.
+
+    Args:
+        site: Static files
+        api: Handler for paths under ``/api/``
+    """
+    async def handle(request: Request) -> Response:
+        if request.method == "OPTIONS":
+            return Response(204)
+        if api is not None and request.path.startswith("/api/"):
+            return await api(request)
+        if request.method not in ("GET", "HEAD"):
+            return Response(405, b"Method not allowed\n", {"Allow": "GET, HEAD, OPTIONS"})
+        return site.respond(request) or Response(404, b"Not found\n")
+    return handle
@@ -0,0 +1,215 @@
+"""
+In-memory static site with precompressed variants and HTTP caching.
+
+Files are read once (and again when they change on disk). Every asset
+other than HTML also gets a content-hashed name (``app.3f9a1c2b7d.js``);
+HTML pages are served with their references rewritten to those names,
+so the hashed files can be cached by browsers for a year, while pages
+and unhashed names are revalidated with their ETag on each load.
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Optional
+
+from .httpserver import Request, Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional, gzip only without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Hex digits of the content hash put into asset names and ETags
+HASH_LENGTH = 10
+
+# Files smaller than this are not compressed
+MIN_COMPRESS_SIZE = 512
+
+# Content types worth compressing
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDATE = "no-cache"
+
+
+@dataclass
+class Asset:
+    """One file as served: raw bytes plus compressed variants."""
+    body: bytes
+    content_type: str
+    digest: str
+    cache_control: str
+    encodings: dict[str, bytes] = field(default_factory=dict)
+
+    def etag(self, encoding: Optional[str]) -> str:
+        """Strong ETag of one representation."""
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+
+def _compress(body: bytes, content_type: str) -> dict[str, bytes]:
+    """Brotli and gzip variants that are smaller than the original."""
+    if len(body) < MIN_COMPRESS_SIZE or not content_type.startswith(COMPRESSIBLE):
+        return {}
+    variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=11)
+    return {name: data for name, data in variants.items() if len(data) < len(body)}
+
+
+def _accepted(header: str) -> set[str]:
+    """Content codings allowed by an ``Accept-Encoding`` header."""
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _hashed_name(path: str, digest: str) -> str:
+    """``js/app.js`` -> ``js/app.<digest>.js``."""
+    name = PurePosixPath(path)
+    return name.with_name(f"{name.stem}.{digest}{name.suffix}").as_posix()
+
+
+class StaticSite:
+    """
+    Serve the files of a directory from memory.
+
+    Args:
+        root: Directory to serve
+        index: File served for ``/``
+        check_interval: Seconds between checks for changed files (0
+            reads the files only once)
+    """
+
+    def __init__(self, root: Path, index: str = "index.html", check_interval: float = 0):
+        self.root = Path(root)
+        self.index = index
+        self.check_interval = check_interval
+        self._assets: dict[str, Asset] = {}
+        self._signature: tuple = ()
+        self._checked_at = 0.0
+
+    def load(self) -> None:
+        """Read, hash and compress every file under ``root``."""
+        files = {
+            path.relative_to(self.root).as_posix(): path.read_bytes()
+            for path in self._files()
+        }
+        assets: dict[str, Asset] = {}
+        renamed: dict[str, str] = {}
+
+        for name, body in files.items():
+            if name.endswith(".html"):
+                continue
+            digest = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+            content_type = self._content_type(name)
+            encodings = _compress(body, content_type)
+            hashed = _hashed_name(name, digest)
+            renamed[name] = hashed
+            assets[name] = Asset(body, content_type, digest, CACHE_REVALIDATE, encodings)
+            assets[hashed] = Asset(body, content_type, digest, CACHE_IMMUTABLE, encodings)
+
+        # Point pages at the hashed names (src="app.js" -> src="app.<hash>.js")
+        if renamed:
+            reference = re.compile(
+                r'((?:src|href)=")(\.?/?)(' + "|".join(map(re.escape, renamed)) + r')(")'
+            )
+        for name, body in files.items():
+            if not name.endswith(".html"):
+                continue
+            if renamed:
+                body = reference.sub(
+                    lambda m: m.group(1) + m.group(2) + renamed[m.group(3)] + m.group(4),
+                    body.decode("utf-8")
+                ).encode("utf-8")
+            content_type = self._content_type(name)
+            digest = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+            assets[name] = Asset(
+                body, content_type, digest, CACHE_REVALIDATE, _compress(body, content_type)
+            )
+
+        self._assets = assets
+        self._signature = self._scan()
+        self._checked_at = time.monotonic()
+        logger.info(f"Serving {len(files)} file(s) from {self.root}")
+
+    def respond(self, request: Request) -> Optional[Response]:
+        """
+        Answer a GET or HEAD request for a file.
+
+        Returns:
+            The response, or None if there is no such file.
+        """
+        self._reload_if_changed()
+        path = request.path.lstrip("/") or self.index
+        if path.endswith("/"):
+            path += self.index
+        asset = self._assets.get(path)
+        if asset is None:
+            return None
+
+        accepted = _accepted(request.headers.get("accept-encoding", ""))
+        encoding = next((name for name in ("br", "gzip") if name in accepted and name in asset.encodings), None)
+        etag = asset.etag(encoding)
+        headers = {"ETag": etag, "Cache-Control": asset.cache_control}
+        if asset.encodings:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (
+            if_none_match.strip() == "*"
+            or etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+        ):
+            return Response(304, headers=headers)
+
+        headers["Content-Type"] = asset.content_type
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return Response(200, asset.encodings[encoding], headers)
+        return Response(200, asset.body, headers)
+
+    def _content_type(self, name: str) -> str:
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        return content_type
+
+    def _files(self) -> list[Path]:
+        """Files under ``root``, skipping hidden ones."""
+        return [
+            path for path in sorted(self.root.rglob("*"))
+            if path.is_file() and not path.name.startswith(".")
+        ]
+
+    def _scan(self) -> tuple:
+        """Names, sizes and modification times of the files under ``root``."""
+        return tuple(
+            (path.as_posix(), stat.st_size, stat.st_mtime_ns)
+            for path in self._files()
+            for stat in (path.stat(),)
+        )
+
+    def _reload_if_changed(self) -> None:
+        """Re-read the files if any changed, at most every ``check_interval``."""
+        if not self.check_interval or time.monotonic() - self._checked_at < self.check_interval:
+            return
+        self._checked_at = time.monotonic()
+        if self._scan() != self._signature:
+            self.load()
@@ -1,37 +1,22 @@
 """Simple HTTP server for TempMail web interface."""
 
-import http.server
-import socketserver
-import os
+import argparse
+import asyncio
+import logging
+import socket
 import webbrowser
 from pathlib import Path
 
+from bot.web.httpserver import HTTPServer
+from bot.web.routes import CORS_HEADERS, make_handler
+from bot.web.static import StaticSite
+
 PORT = 8000
 WEB_DIR = Path(__file__).parent / "web"
 
 
-class Handler(http.server.SimpleHTTPRequestHandler):
-    """Custom handler to serve from web directory."""
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory=str(WEB_DIR), **kwargs)
-    
-    def end_headers(self):
-        # Add CORS headers for API requests
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
-        super().end_headers()
-    
-    def log_message(self, format, *args):
-        # Suppress default logging
-        pass
-
-
 def find_free_port(start_port=8000, max_attempts=10):
     """Find a free port starting from start_port."""
-    import socket
     for port in range(start_port, start_port + max_attempts):
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -42,36 +27,49 @@ def find_free_port(start_port=8000, max_attempts=10):
     return None
 
 
-def main():
-    os.chdir(WEB_DIR)
-    
+async def serve(port: int, open_browser: bool) -> None:
+    # Files are re-read when they change, so edits show up on reload
+    site = StaticSite(WEB_DIR, check_interval=1.0)
+    site.load()
+    server = HTTPServer(make_handler(site), headers=CORS_HEADERS)
+    await server.start("", port)
+
+    url = f"http://localhost:{port}"
+    print(f"\n{'='*50}")
+    print(f"  🌐 TempMail Web Server")
+    print(f"{'='*50}")
+    print(f"\n  ✅ Server running at: {url}")
+    print(f"\n  📧 Open in browser: {url}")
+    print(f"\n  Press Ctrl+C to stop the server")
+    print(f"{'='*50}\n")
+
+    # Open browser automatically
+    if open_browser:
+        webbrowser.open(url)
+
+    await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=None, help=f"port (default: first free from {PORT})")
+    parser.add_argument("--no-browser", action="store_true", help="do not open a browser")
+    args = parser.parse_args(argv)
+    logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+
     # Find a free port
-    port = find_free_port(PORT)
+    port = args.port or find_free_port(PORT)
     if port is None:
         print("❌ Could not find a free port!")
         return
-    
+
     try:
-        with socketserver.TCPServer(("", port), Handler) as httpd:
-            url = f"http://localhost:{port}"
-            print(f"\n{'='*50}")
-            print(f"  🌐 TempMail Web Server")
-            print(f"{'='*50}")
-            print(f"\n  ✅ Server running at: {url}")
-            print(f"\n  📧 Open in browser: {url}")
-            print(f"\n  Press Ctrl+C to stop the server")
-            print(f"{'='*50}\n")
-            
-            # Open browser automatically
-            webbrowser.open(url)
-            
-            try:
-                httpd.serve_forever()
-            except KeyboardInterrupt:
-                print("\n\n👋 Server stopped.")
+        asyncio.run(serve(port, not args.no_browser))
+    except KeyboardInterrupt:
+        print("\n\n👋 Server stopped.")
     except OSError as e:
         print(f"❌ Error starting server: {e}")
-        print("Try closing any other applications using port 8000")
+        print(f"Try closing any other applications using port {port}")
 
 
 if __name__ == "__main__":
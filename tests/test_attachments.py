@@ -0,0 +1,116 @@
+"""Tests for attachment forwarding and its disk cache."""
+
+import asyncio
+import tempfile
+import unittest
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+from bot.database.storage import storage
+from bot.services.attachments import AttachmentForwarder
+from bot.services.mailtm import Attachment
+
+
+class FakeService:
+    """Serves attachment bodies by download URL."""
+
+    def __init__(self, bodies: dict[str, bytes]):
+        self.bodies = bodies
+        self.downloads = 0
+
+    @asynccontextmanager
+    async def stream_attachment(self, token, download_url):
+        self.downloads += 1
+        body = self.bodies[download_url]
+
+        async def aiter_bytes():
+            for i in range(0, len(body), 1000):
+                await asyncio.sleep(0)
+                yield body[i:i + 1000]
+        yield SimpleNamespace(aiter_bytes=aiter_bytes)
+
+
+class FakeBot:
+    """Records the bytes of every uploaded document."""
+
+    def __init__(self):
+        self.uploads: list[bytes] = []
+
+    async def send_document(self, chat_id, document, filename=None):
+        await asyncio.sleep(0)
+        self.uploads.append(document.input_file_content.read())
+        return SimpleNamespace(document=None)
+
+
+class AttachmentCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.db_path = storage.db_path
+        storage.db_path = Path(self.dir.name) / "bot.db"
+        await storage.init_db()
+        self.bot = FakeBot()
+
+    async def asyncTearDown(self):
+        await storage.close()
+        storage.db_path = self.db_path
+        self.dir.cleanup()
+
+    def forwarder(self, cache_max_bytes: int) -> AttachmentForwarder:
+        return AttachmentForwarder(
+            cache_dir=Path(self.dir.name) / "cache", max_bytes=10**6, cache_max_bytes=cache_max_bytes
+        )
+
+    @staticmethod
+    def attachment(n: int, size: int) -> Attachment:
+        return Attachment(f"att{n}", f"file{n}.bin", "application/octet-stream", size, f"/dl/{n}")
+
+    async def test_download_larger_than_cache_is_sent(self):
+        body = b"x" * 5000
+        service = FakeService({"/dl/1": body})
+        await self.forwarder(1000).send(self.bot, 1, service, "t", "m1", self.attachment(1, len(body)))
+        self.assertEqual(self.bot.uploads, [body])
+
+    async def test_concurrent_sends_with_evictions(self):
+        bodies = {f"/dl/{n}": bytes([n]) * 3000 for n in range(8)}
+        service = FakeService(bodies)
+        forwarder = self.forwarder(4000)
+        results = await asyncio.gather(*(
+            forwarder.send(self.bot, 1, service, "t", f"m{n}", self.attachment(n, 3000)) for n in range(8)
+        ), return_exceptions=True)
+        self.assertEqual(results, [None] * 8)
+        self.assertEqual(sorted(self.bot.uploads), sorted(bodies.values()))
+        self.assertEqual(forwarder._pinned, {})
+
+        # Files pinned during the last prune go with the next download
+        service.bodies["/dl/8"] = b"z" * 1000
+        await forwarder.send(self.bot, 1, service, "t", "m8", self.attachment(8, 1000))
+        cached = sum(p.stat().st_size for p in forwarder.cache_dir.iterdir())
+        self.assertLessEqual(cached, 4000)
+
+    async def test_pinned_file_survives_prune(self):
+        forwarder = self.forwarder(0)
+        forwarder.cache_dir.mkdir()
+        (forwarder.cache_dir / "a").write_bytes(b"a")
+        (forwarder.cache_dir / "b").write_bytes(b"b")
+        self.assertTrue(forwarder._pin("a", check=True))
+        forwarder._prune()
+        self.assertEqual([p.name for p in forwarder.cache_dir.iterdir()], ["a"])
+        forwarder._unpin("a")
+        self.assertFalse(forwarder._pin("b", check=True))
+
+    async def test_evicted_file_is_downloaded_again(self):
+        body = b"y" * 2000
+        service = FakeService({"/dl/1": body})
+        forwarder = self.forwarder(10**6)
+        await forwarder.send(self.bot, 1, service, "t", "m1", self.attachment(1, len(body)))
+
+        cached = await storage.get_attachment("m1/att1")
+        (forwarder.cache_dir / cached.sha256).unlink()
+        await forwarder.send(self.bot, 1, service, "t", "m1", self.attachment(1, len(body)))
+        self.assertEqual(self.bot.uploads, [body, body])
+        self.assertEqual(service.downloads, 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+"""Tests for the HTML-to-text conversion."""
+
+import unittest
+
+from bot.utils.html2text import html_to_text
+
+
+class HtmlToTextTest(unittest.TestCase):
+
+    def test_head_without_end_tag(self):
+        html = "<html><head><meta charset=utf-8><body><p>Your code is 123456</p></body></html>"
+        self.assertEqual(html_to_text(html, 4000), "Your code is 123456")
+
+    def test_unclosed_title_ends_at_body(self):
+        html = "<head><title>Sign in<body><p>Code: 4821</p>"
+        self.assertEqual(html_to_text(html, 4000), "Code: 4821")
+
+    def test_head_content_hidden(self):
+        html = "<head><title>T</title><style>p { color: red }</style></head><body><p>Hi</p></body>"
+        self.assertEqual(html_to_text(html, 4000), "Hi")
+
+    def test_links_and_paragraphs(self):
+        html = '<p>One</p><p>Verify <a href="https://x.test/v?t=1">here</a></p>'
+        self.assertEqual(html_to_text(html, 4000), "One\n\nVerify here (https://x.test/v?t=1)")
+
+    def test_budget(self):
+        self.assertEqual(len(html_to_text("<p>" + "a" * 100 + "</p>", 10)), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
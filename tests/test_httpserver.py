@@ -0,0 +1,49 @@
+"""Tests for the Mini App HTTP server."""
+
+import asyncio
+import unittest
+
+from bot.web.httpserver import HTTPServer, Request, Response
+
+
+async def ok(request: Request) -> Response:
+    return Response(200, b"ok\n")
+
+
+class OversizedHeadTest(unittest.IsolatedAsyncioTestCase):
+    """Request heads longer than the stream limit are refused, not dropped."""
+
+    async def asyncSetUp(self):
+        self.server = HTTPServer(ok)
+        sockets = (await self.server.start("127.0.0.1", 0)).sockets
+        self.port = sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await asyncio.sleep(0)
+
+    async def send(self, head: bytes) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        try:
+            writer.write(head)
+            await writer.drain()
+            return await asyncio.wait_for(reader.read(), 5)
+        finally:
+            writer.close()
+
+    async def test_long_request_line(self):
+        reply = await self.send(b"GET /" + b"a" * 70 * 1024 + b" HTTP/1.1\r\nHost: x\r\n\r\n")
+        self.assertTrue(reply.startswith(b"HTTP/1.1 414 "), reply[:80])
+        self.assertIn(b"Connection: close", reply)
+
+    async def test_long_header(self):
+        reply = await self.send(b"GET / HTTP/1.1\r\nX-Big: " + b"a" * 70 * 1024 + b"\r\n\r\n")
+        self.assertTrue(reply.startswith(b"HTTP/1.1 431 "), reply[:80])
+
+    async def test_connection_still_serves_normal_requests(self):
+        reply = await self.send(b"GET / HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+        self.assertTrue(reply.startswith(b"HTTP/1.1 200 "), reply[:80])
+
+
+if __name__ == "__main__":
+    unittest.main()
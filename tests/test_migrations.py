@@ -0,0 +1,65 @@
+"""Tests for the schema migrations."""
+
+import base64
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from bot.database.migrations import MIGRATIONS
+from bot.database.storage import Storage
+
+
+def make_token(exp: int) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return f"e30.{payload}.sig"
+
+
+class LegacyDatabaseTest(unittest.IsolatedAsyncioTestCase):
+    """A file from the one-address-per-user schema, before versioning."""
+
+    async def asyncSetUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "bot.db"
+        with sqlite3.connect(self.path) as db:
+            db.execute("""
+                CREATE TABLE users (
+                    telegram_id INTEGER PRIMARY KEY,
+                    email TEXT NOT NULL,
+                    password TEXT NOT NULL,
+                    token TEXT NOT NULL,
+                    account_id TEXT NOT NULL,
+                    last_message_id TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            db.executemany(
+                "INSERT INTO users (telegram_id, email, password, token, account_id) VALUES (?, ?, ?, ?, ?)",
+                [(1, "a@x.test", "p", make_token(1700000000), "acc1"), (2, "b@x.test", "p", "opaque", "acc2")]
+            )
+        self.storage = Storage(shards=1)
+        self.storage.db_path = self.path
+        await self.storage.init_db()
+
+    async def asyncTearDown(self):
+        await self.storage.close()
+        self.dir.cleanup()
+
+    async def test_schema_version(self):
+        with sqlite3.connect(self.path) as db:
+            self.assertEqual(db.execute("PRAGMA user_version").fetchone()[0], MIGRATIONS[-1].version)
+
+    async def test_token_expiry_read_from_token(self):
+        user = await self.storage.get_user(1)
+        self.assertEqual(user.email, "a@x.test")
+        self.assertEqual(user.token_expires_at, 1700000000)
+        expiring = await self.storage.get_accounts_with_expiring_tokens(1700000001, 10)
+        self.assertEqual([account.account_id for account in expiring], ["acc1"])
+
+    async def test_unreadable_token_left_alone(self):
+        self.assertIsNone((await self.storage.get_user(2)).token_expires_at)
+
+
+if __name__ == "__main__":
+    unittest.main()
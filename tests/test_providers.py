@@ -0,0 +1,75 @@
+"""Tests for spreading accounts over several Mail.tm-compatible providers."""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from benchmarks.fakes import FakeMailTM
+from bot.database.storage import storage
+from bot.services import notifier
+from bot.services.providers import ProviderRegistry
+
+
+class TwoProvidersTest(unittest.IsolatedAsyncioTestCase):
+    """Two local Mail.tm stand-ins behind one registry."""
+
+    async def asyncSetUp(self):
+        self.one = FakeMailTM(domain="one.test")
+        self.two = FakeMailTM(domain="two.test", seed=1)
+        await self.one.start()
+        await self.two.start()
+        self.registry = ProviderRegistry([self.one.url, self.two.url])
+
+        self.dir = tempfile.TemporaryDirectory()
+        self.db_path = storage.db_path
+        storage.db_path = Path(self.dir.name) / "bot.db"
+        await storage.init_db()
+
+    async def asyncTearDown(self):
+        await self.registry.close()
+        await self.one.stop()
+        await self.two.stop()
+        await storage.close()
+        storage.db_path = self.db_path
+        self.dir.cleanup()
+
+    async def test_new_accounts_spread_over_providers(self):
+        sessions = [await self.registry.create_session(user) for user in range(1, 5)]
+        self.assertEqual(
+            sorted(session.provider for session in sessions),
+            sorted([self.one.url, self.two.url] * 2)
+        )
+        self.assertEqual(len(self.one.accounts), 2)
+        self.assertEqual(len(self.two.accounts), 2)
+        for session in sessions:
+            domain = "one.test" if session.provider == self.one.url else "two.test"
+            self.assertTrue(session.email.endswith(f"@{domain}"))
+
+    async def test_creation_fails_over_from_failing_provider(self):
+        self.two.error_rate = 1.0
+        sessions = [await self.registry.create_session(user) for user in range(1, 5)]
+        self.assertEqual({session.provider for session in sessions}, {self.one.url})
+        self.assertEqual(len(self.one.accounts), 4)
+        self.assertEqual(self.two.accounts, {})
+        self.assertGreater(self.two.requests, 0)
+        self.assertLess(self.registry.get(self.two.url).health, 1.0)
+
+    async def test_provider_recorded_and_polled(self):
+        sessions = [await self.registry.create_session(user) for user in range(1, 3)]
+        session = next(s for s in sessions if s.provider == self.two.url)
+        await storage.save_account(session)
+
+        saved = await storage.get_user(session.telegram_id)
+        self.assertEqual(saved.provider, self.two.url)
+
+        delivered = self.two.deliver(saved.account_id, count=2)
+        before = self.one.requests
+        with mock.patch.object(notifier, "provider_registry", self.registry):
+            token, new_messages = await notifier.check_account_emails(saved)
+        self.assertEqual([msg.id for msg in new_messages], delivered)
+        self.assertEqual(self.one.requests, before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,21 @@
+"""Tests for code and link extraction over the labelled corpus."""
+
+import json
+
+import pytest
+
+from benchmarks.bench_verification import CORPUS
+from bot.utils.verification import extract_verification
+
+SAMPLES = json.loads(CORPUS.read_text())
+
+
+@pytest.mark.parametrize(
+    "sample", SAMPLES, ids=[f"{i}-{sample['subject'][:40]}" for i, sample in enumerate(SAMPLES)]
+)
+def test_extracts_labelled_code_and_link(sample):
+    found = extract_verification(sample["subject"], sample["text"])
+    if sample["code"] is None and sample["link"] is None:
+        assert found is None
+    else:
+        assert (found.code, found.link) == (sample["code"], sample["link"])
@@ -17,7 +17,12 @@ const state = {
     isLoading: false,
     autoRefreshInterval: null,
     isBotMode: false,
-    notificationsEnabled: false
+    notificationsEnabled: false,
+    apiBase: '',
+    botInbox: false,
+    inboxVersion: null,
+    watchId: 0,
+    messageTotal: 0
 };
 
 // =========================================
@@ -225,8 +230,13 @@ async function getMessages() {
     if (!state.account) return [];
     try {
         const response = await apiRequest('/messages');
-        return response['hydra:member'] || [];
-    } catch (e) { return []; }
+        const messages = response['hydra:member'] || [];
+        state.messageTotal = response['hydra:totalItems'] ?? messages.length;
+        return messages;
+    } catch (e) {
+        state.messageTotal = 0;
+        return [];
+    }
 }
 
 async function getMessage(id) {
@@ -237,6 +247,75 @@ async function deleteMessage(id) {
     await apiRequest(`/messages/${id}`, { method: 'DELETE' });
 }
 
+// =========================================
+// Bot Inbox
+// =========================================
+
+// The bot serves the inbox it already polls (GET /api/inbox), so an open
+// Mini App adds no Mail.tm requests; ?since=<version> waits for a change.
+
+function initBotApi() {
+    const api = new URLSearchParams(window.location.search).get('api');
+    if (api) localStorage.setItem('tempmail_api', api);
+    state.apiBase = (api || localStorage.getItem('tempmail_api') || '').replace(/\/$/, '');
+}
+
+async function botInboxRequest(since = null) {
+    const query = since === null ? '' : `?since=${since}`;
+    const response = await fetch(`${state.apiBase}/api/inbox${query}`, {
+        headers: { 'Authorization': `tma ${tg.initData}` }
+    });
+    if (response.status === 204) return null;
+    if (!response.ok) throw new Error('Bot API Error');
+    return response.json();
+}
+
+function isBotAddress(data) {
+    // Only the address the bot watches is in its cache
+    return data.email === state.account?.email;
+}
+
+function applyBotInbox(data) {
+    state.inboxVersion = data.version;
+    state.messages = data.messages;
+    state.messageTotal = data.total;
+    if (state.currentPage === 'inbox') renderInbox();
+    else updateInboxCount(data.total);
+}
+
+async function connectBotInbox() {
+    if (!state.apiBase || !tg?.initData || !state.account) return false;
+    try {
+        const data = await botInboxRequest();
+        if (!isBotAddress(data)) return false;
+        applyBotInbox(data);
+        return true;
+    } catch (e) { return false; }
+}
+
+async function watchBotInbox() {
+    // A newer call takes over; this loop ends once its request returns
+    const watch = ++state.watchId;
+    let delay = 1000;
+    while (state.botInbox && watch === state.watchId) {
+        try {
+            const data = await botInboxRequest(state.inboxVersion);
+            if (watch !== state.watchId) break;
+            if (data && !isBotAddress(data)) {
+                // Address changed: reconnect, or fall back to polling
+                startAutoRefresh();
+                break;
+            }
+            if (data) applyBotInbox(data);
+            delay = 1000;
+        } catch (e) {
+            // Bot restarting or offline: back off, then resume
+            await new Promise(resolve => setTimeout(resolve, delay));
+            delay = Math.min(delay * 2, 60000);
+        }
+    }
+}
+
 // =========================================
 // Navigation
 // =========================================
@@ -301,7 +380,7 @@ function updateInboxCount(count) {
 
 function renderInbox() {
     const messages = state.messages;
-    updateInboxCount(messages.length);
+    updateInboxCount(state.messageTotal);
 
     if (messages.length === 0) {
         elements.inboxList.innerHTML = '';
@@ -385,7 +464,9 @@ async function generateNewEmail() {
         state.account = newAccount;
         saveAccount(state.account);
         state.messages = [];
+        state.messageTotal = 0;
         renderInbox();
+        startAutoRefresh();
         showToast('New Identity Created', 'success');
         window.haptic?.('success');
 
@@ -412,6 +493,16 @@ function syncToBot(account) {
 async function loadInbox() {
     if (elements.refreshBtn) elements.refreshBtn.classList.add('loading');
     try {
+        if (state.botInbox) {
+            try {
+                const data = await botInboxRequest();
+                if (isBotAddress(data)) {
+                    applyBotInbox(data);
+                    renderInbox();
+                    return;
+                }
+            } catch (e) { /* read it from Mail.tm below */ }
+        }
         state.messages = await getMessages();
         renderInbox();
     } finally {
@@ -559,6 +650,7 @@ function setupEventListeners() {
                         try {
                             await deleteMessage(state.currentMessage.id);
                             state.messages = state.messages.filter(m => m.id !== state.currentMessage.id);
+                            state.messageTotal = Math.max(state.messageTotal - 1, 0);
                             // We go back to inbox
                             navigateTo('inbox');
                             showToast('Deleted', 'success');
@@ -585,8 +677,17 @@ function closeAllModals() {
 // Loop
 // =========================================
 
-function startAutoRefresh() {
+async function startAutoRefresh() {
+    // Opened from the bot: it pushes inbox changes, nothing to poll
+    const botInbox = await connectBotInbox();
     if (state.autoRefreshInterval) clearInterval(state.autoRefreshInterval);
+    state.autoRefreshInterval = null;
+    state.botInbox = botInbox;
+    if (state.botInbox) {
+        watchBotInbox();
+        return;
+    }
+
     state.autoRefreshInterval = setInterval(async () => {
         if (state.currentPage === 'inbox') await loadInbox();
     }, 15000);
@@ -595,6 +696,7 @@ function startAutoRefresh() {
 // Init
 async function init() {
     initTelegram();
+    initBotApi();
     setupEventListeners();
     await initAccount();
     startAutoRefresh();